@@ -1,14 +1,26 @@
 import sys
 import os
-import cv2
-from pygame import mixer 
+import time
+
+# Process start reference for the startup timings
+APP_START = time.perf_counter()
+
+import argparse
 from PyQt5.QtWidgets import (
     QApplication, QWidget, QLabel, QVBoxLayout, QPushButton,
     QHBoxLayout, QFrame, QSizePolicy, QSpacerItem, QMessageBox, QToolButton
 )
-from PyQt5.QtCore import QThread, pyqtSignal, Qt, QSize
+from PyQt5.QtCore import QThread, QTimer, pyqtSignal, Qt, QSize
 from PyQt5.QtGui import QImage, QPixmap, QFont, QIcon
-from ultralytics import YOLO
+
+# Make the shared drivesafe package importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drivesafe.frame_buffer import LatestFrameBuffer, CaptureWorker
+from drivesafe.scheduler import FrameScheduler
+from drivesafe.tuning import DEFAULT_PATH as TUNING_PATH, load_tuning, apply_tuning, format_tuning, input_size_for
+
+# Heavy modules (cv2, numpy, pygame, the inference runtime) are imported by
+# ModelLoader on a background thread so the window can show immediately.
 
 # -------------------- Function to get correct file paths --------------------
 def resource_path(relative_path):
@@ -21,100 +33,398 @@ def resource_path(relative_path):
     return os.path.join(base_path, relative_path)
 
 # -------------------- Initialize audio mixer --------------------
-mixer.init()
+mixer = None
+
+def init_audio():
+    """ Initialize pygame's mixer and load the alarm (called from ModelLoader) """
+    global mixer
+    from pygame import mixer as pygame_mixer
+    pygame_mixer.init()
+    # Load alarm sound file
+    try:
+        pygame_mixer.music.load(resource_path("alarm.mp3"))
+    except Exception as e:
+        print(f"Error loading alarm.mp3: {e}")
+    mixer = pygame_mixer
+
+def play_alarm():
+    mixer.music.play(-1)
+
+def stop_alarm():
+    mixer.music.stop()
+
+# Top inference rate of --adaptive-rate when no --inference-fps cap is given
+DEFAULT_ADAPTIVE_FPS = 30
+
+# -------------------- Status styles --------------------
+# Displayed state -> (text, text style, dot style), built once; the GUI only
+# applies them when the state changes, since every setStyleSheet reparses CSS
+INACTIVE = "INACTIVE"
+STATUS_STYLES = {
+    INACTIVE: ("Inactive", "color: #0078d7; font-weight: bold;", "background: #808080; border-radius:8px;"),
+    # Red dot - Face not detected
+    "ABSENT": ("Face not detected", "color: #e67e22; font-weight: bold;", "background: #e74c3c; border-radius:8px;"),
+    # Green dot - Face present; stays "Awake" while drowsy below the threshold
+    "AWAKE": ("Awake", "color: #2ecc71; font-weight: bold;", "background: #2ecc71; border-radius:8px;"),
+    # After the threshold - text turns red
+    "DROWSY_ALERT": (" DROWSY - ALERT", "color: #e74c3c; font-weight: bold;", "background: #2ecc71; border-radius:8px;"),
+}
+
+# -------------------- Background model loader --------------------
+class ModelLoader(QThread):
+    ready_signal = pyqtSignal(object)  # loaded backend
+    error_signal = pyqtSignal(str)
+
+    def __init__(self, backend, model_path, threads=None, imgsz=None, warmup_runs=2):
+        super().__init__()
+        self.backend = backend
+        self.model_path = model_path
+        self.threads = threads
+        self.imgsz = imgsz
+        self.warmup_runs = warmup_runs
+
+    def run(self):
+        try:
+            import numpy as np
+            from drivesafe.backends import load_backend
+            from drivesafe.preprocess import Preprocessor
+            # Imported here so VideoThread finds them already loaded
+            import drivesafe.motion_gate, drivesafe.profiling  # noqa: F401
+
+            model = load_backend(self.backend, resource_path(self.model_path), threads=self.threads)
+
+            # The first inferences are much slower than steady state; pay for them now
+            preprocess = Preprocessor(input_size_for(model, self.imgsz))
+            dummy = np.zeros((480, 640, 3), dtype=np.uint8)
+            for _ in range(self.warmup_runs):
+                model.predict(preprocess(dummy))
+        except Exception as e:
+            self.error_signal.emit(str(e))
+            return
+
+        try:
+            init_audio()
+        except Exception as e:
+            print(f"Error initializing audio: {e}")
+
+        self.ready_signal.emit(model)
 
 # -------------------- Video processing thread --------------------
 class VideoThread(QThread):
     # Convert image 
     change_pixmap_signal = pyqtSignal(QImage)
-    status_signal = pyqtSignal(str, int, bool)  # label_name, drowsy_counter, alarm_active
+    status_signal = pyqtSignal(str)  # ABSENT, AWAKE or DROWSY_ALERT; emitted on changes only
 
-    def __init__(self, model, labels_dict, window_size=30):
+    def __init__(self, model, labels_dict, alert_seconds=None, pipelined=True, inference_fps=None, imgsz=640,
+                 motion_gate=True, adaptive_rate=False, profile=False, display_fps=30,
+                 roi=False, roi_imgsz=320, face_model=None, event_log=None, metrics=None, clips=None,
+                 audio=None, source="0", capture_size=None, input_size=None, clock=time.monotonic, sleep=time.sleep):
         super().__init__()
+        from drivesafe.preprocess import Preprocessor
+        from drivesafe.motion_gate import MotionGate, AdaptiveRate
+        from drivesafe.profiling import StageProfiler
+        from drivesafe.state_engine import DrowsinessStateEngine, ALERT_SECONDS
+        from drivesafe.roi import FaceROI, create_face_detector
+
         self.model = model
         self.labels_dict = labels_dict
-        self.window_size = window_size
+        # Time source for scheduling and decisions; a replay passes a simulated one (run_serial only)
+        self.clock = clock
+        # Alarm after this many seconds of continuous drowsiness, whatever the frame rate
+        self.state_engine = DrowsinessStateEngine(alert_after=alert_seconds or ALERT_SECONDS)
+        # Pipelined: capture runs on its own thread and inference always takes the newest frame
+        self.pipelined = pipelined
+        # Optional cap on inference rate (None = as fast as the model allows)
+        if adaptive_rate and not inference_fps:
+            # The adaptive rate needs a top rate to return to
+            inference_fps = DEFAULT_ADAPTIVE_FPS
+        self.scheduler = FrameScheduler(inference_fps, clock=clock, sleep=sleep) if inference_fps else None
+        # Reuse the last prediction while the scene is unchanged
+        self.motion_gate = MotionGate(clock=clock) if motion_gate else None
+        # Slow down while the driver is steadily awake/absent, speed up when drowsiness builds
+        self.adaptive_rate = AdaptiveRate(max_fps=inference_fps) if adaptive_rate else None
+        self.last_probs = None
+        # Per-stage latency histograms (no-op unless profiling is enabled)
+        self.profiler = StageProfiler(profile)
+        # Center crop + resize + grayscale straight into a reusable model-ready tensor
+        # input_size (from the tuning profile) wins when the model accepts any size
+        self.preprocess = Preprocessor(input_size_for(model, input_size, imgsz))
+        # Optional face ROI: classify a padded face crop at a smaller size instead of the full frame
+        self.roi = None
+        if roi:
+            self.roi = FaceROI(create_face_detector(face_model))
+            self.roi_preprocess = Preprocessor(roi_imgsz if model.dynamic_size else model.input_size)
+        # Optional per-frame decision log (a directory; a new file per session) and live counters
+        self.event_log_dir = event_log
+        self.event_log = None
+        self.metrics = metrics
+        self.frame_no = 0
+        # Optional alert clips: a compressed pre-event ring, encoded off this thread
+        self.clips_dir = clips
+        # Camera index, video file or "synthetic"; asked for frames near the model size
+        self.source = source
+        self.capture_size = capture_size  # "WxH" or None
+        self.clip_recorder = None
+        # Alarm sound (AudioController); only told about alarm transitions
+        self.audio = audio
+        # Last state sent to the GUI
+        self.shown_state = None
+        self.status_emits = 0
         self.running = False
         self.cap = None
-        self.drowsy_counter = 0
-        self.alert_triggered = False
-        
-        # Load alarm sound file
-        try:
-            mixer.music.load(resource_path("alarm.mp3"))
-        except Exception as e:
-            print(f"Error loading alarm.mp3: {e}")
+        self.frame_buffer = None
+        # Capture timestamp -> decision time of the last processed frame (seconds)
+        self.last_latency = 0.0
+
+        # Rendering: frames are scaled here to the label size and emitted at most
+        # display_fps, and only once the GUI has shown the previous one
+        self.display_interval = 1.0 / display_fps
+        self.display_size = (720, 420)
+        self.frame_pending = False
+        self.last_render = 0.0
+        self.frames_rendered = 0
+        self.frames_coalesced = 0
+        self._scaled = None
+        self._rgb = None
+
+    def set_display_size(self, width, height):
+        """ Called from the GUI thread when the video label is resized """
+        self.display_size = (max(1, width), max(1, height))
+
+    def frame_shown(self):
+        """ Called from the GUI thread once the last emitted frame is on screen """
+        self.frame_pending = False
 
     def run(self):
-        self.cap = cv2.VideoCapture(0)
-        
+        from drivesafe.event_log import EventLog
+        from drivesafe.clip_recorder import ClipRecorder
+        from drivesafe.capture import open_capture, capture_size_for, parse_size
+
+        # ROI mode keeps 640x480 so the face crop has enough pixels
+        if self.capture_size:
+            size = parse_size(self.capture_size)
+        else:
+            size = (640, 480) if self.roi is not None else capture_size_for(self.preprocess.size)
+        self.cap = open_capture(self.source, size=size)
+        print(f"Capture: {self.cap.name} at {self.cap.size[0]}x{self.cap.size[1]}")
+        if self.event_log_dir:
+            self.event_log = EventLog(self.event_log_dir)
+        if self.clips_dir:
+            self.clip_recorder = ClipRecorder(self.clips_dir).start()
+
+        self.shown_state = None
         self.running = True
+        if self.pipelined:
+            self.run_pipelined()
+        else:
+            self.run_serial()
+
+        if self.cap is not None:
+            self.cap.release()
+        if self.event_log is not None:
+            self.event_log.close()
+            print(f"Event log: {self.event_log.appended} records written to {self.event_log.path}")
+        if self.clip_recorder is not None:
+            self.clip_recorder.stop()
+            print(self.clip_recorder.format_stats())
+
+        if self.motion_gate is not None:
+            stats = self.motion_gate.stats()
+            print(f"Motion gate: skipped {stats['skipped']}/{stats['frames']} frames "
+                  f"({100 * stats['skip_rate']:.1f}%), ~{stats['cpu_saved_s']:.1f}s inference saved")
+        print(f"Display: {self.frames_rendered} frames rendered, {self.frames_coalesced} coalesced, "
+              f"{self.status_emits} status changes sent")
+        if self.roi is not None:
+            stats = self.roi.stats()
+            print(f"Face ROI: {stats['detections']} detections, {stats['tracked']} tracked, "
+                  f"{stats['lost']} lost over {stats['frames']} frames")
+        if self.profiler.enabled:
+            print(self.profiler.format_report())
+
+    def run_serial(self):
         while self.running:
+            if self.scheduler is not None:
+                self.scheduler.wait()
+            self.profiler.begin()
             ret, frame = self.cap.read()
             if not ret:
                 continue
+            self.profiler.mark("capture")
+            self.process_frame(frame, self.clock())
 
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            input_frame = cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
-
-            results = self.model.predict(input_frame, verbose=False)
-            label_index = int(results[0].probs.top1)
-            label_name = self.labels_dict.get(label_index, "unknown")
-
-            # Variable to track alarm state
-            alarm_is_active = False
-
-            if label_name == "drowsy":
-                self.drowsy_counter += 1
-            else:
-                self.drowsy_counter = 0
-                self.alert_triggered = False
-                try:
-                    mixer.music.stop()
-                except:
-                    pass
-
-            # Activate alarm only when threshold is exceeded
-            if self.drowsy_counter >= self.window_size and not self.alert_triggered:
-                try:
-                    mixer.music.play(-1)
-                except Exception as e:
-                    print(f"Error playing alarm: {e}")
-                self.alert_triggered = True
-            
-            # Determine if alarm is currently active
-            if self.drowsy_counter >= self.window_size:
-                alarm_is_active = True
-
-            # Show the frame on the screen to user
-            frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            h, w, ch = frame_rgb.shape
-            bytes_per_line = ch * w
-            qimg = QImage(frame_rgb.data, w, h, bytes_per_line, QImage.Format_RGB888)
-            self.change_pixmap_signal.emit(qimg)
-            # Send alarm state with data
-            self.status_signal.emit(label_name, self.drowsy_counter, alarm_is_active)
+    def run_pipelined(self):
+        self.frame_buffer = LatestFrameBuffer()
+        capture = CaptureWorker(self.cap, self.frame_buffer)
+        capture.start()
+        try:
+            while self.running:
+                if self.scheduler is not None:
+                    self.scheduler.wait()
+                self.profiler.begin()
+                item = self.frame_buffer.get(timeout=0.5)
+                if item is None:
+                    if self.frame_buffer.closed:
+                        break  # end of the video file, or the camera gave up
+                    continue
+                self.profiler.mark("capture")
+                _, captured_at, frame = item
+                self.process_frame(frame, captured_at)
+        finally:
+            capture.stop()
+            capture.join(timeout=1.0)
+            stats = self.frame_buffer.stats()
+            print(f"Capture stats: {stats['captured']} captured, "
+                  f"{stats['dropped']} dropped, {stats['stale']} stale")
+
+    def process_frame(self, frame, captured_at):
+        from drivesafe.roi import ABSENT_PROBS
+
+        if self.roi is None:
+            preprocess = self.preprocess
+            model_input = preprocess(frame)
+        else:
+            preprocess = self.roi_preprocess
+            box = self.roi.update(frame)
+            model_input = None if box is None else preprocess(self.roi.crop(frame, box))
+        self.profiler.mark("preprocess")
+
+        inference_seconds = None
+        if model_input is None:
+            # Face lost: the driver is reported absent without running the model
+            self.last_probs = ABSENT_PROBS
+            if self.motion_gate is not None:
+                self.motion_gate.reset()
+        elif self.motion_gate is None or self.motion_gate.should_infer(preprocess.gray):
+            started = self.clock()
+            probs = self.model.predict(model_input)[0]
+            self.last_probs = probs
+            inference_seconds = self.clock() - started
+            if self.motion_gate is not None:
+                self.motion_gate.record_inference(inference_seconds)
+        self.profiler.mark("inference")
+
+        # Smoothed, time-based state (timestamped at capture, so queueing delay counts)
+        was_alarm = self.state_engine.alarm
+        decision = self.state_engine.update(self.last_probs, captured_at)
+        label_name = decision.label
+        alarm_is_active = decision.alarm
+
+        # Alarm sound: transitions only, handed to the audio thread (never blocks here)
+        if alarm_is_active != was_alarm and self.audio is not None:
+            self.audio.request(alarm_is_active)
+
+        if self.clip_recorder is not None:
+            self.clip_recorder.push(frame, captured_at)
+            if alarm_is_active and not was_alarm:
+                self.clip_recorder.trigger(captured_at)
+
+        if self.adaptive_rate is not None:
+            self.scheduler.set_fps(self.adaptive_rate.update(label_name, decision.drowsy_seconds))
+
+        if self.event_log is not None:
+            self.event_log.append(time.time(), self.frame_no, self.last_probs, decision, inference_seconds is not None)
+        if self.metrics is not None:
+            self.metrics.record(decision, inference_seconds)
+        self.frame_no += 1
+
+        self.last_latency = self.clock() - captured_at
+        self.profiler.mark("postprocess")
+
+        # Show the frame on the screen to user
+        self.render_frame(frame)
+        # Tell the GUI only when the displayed state changes
+        if decision.state != self.shown_state:
+            self.shown_state = decision.state
+            self.status_emits += 1
+            self.status_signal.emit(decision.state)
+        self.profiler.mark("render")
+        self.profiler.end()
+
+    def render_frame(self, frame):
+        import cv2
+        import numpy as np
+
+        now = self.clock()
+        if self.frame_pending or now - self.last_render < self.display_interval:
+            # The screen cannot show this one anyway; don't queue it behind the last
+            self.frames_coalesced += 1
+            return
 
-        if self.cap is not None:
-            self.cap.release()
+        # Scale to the label (keeping aspect ratio) with a fast filter, into reused buffers
+        label_w, label_h = self.display_size
+        frame_h, frame_w = frame.shape[:2]
+        scale = min(label_w / frame_w, label_h / frame_h)
+        w, h = max(1, int(frame_w * scale)), max(1, int(frame_h * scale))
+        if self._scaled is None or self._scaled.shape[:2] != (h, w):
+            self._scaled = np.empty((h, w, 3), dtype=np.uint8)
+            self._rgb = np.empty((h, w, 3), dtype=np.uint8)
+        cv2.resize(frame, (w, h), dst=self._scaled, interpolation=cv2.INTER_LINEAR)
+        cv2.cvtColor(self._scaled, cv2.COLOR_BGR2RGB, dst=self._rgb)
+
+        # copy() gives Qt its own pixels, so the buffers can be reused for the next frame
+        qimg = QImage(self._rgb.data, w, h, 3 * w, QImage.Format_RGB888).copy()
+        self.frame_pending = True
+        self.last_render = now
+        self.frames_rendered += 1
+        self.change_pixmap_signal.emit(qimg)
 
 # -------------------- Main interface --------------------
 class DrowsinessApp(QWidget):
-    def __init__(self):
+    def __init__(self, profile=False, backend="auto", model_path="best.pt", roi=False, face_model=None,
+                 event_log=None, metrics_port=None, clips=None, source="0", capture_size=None,
+                 threads=None, imgsz=None, inference_fps=None, adaptive_rate=False):
         super().__init__()
         # Title 
         self.setWindowTitle("Drowsiness Detection System")
         # Window size
         self.setMinimumSize(950, 900)
 
-        # Load model
-        self.model = YOLO(resource_path("best.pt"))
+        self.model = None
+        self.thread = None
         self.labels_dict = {0: 'absent', 1: 'awake', 2: 'drowsy'}
+        self.profile = profile
+        self.roi = roi
+        self.face_model = face_model
+        self.event_log = event_log
+        self.clips = clips
+        self.source = source
+        self.capture_size = capture_size
+        self.imgsz = imgsz
+        self.inference_fps = inference_fps
+        self.adaptive_rate = adaptive_rate
+        # Alarm sound on its own thread; the mixer is only touched once it has loaded
+        from drivesafe.audio import AudioController
+        self.audio = AudioController(play_alarm, stop_alarm).start()
+        self.shown_status = INACTIVE
+        self.status_changes = 0
+        # GUI thread CPU time while detection runs (printed with --profile)
+        self.gui_cpu_start = None
+        # Live counters outlive Start/Stop sessions; served on localhost when a port is given
+        self.metrics = None
+        if metrics_port:
+            from drivesafe.metrics import LiveMetrics, MetricsServer
+            self.metrics = LiveMetrics()
+            self.metrics_server = MetricsServer(self.metrics, metrics_port).start()
+        # Startup timings in seconds since process start
+        self.startup_times = {}
+        self.start_clicked_at = None
 
         self.create_ui()
-
-        # Create thread at the beginning
-        self.thread = VideoThread(self.model, self.labels_dict, window_size=30)
+        self.set_loading_state()
+
+        # Load model in the background; Start is enabled once it is warm
+        self.loader = ModelLoader(backend, model_path, threads=threads, imgsz=imgsz)
+        self.loader.ready_signal.connect(self.on_model_ready)
+        self.loader.error_signal.connect(self.on_model_error)
+        self.loader.start()
+
+    def create_thread(self):
+        self.thread = VideoThread(self.model, self.labels_dict, profile=self.profile,
+                                  roi=self.roi, face_model=self.face_model,
+                                  event_log=self.event_log, metrics=self.metrics, clips=self.clips,
+                                  audio=self.audio, source=self.source, capture_size=self.capture_size,
+                                  input_size=self.imgsz, inference_fps=self.inference_fps,
+                                  adaptive_rate=self.adaptive_rate)
         self.thread.change_pixmap_signal.connect(self.update_image)
         self.thread.status_signal.connect(self.update_status)
 
@@ -272,16 +582,41 @@ class DrowsinessApp(QWidget):
         info.setStandardButtons(QMessageBox.Ok)
         info.exec_()
 
+    # ------------ Model loading ------------
+    def set_loading_state(self):
+        self.start_btn.setEnabled(False)
+        self.video_label.setText("Loading model...")
+        self.mode_text.setText("Loading")
+
+    def on_window_shown(self):
+        self.startup_times["window"] = time.perf_counter() - APP_START
+        print(f"Startup: window shown after {self.startup_times['window']:.2f}s")
+
+    def on_model_ready(self, model):
+        self.model = model
+        self.startup_times["model_ready"] = time.perf_counter() - APP_START
+        print(f"Startup: model loaded and warmed up after {self.startup_times['model_ready']:.2f}s")
+        self.video_label.setText("Click Start to begin detection")
+        self.mode_text.setText("Inactive")
+        self.start_btn.setEnabled(True)
+
+    def on_model_error(self, message):
+        self.video_label.setText("Model failed to load")
+        self.mode_text.setText("Error")
+        QMessageBox.critical(self, "Drowsiness Detection System", f"Could not load the model:\n{message}")
+
     # ------------ Start/Stop Logic ------------
     def on_start(self):
         self.start_btn.setEnabled(False)
         self.stop_btn.setEnabled(True)
         self.mode_text.setText("Active")
+        self.start_clicked_at = time.perf_counter()
+        self.gui_cpu_start = (time.thread_time(), time.perf_counter())
+        self.status_changes = 0
 
-        if not self.thread.isRunning():
-            self.thread = VideoThread(self.model, self.labels_dict, window_size=30)
-            self.thread.change_pixmap_signal.connect(self.update_image)
-            self.thread.status_signal.connect(self.update_status)
+        if self.thread is None or not self.thread.isRunning():
+            self.create_thread()
+        self.thread.set_display_size(self.video_label.width(), self.video_label.height())
 
         self.thread.start()
 
@@ -300,69 +635,106 @@ class DrowsinessApp(QWidget):
         except TypeError:
             pass
 
-        try:
-            mixer.music.stop()
-        except:
-            pass
+        self.audio.silence()
 
         self.video_label.clear()
         self.video_label.setText("Click Start to begin detection")
         self.video_label.setAlignment(Qt.AlignCenter)
         self.video_label.setStyleSheet("color: #9fb3c8; background:#1f2a36; border-radius:10px;")
-        self.status_text.setText("Inactive")
-        self.status_dot.setStyleSheet("background: #808080; border-radius:8px;")
-        self.status_text.setStyleSheet("color: #0078d7; font-weight: bold;")
-
-        self.thread.drowsy_counter = 0
-        self.thread.alert_triggered = False
+        self.show_status(INACTIVE)
+
+        if self.profile and self.gui_cpu_start is not None:
+            cpu, wall = self.gui_cpu_start
+            wall = time.perf_counter() - wall
+            print(f"GUI thread: {100 * (time.thread_time() - cpu) / max(wall, 1e-9):.1f}% CPU over {wall:.1f}s, "
+                  f"{self.status_changes} status restyles")
+            stats = self.audio.stats()
+            print(f"Alarm audio: {stats['transitions']} transitions, {stats['bounces']} bounces absorbed")
+        self.gui_cpu_start = None
+
+        self.thread.state_engine.reset()
         self.thread.running = False
 
     def update_image(self, qimg):
-        if not self.thread.running:
+        if self.thread is None or not self.thread.running:
             return
-        pix = QPixmap.fromImage(qimg)
-        scaled = pix.scaled(self.video_label.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
-        self.video_label.setPixmap(scaled)
+        # Already scaled to the label by the worker
+        self.video_label.setPixmap(QPixmap.fromImage(qimg))
+        self.thread.frame_shown()
 
-    def update_status(self, label_name, counter, alarm_active):
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self.thread is not None:
+            self.thread.set_display_size(self.video_label.width(), self.video_label.height())
+
+    def update_status(self, state):
         """
-        Status update logic:
-        1. Green LED when face is present (awake or drowsy before threshold)
-        2. Red LED only when absent
+        Status update logic (the worker only sends changes):
+        1. Green dot when face is present (awake or drowsy before threshold)
+        2. Red dot only when absent
         3. "Drowsy" text turns red when alarm is triggered (after threshold)
         4. Status changes to Drowsy only when threshold is exceeded
         """
-        
-        if label_name == "absent":
-            # Red LED - Face not detected
-            self.status_text.setText("Face not detected")
-            self.status_text.setStyleSheet("color: #e67e22; font-weight: bold;")
-            self.status_dot.setStyleSheet("background: #e74c3c; border-radius:8px;")
-        
-        elif label_name == "awake":
-            # Green LED - Person is awake
-            self.status_text.setText("Awake")
-            self.status_text.setStyleSheet("color: #2ecc71; font-weight: bold;")
-            self.status_dot.setStyleSheet("background: #2ecc71; border-radius:8px;")
-        
-        elif label_name == "drowsy":
-            # Green LED - Face is present (before reaching threshold)
-            self.status_dot.setStyleSheet("background: #2ecc71; border-radius:8px;")
-            
-            if alarm_active:
-                # After threshold - Text turns red and status changes to Drowsy
-                self.status_text.setText(" DROWSY - ALERT")
-                self.status_text.setStyleSheet("color: #e74c3c; font-weight: bold;")
-            else:
-                # Before threshold - Status remains Awake (but model detected drowsy)
-                self.status_text.setText("Awake")
-                self.status_text.setStyleSheet("color: #2ecc71; font-weight: bold;")
+        if self.start_clicked_at is not None:
+            now = time.perf_counter()
+            self.startup_times["first_decision"] = now - APP_START
+            print(f"First decision {now - self.start_clicked_at:.2f}s after Start "
+                  f"({self.startup_times['first_decision']:.2f}s after launch)")
+            self.start_clicked_at = None
+        self.show_status(state)
+
+    def show_status(self, state):
+        """ Apply a precomputed style; nothing is touched if the state is already shown """
+        if state == self.shown_status:
+            return
+        text, text_style, dot_style = STATUS_STYLES[state]
+        previous_text, previous_text_style, previous_dot_style = STATUS_STYLES[self.shown_status]
+        if text != previous_text:
+            self.status_text.setText(text)
+        if text_style != previous_text_style:
+            self.status_text.setStyleSheet(text_style)
+        if dot_style != previous_dot_style:
+            self.status_dot.setStyleSheet(dot_style)
+        self.shown_status = state
+        self.status_changes += 1
 
 # ------------ Main ------------
 def main():
-    app = QApplication(sys.argv)
-    win = DrowsinessApp()
+    parser = argparse.ArgumentParser(description="Drowsiness Detection System")
+    parser.add_argument("--profile", action="store_true", help="Print per-stage latency percentiles on stop")
+    parser.add_argument("--backend", help="Inference backend: auto, torch, ncnn, onnxruntime or opencv (default: tuned, else auto)")
+    parser.add_argument("--model", help="Model file or folder: .pt, NCNN folder, .onnx (default: tuned, else best.pt)")
+    parser.add_argument("--threads", type=int, help="Inference threads (default: tuned, else the runtime's own)")
+    parser.add_argument("--tuning", default=TUNING_PATH, help="Tuning profile written by tools/autotune.py")
+    parser.add_argument("--no-tuning", action="store_true", help="Ignore the tuning profile")
+    parser.add_argument("--roi", action="store_true", help="Classify a tracked face crop instead of the full frame")
+    parser.add_argument("--face-model", help="YuNet .onnx face detector (default: Haar cascade)")
+    parser.add_argument("--event-log", metavar="DIR", help="Log every decision to a memory-mapped binary log in DIR")
+    parser.add_argument("--metrics-port", type=int, help="Serve live metrics on http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--clips", metavar="DIR", help="Save a clip around every alarm to DIR")
+    parser.add_argument("--source", default="0", help="Camera index, video file or synthetic")
+    parser.add_argument("--capture-size", metavar="WxH",
+                        help="Frame size to ask the camera for (default: the standard size nearest the model input)")
+    parser.add_argument("--inference-fps", type=float, help="Cap on the inference rate (default: as fast as the model allows)")
+    parser.add_argument("--adaptive-rate", action="store_true",
+                        help=f"Run slower while the driver is steadily awake/absent, up to --inference-fps "
+                             f"(default {DEFAULT_ADAPTIVE_FPS}) when drowsiness builds")
+    args, qt_args = parser.parse_known_args()
+    # What tools/autotune.py measured as fastest on this machine, for options not given above
+    tuning = None if args.no_tuning else load_tuning(args.tuning)
+    tuned = apply_tuning(args, tuning, backend="auto", model="best.pt", threads=None, imgsz=None)
+    print(format_tuning(tuning, tuned))
+
+    app = QApplication(sys.argv[:1] + qt_args)
+    win = DrowsinessApp(profile=args.profile, backend=args.backend, model_path=args.model,
+                        roi=args.roi, face_model=args.face_model,
+                        event_log=args.event_log, metrics_port=args.metrics_port, clips=args.clips,
+                        source=args.source, capture_size=args.capture_size,
+                        threads=args.threads, imgsz=args.imgsz,
+                        inference_fps=args.inference_fps, adaptive_rate=args.adaptive_rate)
     win.show()
+    # Runs once the event loop has processed the first show/paint
+    QTimer.singleShot(0, win.on_window_shown)
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
@@ -0,0 +1,6 @@
+"""
+Shared building blocks for the DriveSafe desktop app and the Raspberry Pi monitor.
+"""
+
+# Class index -> label name, as trained in model_training.ipynb
+LABELS = {0: "absent", 1: "awake", 2: "drowsy"}
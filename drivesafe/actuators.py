@@ -0,0 +1,193 @@
+"""
+LEDs and buzzer behind a state-change-only controller with pluggable backends.
+
+The controller remembers what each output was last set to and only talks to
+the hardware when that changes, so calling apply() every frame costs a couple
+of dict lookups. Buzzer patterns (beeping instead of a steady tone) run on the
+controller's own timer thread, never in the caller's loop.
+
+Backends:
+- GpioZeroBackend drives the real pins on the Pi;
+- MockBackend keeps the outputs in memory and records every transition, so
+  the logic (and test_leds_buzzer.py) runs on any machine.
+
+    outputs = ActuatorController(create_backend("auto"))
+    outputs.apply(decision.label, decision.alarm)   # every frame
+    outputs.close()                                 # everything off
+"""
+import threading
+import time
+
+GREEN, RED, BUZZER = "green", "red", "buzzer"
+OUTPUTS = (GREEN, RED, BUZZER)
+
+# BCM pins used by the Pi build (see README wiring)
+DEFAULT_PINS = {GREEN: 17, RED: 27, BUZZER: 22}
+
+
+# -------------------- Backends --------------------
+class GpioZeroBackend:
+    name = "gpiozero"
+
+    def __init__(self, pins=None):
+        from gpiozero import LED, Buzzer
+
+        pins = dict(DEFAULT_PINS, **(pins or {}))
+        self.devices = {GREEN: LED(pins[GREEN]), RED: LED(pins[RED]), BUZZER: Buzzer(pins[BUZZER])}
+
+    def write(self, output, on):
+        device = self.devices[output]
+        if on:
+            device.on()
+        else:
+            device.off()
+
+    def close(self):
+        for device in self.devices.values():
+            device.off()
+            device.close()
+
+
+class MockBackend:
+    """ In-memory outputs; transitions holds (timestamp, output, on) for every write """
+
+    name = "mock"
+
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self.state = {output: False for output in OUTPUTS}
+        self.transitions = []
+        self.closed = False
+
+    def write(self, output, on):
+        self.state[output] = on
+        self.transitions.append((self.clock(), output, on))
+
+    def close(self):
+        self.closed = True
+
+
+BACKENDS = {GpioZeroBackend.name: GpioZeroBackend, MockBackend.name: MockBackend}
+
+
+def create_backend(name="auto", pins=None):
+    """ "auto" uses gpiozero when it can reach real pins and falls back to the mock """
+    if name == "mock":
+        return MockBackend()
+    if name == "gpiozero":
+        return GpioZeroBackend(pins)
+    if name != "auto":
+        raise ValueError(f"Unknown GPIO backend: {name} (choose from auto, {', '.join(BACKENDS)})")
+    try:
+        return GpioZeroBackend(pins)
+    except Exception as e:
+        print(f"GPIO not available ({e}); using the mock backend")
+        return MockBackend()
+
+
+# -------------------- Controller --------------------
+class ActuatorController:
+    """ Desired output state -> backend writes, on transitions only """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._written = {}          # last value written per output
+        self._patterns = {}         # output -> (on_s, off_s) while blinking
+        self._wake = threading.Event()
+        self._closed = False
+        self._timer = None
+
+        # Counters
+        self.writes = 0
+        self.redundant = 0          # set() calls that needed no write
+
+        for output in OUTPUTS:
+            self._write(output, False)
+
+    def _write(self, output, on):
+        # Caller holds the lock (or is __init__)
+        if self._written.get(output) == on:
+            self.redundant += 1
+            return
+        self.backend.write(output, on)
+        self._written[output] = on
+        self.writes += 1
+
+    def set(self, output, on):
+        """ Steady on/off; cancels any pattern on that output """
+        with self._lock:
+            if self._patterns.pop(output, None) is not None:
+                self._wake.set()
+            self._write(output, on)
+
+    def set_pattern(self, output, on_s, off_s):
+        """ Blink output (on_s on, off_s off) from the timer thread until set() is called """
+        with self._lock:
+            if self._patterns.get(output) == (on_s, off_s):
+                self.redundant += 1
+                return
+            self._patterns[output] = (on_s, off_s)
+            if self._timer is None:
+                self._timer = threading.Thread(target=self._run_patterns, name="actuator-patterns", daemon=True)
+                self._timer.start()
+            self._wake.set()
+
+    def apply(self, label, alarm, buzzer_pattern=None):
+        """
+        Same mapping the Pi loop always used: red = no face, green = face present,
+        buzzer only while the alarm is on (steady, or buzzer_pattern=(on_s, off_s))
+        """
+        self.set(RED, label == "absent")
+        self.set(GREEN, label != "absent")
+        if alarm and buzzer_pattern:
+            self.set_pattern(BUZZER, *buzzer_pattern)
+        else:
+            self.set(BUZZER, alarm)
+
+    def _run_patterns(self):
+        # phase per output: (currently on, time of next toggle)
+        phases = {}
+        while True:
+            with self._lock:
+                if self._closed:
+                    return
+                # Cleared before reading the patterns, so a change made after this is never missed
+                self._wake.clear()
+                now = time.monotonic()
+                for output in list(phases):
+                    if output not in self._patterns:
+                        del phases[output]
+                next_due = None
+                for output, (on_s, off_s) in self._patterns.items():
+                    if output not in phases:
+                        phases[output] = (True, now + on_s)
+                        self._write(output, True)
+                    on, due = phases[output]
+                    if now >= due:
+                        on = not on
+                        due = now + (on_s if on else off_s)
+                        phases[output] = (on, due)
+                        self._write(output, on)
+                    next_due = due if next_due is None else min(next_due, due)
+            self._wake.wait(None if next_due is None else max(0.0, next_due - time.monotonic()))
+
+    def off(self):
+        with self._lock:
+            self._patterns.clear()
+            for output in OUTPUTS:
+                self._write(output, False)
+            self._wake.set()
+
+    def close(self):
+        """ Everything off, timer stopped, pins released """
+        self.off()
+        with self._lock:
+            self._closed = True
+            self._wake.set()
+        if self._timer is not None:
+            self._timer.join()
+        self.backend.close()
+
+    def stats(self):
+        return {"writes": self.writes, "redundant": self.redundant}
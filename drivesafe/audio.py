@@ -0,0 +1,109 @@
+"""
+Alarm sound on its own thread, switched on debounced transitions.
+
+The video loop only calls request(on) when the alarm state changes, and that
+call never blocks. The controller thread waits until the requested state
+has held for start_delay/stop_delay seconds before it calls play()/stop().
+A stop request cancelled inside that window never reaches the mixer. This
+keeps the sound from stuttering when the alarm flickers at the threshold.
+
+play and stop are plain callables (pygame's mixer in the desktop app, a
+recorder in tests), so nothing here imports an audio library.
+
+    audio = AudioController(lambda: mixer.music.play(-1), mixer.music.stop)
+    audio.request(decision.alarm)   # on alarm transitions
+    audio.silence()                 # Stop button: off now, no delay
+"""
+import threading
+import time
+
+
+class AudioController:
+    """ Desired alarm state -> play()/stop() on a background thread, after a hold time """
+
+    def __init__(self, play, stop, start_delay=0.0, stop_delay=0.5, clock=time.monotonic):
+        self.play = play
+        self.stop = stop
+        # Seconds the requested state must hold before the sound follows it
+        self.start_delay = start_delay
+        self.stop_delay = stop_delay
+        self.clock = clock
+        self._cond = threading.Condition()
+        self._wanted = False
+        self._since = 0.0           # when _wanted last changed
+        self._playing = False
+        self._closed = False
+        self._thread = None
+
+        # Counters
+        self.requests = 0
+        self.transitions = 0        # play()/stop() calls actually made
+        self.bounces = 0            # requests reverted before their hold time
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="alarm-audio", daemon=True)
+        self._thread.start()
+        return self
+
+    def request(self, on):
+        """ Ask for the alarm on/off; returns immediately """
+        with self._cond:
+            self.requests += 1
+            if on == self._wanted:
+                return
+            if on == self._playing:
+                # Back to what is already sounding before the hold time ran out
+                self.bounces += 1
+            self._wanted = on
+            self._since = self.clock()
+            self._cond.notify()
+
+    def silence(self):
+        """ Stop the sound now (no stop_delay), e.g. when detection is stopped """
+        with self._cond:
+            self._wanted = False
+            self._since = self.clock() - self.stop_delay
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed and self._wanted == self._playing:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                delay = self.start_delay if self._wanted else self.stop_delay
+                remaining = self._since + delay - self.clock()
+                if remaining > 0:
+                    # Woken early by a new request or close(); the loop re-checks
+                    self._cond.wait(remaining)
+                    continue
+                on = self._playing = self._wanted
+                self.transitions += 1
+            # Outside the lock, so a slow mixer call never blocks request()
+            try:
+                if on:
+                    self.play()
+                else:
+                    self.stop()
+            except Exception as e:
+                print(f"Error {'playing' if on else 'stopping'} alarm: {e}")
+
+    def close(self):
+        """ Sound off and thread stopped """
+        self.silence()
+        with self._cond:
+            playing = self._playing
+            self._playing = False
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+        if playing:
+            try:
+                self.stop()
+            except Exception:
+                pass
+
+    def stats(self):
+        return {"requests": self.requests, "transitions": self.transitions, "bounces": self.bounces}
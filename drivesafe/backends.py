@@ -0,0 +1,218 @@
+"""
+Inference backends that return raw class probabilities.
+
+Every backend takes the 1x3xHxW (or Nx3xHxW) float32 tensor produced by
+drivesafe.preprocess.Preprocessor and returns an (N, 3) float32 array of
+absent/awake/drowsy probabilities. Only the torch backend touches
+Ultralytics, and only to unpickle best.pt; none of them build Results objects.
+
+    backend = load_backend("auto", "best_ncnn_model")
+    probs = backend.predict(tensor)
+"""
+import os
+import re
+
+import numpy as np
+
+
+def _softmax_if_needed(out):
+    """ Exported heads already apply softmax; fall back to it for raw logits """
+    out = np.asarray(out, dtype=np.float32)
+    out = out.reshape(out.shape[0], -1)
+    sums = out.sum(axis=1)
+    if np.all(out >= 0) and np.allclose(sums, 1.0, atol=1e-3):
+        return out
+    out = np.exp(out - out.max(axis=1, keepdims=True))
+    return out / out.sum(axis=1, keepdims=True)
+
+
+def _first_int(value):
+    """ imgsz may be stored as an int or an [h, w] list """
+    if isinstance(value, (list, tuple)):
+        value = value[0]
+    return int(value) if value else None
+
+
+class Backend:
+    """ Base class: subclasses implement _run() for a batch they can handle """
+
+    name = "base"
+    # Native input size (pixels) when the model records it, else None
+    input_size = None
+    # False when the model only accepts exactly input_size (static ONNX shapes, NCNN exports)
+    dynamic_size = True
+    # Largest batch the model accepts in one call (None = any)
+    max_batch = None
+
+    def predict(self, tensor):
+        if self.max_batch is None or len(tensor) <= self.max_batch:
+            return self._run(tensor)
+        return np.concatenate([
+            self._run(tensor[i:i + self.max_batch]) for i in range(0, len(tensor), self.max_batch)
+        ])
+
+    def _run(self, tensor):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+# -------------------- PyTorch (.pt) --------------------
+class TorchBackend(Backend):
+    name = "torch"
+
+    def __init__(self, path, threads=None):
+        import torch
+        from ultralytics import YOLO
+
+        if threads:
+            torch.set_num_threads(threads)
+        self.torch = torch
+        # Ultralytics is only needed to unpickle the checkpoint; inference calls the nn.Module directly
+        self.module = YOLO(path, task="classify").model.float().eval()
+        self.input_size = _first_int(getattr(self.module, "args", {}).get("imgsz"))
+
+    def _run(self, tensor):
+        with self.torch.inference_mode():
+            out = self.module(self.torch.from_numpy(np.ascontiguousarray(tensor)))
+        if isinstance(out, (tuple, list)):
+            out = out[0]
+        return _softmax_if_needed(out.numpy())
+
+
+# -------------------- NCNN (Ultralytics export folder) --------------------
+class NcnnBackend(Backend):
+    name = "ncnn"
+    max_batch = 1
+    # The export bakes feature-map sizes into Reshape layers; any other input size overruns them
+    dynamic_size = False
+
+    def __init__(self, path, threads=None):
+        import ncnn
+
+        param, weights = _ncnn_files(path)
+        self.net = ncnn.Net()
+        if threads:
+            self.net.opt.num_threads = threads
+        self.net.load_param(param)
+        self.net.load_model(weights)
+        self.ncnn = ncnn
+        self.input_name = self.net.input_names()[0]
+        self.output_name = self.net.output_names()[0]
+        self.input_size = _export_imgsz(os.path.dirname(param))
+
+    def _run(self, tensor):
+        extractor = self.net.create_extractor()
+        extractor.input(self.input_name, self.ncnn.Mat(np.ascontiguousarray(tensor[0])))
+        _, out = extractor.extract(self.output_name)
+        return _softmax_if_needed(np.array(out)[None])
+
+    def close(self):
+        self.net.clear()
+
+
+def _ncnn_files(path):
+    if os.path.isdir(path):
+        names = os.listdir(path)
+        param = next((n for n in names if n.endswith(".param")), None)
+        if param is None:
+            raise FileNotFoundError(f"No .param file in {path}")
+        return os.path.join(path, param), os.path.join(path, param[:-len(".param")] + ".bin")
+    base = path[:-len(".param")] if path.endswith(".param") else path
+    return base + ".param", base + ".bin"
+
+
+def _export_imgsz(folder):
+    """ Input size recorded in the metadata.yaml Ultralytics writes next to an export """
+    try:
+        with open(os.path.join(folder, "metadata.yaml")) as f:
+            match = re.search(r"^imgsz:\s*\[?\s*(?:-\s*)?(\d+)", f.read(), re.MULTILINE)
+    except OSError:
+        return None
+    return int(match.group(1)) if match else None
+
+
+# -------------------- ONNX Runtime --------------------
+class OnnxRuntimeBackend(Backend):
+    name = "onnxruntime"
+
+    def __init__(self, path, threads=None):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+        model_input = self.session.get_inputs()[0]
+        self.input_name = model_input.name
+        batch, _, height, _ = model_input.shape
+        self.max_batch = batch if isinstance(batch, int) else None
+        self.input_size = height if isinstance(height, int) else None
+        self.dynamic_size = self.input_size is None
+
+    def _run(self, tensor):
+        out = self.session.run(None, {self.input_name: np.ascontiguousarray(tensor)})[0]
+        return _softmax_if_needed(out)
+
+
+# -------------------- OpenCV DNN (ONNX file) --------------------
+class OpenCvDnnBackend(Backend):
+    name = "opencv"
+    max_batch = 1
+    dynamic_size = False
+
+    def __init__(self, path, threads=None):
+        import cv2
+
+        if threads:
+            cv2.setNumThreads(threads)
+        self.net = cv2.dnn.readNetFromONNX(path)
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+
+    def _run(self, tensor):
+        self.net.setInput(np.ascontiguousarray(tensor))
+        return _softmax_if_needed(self.net.forward())
+
+
+BACKENDS = {
+    TorchBackend.name: TorchBackend,
+    NcnnBackend.name: NcnnBackend,
+    OnnxRuntimeBackend.name: OnnxRuntimeBackend,
+    OpenCvDnnBackend.name: OpenCvDnnBackend,
+}
+
+
+def detect_backend(path):
+    """ Backend name for a model path: .pt -> torch, NCNN folder -> ncnn, .onnx -> onnxruntime or opencv """
+    if path.endswith(".pt"):
+        return TorchBackend.name
+    if path.endswith(".param") or (os.path.isdir(path) and any(n.endswith(".param") for n in os.listdir(path))):
+        return NcnnBackend.name
+    if path.endswith(".onnx"):
+        try:
+            import onnxruntime  # noqa: F401
+            return OnnxRuntimeBackend.name
+        except ImportError:
+            return OpenCvDnnBackend.name
+    raise ValueError(f"Cannot tell which backend to use for {path}")
+
+
+def export_input_size(path):
+    """ Input size of an NCNN export from its metadata.yaml, without loading the model (None if unknown) """
+    if os.path.isdir(path):
+        return _export_imgsz(path)
+    if path.endswith(".param"):
+        return _export_imgsz(os.path.dirname(path))
+    return None
+
+
+def load_backend(name, path, threads=None):
+    """ Create a backend by name ("auto" picks one from the model path) """
+    if name == "auto":
+        name = detect_backend(path)
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend: {name} (choose from auto, {', '.join(BACKENDS)})")
+    return BACKENDS[name](path, threads=threads)
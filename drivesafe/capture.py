@@ -0,0 +1,239 @@
+"""
+Frame sources for both front ends, configured to deliver frames near the model size.
+
+The Pi monitor used to capture 640x480 from Picamera2 and shrink it to the
+model input on the CPU. The desktop app took whatever resolution the webcam
+driver picked. Here each camera backend asks the hardware for a small frame
+instead: the Picamera2 low-res stream (scaled by the ISP), or V4L2
+width/height with a one-frame driver buffer, so read() returns the latest
+frame rather than a queued one.
+
+File replay and synthetic frames follow the same interface, so the whole
+pipeline can run and be benchmarked on a machine with no camera.
+
+Every source looks like a cv2.VideoCapture: isOpened(), read() ->
+(ret, frame) with BGR frames, and release(). It also has .name and .size
+(the size actually delivered, which a driver may round).
+
+    camera = open_capture("picamera2", size=capture_size_for(224))
+    camera = open_capture("0", size=(320, 240))          # webcam, V4L2
+    camera = open_capture("drive.mp4", size=(320, 240))  # replay in real time
+    camera = open_capture("synthetic")
+"""
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+# 4:3 modes that cameras and the Pi ISP commonly deliver
+STANDARD_SIZES = ((320, 240), (640, 480), (800, 600), (1280, 960))
+
+
+def capture_size_for(model_size):
+    """ Smallest standard mode at least as wide as the model input (224 -> 320x240, 640 -> 640x480) """
+    for size in STANDARD_SIZES:
+        if size[0] >= model_size:
+            return size
+    return STANDARD_SIZES[-1]
+
+
+def parse_size(text):
+    """ "320x240" -> (320, 240) """
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+# -------------------- Cameras --------------------
+class Picamera2Source:
+    """
+    Raspberry Pi camera. stream="lores" reads the ISP-scaled low-res stream
+    (YUV420; main stays at main_size because Picamera2 always needs it),
+    stream="main" configures the main stream itself at `size`.
+    """
+
+    def __init__(self, size=(320, 240), stream="lores", main_size=(640, 480), settle=2.0):
+        from picamera2 import Picamera2
+
+        self.name = f"picamera2:{stream}"
+        # A failed read from a live camera may be transient; from a file it is the end
+        self.live = True
+        self.stream = stream
+        self.camera = Picamera2()
+        if stream == "lores":
+            # lores must not be larger than main
+            main_size = (max(main_size[0], size[0]), max(main_size[1], size[1]))
+            config = self.camera.create_preview_configuration(
+                main={"size": main_size, "format": "RGB888"},
+                lores={"size": size, "format": "YUV420"},
+            )
+        else:
+            config = self.camera.create_preview_configuration(main={"size": size, "format": "RGB888"})
+        self.camera.configure(config)
+        self.size = tuple(self.camera.camera_configuration()[stream]["size"])
+        self.camera.start()
+        time.sleep(settle)  # Let camera stabilize
+        self._bgr = None
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        if self.stream == "main":
+            # "RGB888" is BGR in memory, which is what OpenCV expects
+            return True, self.camera.capture_array("main")
+        yuv = self.camera.capture_array("lores")
+        width, height = self.size
+        # Rows may be padded to the stride; convert at the stride width and crop
+        bgr = cv2.cvtColor(yuv, cv2.COLOR_YUV2BGR_I420)
+        return True, bgr[:height, :width]
+
+    def release(self):
+        self.camera.stop()
+        self.camera.close()
+
+
+class V4L2Source:
+    """ USB/laptop camera through OpenCV, asking the driver for `size` and a single buffered frame """
+
+    def __init__(self, index=0, size=None, fps=None):
+        self.name = f"v4l2:{index}"
+        self.live = True
+        api = cv2.CAP_V4L2 if sys.platform.startswith("linux") else cv2.CAP_ANY
+        self.cap = cv2.VideoCapture(index, api)
+        if size is not None:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, size[0])
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, size[1])
+        if fps:
+            self.cap.set(cv2.CAP_PROP_FPS, fps)
+        # Without this the driver queues frames and read() returns old ones
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        # What the driver actually picked (it rounds to the nearest mode it supports)
+        self.size = (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        return self.cap.read()
+
+    def release(self):
+        self.cap.release()
+
+
+# -------------------- Stand-ins --------------------
+class _Paced:
+    """ Real-time pacing for stand-in sources: read() returns no earlier than a camera would """
+
+    def _init_pacing(self, fps, realtime):
+        self.fps = fps
+        self.realtime = realtime and fps > 0
+        self._next = None
+
+    def _pace(self):
+        if not self.realtime:
+            return
+        now = time.monotonic()
+        if self._next is None or now - self._next > 1.0:
+            # First frame, or the caller stalled: restart the clock rather than burst
+            self._next = now
+        elif self._next > now:
+            time.sleep(self._next - now)
+        self._next += 1.0 / self.fps
+
+
+class FileSource(_Paced):
+    """ Replays a video file; frames resized to `size` (what a camera configured for it would deliver) """
+
+    def __init__(self, path, size=None, loop=True, realtime=True):
+        self.name = f"file:{os.path.basename(path)}"
+        self.live = False
+        self.cap = cv2.VideoCapture(path)
+        self.loop = loop
+        self._init_pacing(self.cap.get(cv2.CAP_PROP_FPS) or 30.0, realtime)
+        native = (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        self.size = tuple(size) if size is not None else native
+        self._resize = self.size != native
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        self._pace()
+        ret, frame = self.cap.read()
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        if ret and self._resize:
+            frame = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        return ret, frame
+
+    def release(self):
+        self.cap.release()
+
+
+class SyntheticSource(_Paced):
+    """ Deterministic frames: a noisy background with a slowly moving bright blob """
+
+    def __init__(self, size=(320, 240), fps=30.0, realtime=True, seed=0):
+        self.name = "synthetic"
+        self.live = False
+        self.size = tuple(size)
+        self._init_pacing(fps, realtime)
+        width, height = self.size
+        rng = np.random.default_rng(seed)
+        self._background = rng.integers(40, 90, (height, width, 3), dtype=np.uint8)
+        self._index = 0
+
+    def isOpened(self):
+        return True
+
+    def read(self):
+        self._pace()
+        width, height = self.size
+        frame = self._background.copy()
+        x = int(width / 2 + width / 4 * np.sin(self._index / 15.0))
+        cv2.circle(frame, (x, height // 2), height // 5, (200, 200, 200), -1)
+        self._index += 1
+        return True, frame
+
+    def release(self):
+        pass
+
+
+# -------------------- Factory --------------------
+def open_capture(source, size=None, fps=None, loop=True, realtime=True):
+    """
+    source: "picamera2" (low-res stream) or "picamera2:main", a camera index
+    ("0" or "v4l2:0"), "synthetic", or a video file path.
+    size: (width, height) to ask for; None keeps the source's own.
+    """
+    source = str(source)
+    if source.startswith("picamera2"):
+        stream = source.partition(":")[2] or "lores"
+        return Picamera2Source(size or (640, 480), stream=stream)
+    if source.startswith("v4l2:") or source.isdigit():
+        return V4L2Source(int(source.rpartition(":")[2]), size, fps)
+    if source == "synthetic":
+        return SyntheticSource(size or (640, 480), fps=fps or 30.0, realtime=realtime)
+    if not os.path.exists(source):
+        raise ValueError(f"Unknown capture source: {source} (picamera2, a camera index, synthetic or a video file)")
+    return FileSource(source, size, loop=loop, realtime=realtime)
+
+
+def read_frames(source, limit=None, size=None):
+    """ Up to `limit` frames of a file or synthetic source, as fast as they decode (benchmarks) """
+    camera = open_capture(source, size=size, loop=False, realtime=False)
+    if not camera.isOpened():
+        raise ValueError(f"Cannot open capture source: {source}")
+    count = 0
+    try:
+        while limit is None or count < limit:
+            ret, frame = camera.read()
+            if not ret:
+                return
+            count += 1
+            yield frame
+    finally:
+        camera.release()
@@ -0,0 +1,206 @@
+"""
+Pre-event frame ring and asynchronous alert clip recording.
+
+The detection loop only hands frames over (push) and flags alarms (trigger).
+Both calls return in microseconds. Everything else happens on two background
+threads:
+
+- the ring thread compresses each frame (JPEG, or a downscaled raw copy) into
+  a ring holding the last pre_seconds, capped at max_bytes so memory stays
+  predictable;
+- on a trigger, the pre-event frames plus the next post_seconds are handed to
+  the writer thread, which decodes and encodes them into a clip file.
+
+If either thread falls behind, frames (or whole clips) are dropped rather than
+the loop being blocked; stats() reports how many.
+
+    recorder = ClipRecorder("clips/").start()
+    recorder.push(frame, time.monotonic())      # every frame
+    recorder.trigger(time.monotonic())          # when the alarm goes on
+    recorder.stop()
+"""
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+import cv2
+
+# Ring storage modes
+JPEG = "jpeg"            # variable size, ~30-60 KB per 640x480 frame at quality 70
+DOWNSCALE = "downscale"  # fixed size raw BGR at `scale`, no codec on the ring thread
+
+
+class ClipRecorder:
+    """ Keeps the last few seconds of frames and writes a clip around every alarm """
+
+    def __init__(self, directory, pre_seconds=5.0, post_seconds=3.0, mode=JPEG, quality=70,
+                 scale=0.5, max_bytes=24 << 20, queue_frames=4, queue_clips=2, fourcc="mp4v", extension=".mp4"):
+        if mode not in (JPEG, DOWNSCALE):
+            raise ValueError(f"Unknown ring mode: {mode}")
+        self.directory = directory
+        self.pre_seconds = pre_seconds
+        self.post_seconds = post_seconds
+        self.mode = mode
+        self.quality = quality
+        self.scale = scale
+        self.max_bytes = max_bytes
+        self.fourcc = fourcc
+        self.extension = extension
+        os.makedirs(directory, exist_ok=True)
+
+        # loop -> ring thread: raw frames; bounded so a stalled encoder cannot grow memory
+        self._incoming = queue.Queue(maxsize=queue_frames)
+        # ring thread -> writer thread: finished clips
+        self._clips = queue.Queue(maxsize=queue_clips)
+        self._ring = deque()           # (timestamp, payload)
+        self._ring_bytes = 0
+        self._trigger = None           # (monotonic, wall clock) of a pending alarm
+        self._clip = None              # clip being collected: dict(frames, until, name)
+        self._ring_thread = threading.Thread(target=self._ring_loop, name="clip-ring", daemon=True)
+        self._writer_thread = threading.Thread(target=self._writer_loop, name="clip-writer", daemon=True)
+
+        # Counters
+        self.pushed = 0
+        self.frames_dropped = 0        # handoff queue full: ring thread behind
+        self.clip_frames_dropped = 0   # frames missing from clips because of the above
+        self.encode_failed = 0         # frames JPEG encoding rejected (left out of the ring)
+        self.clips_written = 0
+        self.clips_dropped = 0         # writer busy with earlier clips
+        self.peak_ring_bytes = 0
+        self.last_clip = None
+
+    def start(self):
+        self._ring_thread.start()
+        self._writer_thread.start()
+        return self
+
+    # -------------------- Loop side (never blocks) --------------------
+    def push(self, frame, timestamp):
+        """ Frame must not be modified afterwards (the loops get a new array per capture) """
+        self.pushed += 1
+        try:
+            self._incoming.put_nowait((timestamp, frame))
+        except queue.Full:
+            self.frames_dropped += 1
+            if self._clip is not None:
+                self.clip_frames_dropped += 1
+
+    def trigger(self, timestamp):
+        """ Start a clip covering pre_seconds before and post_seconds after timestamp """
+        if self._trigger is None and self._clip is None:
+            self._trigger = (timestamp, time.time())
+
+    def stop(self):
+        """ Finish the clip in progress (if any) and wait for the writer """
+        self._incoming.put((None, None))
+        self._ring_thread.join()
+        self._clips.put(None)
+        self._writer_thread.join()
+
+    # -------------------- Ring thread --------------------
+    def _compress(self, frame):
+        """ Ring payload for a frame, or None if it could not be encoded """
+        if self.mode == JPEG:
+            # A failed encode (False, or cv2.error on e.g. an empty frame) must not stop the ring thread
+            try:
+                ok, data = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+            except cv2.error:
+                ok = False
+            return data if ok else None
+        if self.scale == 1.0:
+            return frame.copy()
+        return cv2.resize(frame, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+
+    def _ring_loop(self):
+        while True:
+            timestamp, frame = self._incoming.get()
+            if frame is None:
+                break
+            payload = self._compress(frame)
+            if payload is None:
+                self.encode_failed += 1
+                if self._clip is not None:
+                    self.clip_frames_dropped += 1
+                continue
+            self._ring.append((timestamp, payload))
+            self._ring_bytes += payload.nbytes
+            # Bounded by time and by bytes
+            while self._ring and (timestamp - self._ring[0][0] > self.pre_seconds
+                                  or self._ring_bytes > self.max_bytes):
+                self._ring_bytes -= self._ring.popleft()[1].nbytes
+            self.peak_ring_bytes = max(self.peak_ring_bytes, self._ring_bytes)
+
+            if self._trigger is not None and self._clip is None:
+                at, wall = self._trigger
+                name = time.strftime("alert-%Y%m%d-%H%M%S", time.localtime(wall))
+                # The ring only reaches back pre_seconds, so all of it is pre-event footage
+                self._clip = {"frames": list(self._ring), "until": at + self.post_seconds, "name": name}
+                self._trigger = None
+            elif self._clip is not None:
+                self._clip["frames"].append((timestamp, payload))
+            if self._clip is not None and timestamp >= self._clip["until"]:
+                self._finish_clip()
+        if self._clip is not None:
+            self._finish_clip()
+
+    def _finish_clip(self):
+        clip, self._clip = self._clip, None
+        try:
+            self._clips.put_nowait(clip)
+        except queue.Full:
+            self.clips_dropped += 1
+
+    # -------------------- Writer thread --------------------
+    def _decode(self, payload):
+        if self.mode == JPEG:
+            return cv2.imdecode(payload, cv2.IMREAD_COLOR)
+        return payload
+
+    def _writer_loop(self):
+        while True:
+            clip = self._clips.get()
+            if clip is None:
+                break
+            frames = clip["frames"]
+            if not frames:
+                continue
+            span = frames[-1][0] - frames[0][0]
+            # Play back at the rate the frames were actually captured
+            fps = (len(frames) - 1) / span if span > 0 else 10.0
+            first = self._decode(frames[0][1])
+            h, w = first.shape[:2]
+            path = os.path.join(self.directory, clip["name"] + self.extension)
+            writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*self.fourcc), fps, (w, h))
+            if not writer.isOpened():
+                print(f"Cannot open clip writer for {path}")
+                self.clips_dropped += 1
+                continue
+            writer.write(first)
+            for _, payload in frames[1:]:
+                writer.write(self._decode(payload))
+            writer.release()
+            self.clips_written += 1
+            self.last_clip = path
+
+    # -------------------- Reporting --------------------
+    def stats(self):
+        return {
+            "ring_frames": len(self._ring),
+            "ring_bytes": self._ring_bytes,
+            "peak_ring_bytes": self.peak_ring_bytes,
+            "pushed": self.pushed,
+            "frames_dropped": self.frames_dropped,
+            "clip_frames_dropped": self.clip_frames_dropped,
+            "encode_failed": self.encode_failed,
+            "clips_written": self.clips_written,
+            "clips_dropped": self.clips_dropped,
+        }
+
+    def format_stats(self):
+        s = self.stats()
+        return (f"Clip recorder: ring {s['ring_frames']} frames, {s['ring_bytes'] / 1e6:.1f} MB "
+                f"(peak {s['peak_ring_bytes'] / 1e6:.1f} MB, {self.mode}); "
+                f"{s['frames_dropped']}/{s['pushed']} frames dropped, {s['encode_failed']} not encodable, "
+                f"{s['clips_written']} clips written, {s['clips_dropped']} dropped")
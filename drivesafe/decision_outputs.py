@@ -0,0 +1,54 @@
+"""
+What the Pi monitor does with every decision, in one place.
+
+The single-process loop (hardware/drowsiness.py) and the output process of
+the multi-process pipeline (drivesafe/pipeline.py) both hand each Decision to
+DecisionOutputs.publish(), so LEDs, buzzer, logging and the console cannot
+drift apart between the two.
+
+    step = DecisionOutputs(outputs, buzzer_pattern, event_log=event_log, metrics=metrics)
+    step.publish(decision, frame_no, probs, inference_seconds)   # every decision
+"""
+import time
+
+from drivesafe.state_engine import ABSENT, AWAKE, DROWSY_ALERT
+
+
+class DecisionOutputs:
+    """ Decision -> LEDs/buzzer first (what the driver notices), then event log, live metrics and console """
+
+    def __init__(self, outputs, buzzer_pattern=None, event_log=None, metrics=None, verbose=True,
+                 clock=time.monotonic):
+        self.outputs = outputs
+        self.buzzer_pattern = buzzer_pattern
+        self.event_log = event_log
+        self.metrics = metrics
+        # Print a line whenever the displayed state changes
+        self.verbose = verbose
+        self.shown_state = None
+        self.clock = clock
+        # clock() right after the outputs were updated for the last decision
+        self.actuated_at = None
+
+    def publish(self, decision, frame_no, probs, inference_seconds):
+        """ inference_seconds is None when the model did not run for this decision (motion gate, no face) """
+        # GPIO (same logic as the GUI): red = face not detected, green = face present,
+        # buzzer only when the threshold is reached. Unchanged outputs are not written.
+        self.outputs.apply(decision.label, decision.alarm, self.buzzer_pattern)
+        self.actuated_at = self.clock()
+
+        if self.event_log is not None:
+            self.event_log.append(time.time(), frame_no, probs, decision, inference_seconds is not None)
+        if self.metrics is not None:
+            self.metrics.record(decision, inference_seconds)
+
+        if self.verbose and decision.state != self.shown_state:
+            timestamp = time.strftime("%H:%M:%S")
+            if decision.state == ABSENT:
+                print(f"[{timestamp}] Face not detected")
+            elif decision.state == AWAKE:
+                print(f"[{timestamp}] Awake")
+            elif decision.state == DROWSY_ALERT:
+                print(f"[{timestamp}] DROWSY - ALERT!")
+                print("=" * 50)
+        self.shown_state = decision.state
@@ -0,0 +1,172 @@
+"""
+Append-only, fixed-record binary log of per-frame decisions.
+
+Each file is a 32-byte header followed by 32-byte records. Files are
+memory-mapped and preallocated to max_bytes, so logging a frame is a handful of
+stores into mapped memory: no syscall, no formatting, no allocation. When a
+file is full it is truncated to the records actually written and logging
+moves on to the next file. Only the newest max_files files are kept.
+
+The record count lives in the header and is updated after every append, so
+readers (read_events / to_dataframe, or tools/read_events.py) can open a log
+that is still being written.
+
+    log = EventLog("logs/")
+    log.append(time.time(), frame_no, probs, decision)
+    ...
+    log.close()
+    df = to_dataframe("logs/")
+"""
+import glob
+import mmap
+import os
+
+import numpy as np
+
+from drivesafe import LABELS
+from drivesafe.state_engine import ABSENT, AWAKE, DROWSY_ALERT
+
+MAGIC = b"DSEVLOG1"
+
+HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("record_size", "<u4"),
+    ("count", "<u8"),
+    ("reserved", "u1", 12),
+])
+
+RECORD_DTYPE = np.dtype([
+    ("timestamp", "<f8"),        # wall-clock seconds (time.time())
+    ("frame", "<u4"),            # frame counter since start
+    ("probs", "<f4", 3),         # model output: absent, awake, drowsy
+    ("drowsy_seconds", "<f4"),   # continuous drowsiness so far
+    ("state", "u1"),             # index into STATES
+    ("alarm", "u1"),             # 1 while the alarm is on
+    ("inferred", "u1"),          # 0 when the motion gate reused the previous output
+    ("reserved", "u1"),
+])
+
+# state byte <-> displayed state
+STATES = (ABSENT, AWAKE, DROWSY_ALERT)
+_STATE_INDEX = {state: i for i, state in enumerate(STATES)}
+
+assert HEADER_DTYPE.itemsize == RECORD_DTYPE.itemsize == 32
+
+
+class EventLog:
+    """ Memory-mapped writer with size-based rotation """
+
+    def __init__(self, directory, max_bytes=16 << 20, max_files=20, prefix="events"):
+        self.directory = directory
+        self.prefix = prefix
+        self.capacity = max(1, (max_bytes - HEADER_DTYPE.itemsize) // RECORD_DTYPE.itemsize)
+        self.max_files = max_files
+        os.makedirs(directory, exist_ok=True)
+
+        existing = log_files(directory, prefix)
+        self._index = int(existing[-1].rsplit("-", 1)[1].split(".")[0]) + 1 if existing else 0
+        self._map = None
+        self.path = None
+        self.appended = 0
+        self.rotations = 0
+        self._open()
+
+    def _open(self):
+        self.path = os.path.join(self.directory, f"{self.prefix}-{self._index:06d}.bin")
+        self._index += 1
+        size = HEADER_DTYPE.itemsize + self.capacity * RECORD_DTYPE.itemsize
+        with open(self.path, "w+b") as f:
+            f.truncate(size)
+            self._map = mmap.mmap(f.fileno(), size)
+        self._header = np.frombuffer(self._map, HEADER_DTYPE, count=1)
+        self._records = np.frombuffer(self._map, RECORD_DTYPE, offset=HEADER_DTYPE.itemsize)
+        self._header["magic"] = MAGIC
+        self._header["record_size"] = RECORD_DTYPE.itemsize
+        self._header["count"] = 0
+        self._count = 0
+
+        # Keep the newest max_files files
+        for old in log_files(self.directory, self.prefix)[:-self.max_files]:
+            os.remove(old)
+
+    def _close_file(self):
+        if self._map is None:
+            return
+        self._map.flush()
+        # The numpy views must go before the map can be closed
+        self._header = self._records = None
+        self._map.close()
+        self._map = None
+        # Give back the unused preallocated tail
+        with open(self.path, "r+b") as f:
+            f.truncate(HEADER_DTYPE.itemsize + self._count * RECORD_DTYPE.itemsize)
+
+    def append(self, timestamp, frame, probs, decision, inferred=True):
+        """ Log one frame. decision is a drivesafe.state_engine.Decision """
+        if self._count == self.capacity:
+            self._close_file()
+            self._open()
+            self.rotations += 1
+        # One structured store is ~3x cheaper than setting the fields one by one
+        self._records[self._count] = (timestamp, frame, probs, decision.drowsy_seconds,
+                                      _STATE_INDEX[decision.state], decision.alarm, inferred, 0)
+        self._count += 1
+        # Published last, so a concurrent reader never sees a half-written record
+        self._header["count"] = self._count
+        self.appended += 1
+
+    def flush(self):
+        if self._map is not None:
+            self._map.flush()
+
+    def close(self):
+        self._close_file()
+
+
+# -------------------- Reading --------------------
+def log_files(directory, prefix="events"):
+    return sorted(glob.glob(os.path.join(directory, f"{prefix}-*.bin")))
+
+
+def read_file(path):
+    """ Records of one log file as a structured numpy array (copy) """
+    raw = np.fromfile(path, dtype=np.uint8)
+    if len(raw) < HEADER_DTYPE.itemsize:
+        return np.empty(0, RECORD_DTYPE)
+    header = raw[:HEADER_DTYPE.itemsize].view(HEADER_DTYPE)[0]
+    if header["magic"] != MAGIC or header["record_size"] != RECORD_DTYPE.itemsize:
+        raise ValueError(f"{path} is not a DriveSafe event log")
+    available = (len(raw) - HEADER_DTYPE.itemsize) // RECORD_DTYPE.itemsize
+    count = min(int(header["count"]), available)
+    body = raw[HEADER_DTYPE.itemsize:HEADER_DTYPE.itemsize + count * RECORD_DTYPE.itemsize]
+    return body.view(RECORD_DTYPE).copy()
+
+
+def read_events(source, prefix="events"):
+    """ All records of a log directory (oldest first), a single file, or a list of files """
+    if isinstance(source, (list, tuple)):
+        paths = source
+    elif os.path.isdir(source):
+        paths = log_files(source, prefix)
+    else:
+        paths = [source]
+    parts = [read_file(p) for p in paths]
+    return np.concatenate(parts) if parts else np.empty(0, RECORD_DTYPE)
+
+
+def to_dataframe(source, prefix="events"):
+    """ Records as a pandas DataFrame with one column per class probability """
+    import pandas as pd
+
+    records = read_events(source, prefix)
+    df = pd.DataFrame({
+        "time": pd.to_datetime(records["timestamp"], unit="s"),
+        "frame": records["frame"],
+    })
+    for index, name in LABELS.items():
+        df[f"p_{name}"] = records["probs"][:, index]
+    df["drowsy_seconds"] = records["drowsy_seconds"]
+    df["state"] = pd.Categorical.from_codes(records["state"], categories=list(STATES))
+    df["alarm"] = records["alarm"].astype(bool)
+    df["inferred"] = records["inferred"].astype(bool)
+    return df
@@ -0,0 +1,36 @@
+"""
+File helpers shared by the tools: model fingerprints and image folder listings.
+"""
+import hashlib
+import os
+
+import numpy as np
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+
+def file_sha256(path):
+    """ SHA-256 of a model file, or of every file in a model folder (NCNN) in name order """
+    digest = hashlib.sha256()
+    if os.path.isdir(path):
+        for root, _, files in sorted(os.walk(path)):
+            for name in sorted(files):
+                with open(os.path.join(root, name), "rb") as f:
+                    digest.update(f.read())
+    else:
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+
+def list_images(folder, limit=None):
+    """ Image paths under folder (recursively), sorted; at most `limit`, spread evenly """
+    paths = []
+    for root, _, files in os.walk(folder):
+        paths.extend(os.path.join(root, f) for f in sorted(files) if f.lower().endswith(IMAGE_EXTENSIONS))
+    paths.sort()
+    if limit and len(paths) > limit:
+        # Evenly spaced subset so every class folder is represented
+        paths = [paths[i] for i in np.linspace(0, len(paths) - 1, limit).astype(int)]
+    return paths
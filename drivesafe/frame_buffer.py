@@ -0,0 +1,120 @@
+"""
+Latest-frame-wins buffering between a camera and a slower consumer.
+
+The capture side always overwrites a single slot, so the consumer never works
+through a backlog: whatever it picks up is the newest frame the camera produced.
+"""
+import threading
+import time
+
+
+class LatestFrameBuffer:
+    """ One-slot buffer: put() overwrites, get() returns the newest unseen frame """
+
+    def __init__(self, max_age=0.5):
+        # Frames older than max_age seconds when picked up are discarded as stale
+        self.max_age = max_age
+        self._cond = threading.Condition()
+        self._frame = None
+        self._timestamp = 0.0
+        self._seq = 0
+        self._taken_seq = 0
+        self._closed = False
+
+        # Counters
+        self.captured = 0
+        self.dropped = 0   # overwritten before anyone read them
+        self.stale = 0     # read too late to be worth processing
+
+    def put(self, frame, timestamp=None):
+        with self._cond:
+            if self._seq > self._taken_seq:
+                self.dropped += 1
+            self._frame = frame
+            self._timestamp = time.monotonic() if timestamp is None else timestamp
+            self._seq += 1
+            self.captured += 1
+            self._cond.notify_all()
+
+    def get(self, timeout=None):
+        """
+        Wait for a frame newer than the last one handed out.
+        Returns (seq, timestamp, frame), or None on timeout / close.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    return None
+                if self._seq > self._taken_seq:
+                    self._taken_seq = self._seq
+                    if time.monotonic() - self._timestamp > self.max_age:
+                        self.stale += 1
+                        continue
+                    return self._seq, self._timestamp, self._frame
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def stats(self):
+        with self._cond:
+            return {
+                "captured": self.captured,
+                "dropped": self.dropped,
+                "stale": self.stale,
+            }
+
+
+class CaptureWorker(threading.Thread):
+    """
+    Reads a cv2.VideoCapture-like source as fast as it delivers and feeds a LatestFrameBuffer.
+    A failed read ends a file (or any source without live=True) and closes the buffer;
+    a live camera is retried, up to max_retries failures in a row.
+    """
+
+    def __init__(self, source, buffer, max_retries=200, retry_wait=0.01):
+        super().__init__(daemon=True)
+        self.source = source
+        self.buffer = buffer
+        self.live = getattr(source, "live", False)
+        self.max_retries = max_retries
+        self.retry_wait = retry_wait
+        self.running = False
+
+    def run(self):
+        self.running = True
+        failures = 0
+        try:
+            while self.running:
+                ret, frame = self.source.read()
+                if not ret:
+                    failures += 1
+                    if not self.live:
+                        print("End of capture source")
+                        break
+                    if failures > self.max_retries:
+                        print(f"Camera delivered no frame in {failures} reads; stopping capture")
+                        break
+                    time.sleep(self.retry_wait)
+                    continue
+                failures = 0
+                # Timestamp as close to the glass as we can get it
+                self.buffer.put(frame, time.monotonic())
+        finally:
+            # Wakes the consumer, which then sees the buffer closed
+            self.running = False
+            self.buffer.close()
+
+    def stop(self):
+        self.running = False
+        self.buffer.close()
@@ -0,0 +1,97 @@
+"""
+Access to the video lists in meta_data.zip (*_video_info.csv).
+
+The CSVs only record file names, frame counts and fps; the videos themselves
+live elsewhere. resolve_videos() maps each row to a file under a videos
+directory, using the frame count to tell apart clips that share a name
+(the NTHU-DDD training set reuses the same four names for every subject).
+"""
+import csv
+import io
+import os
+import zipfile
+
+VIDEO_SETS = {
+    "training": "Training Dataset_video_info.csv",
+    "testing": "Testing_Dataset_video_info.csv",
+    "recorded": "recorded_videos_video_info.csv",
+}
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv")
+
+
+def _open_csv(source, file_name):
+    if zipfile.is_zipfile(source):
+        with zipfile.ZipFile(source) as archive:
+            for member in archive.namelist():
+                if os.path.basename(member) == file_name:
+                    return io.StringIO(archive.read(member).decode("utf-8-sig"))
+    else:
+        for root, _, files in os.walk(source):
+            if file_name in files:
+                with open(os.path.join(root, file_name), encoding="utf-8-sig") as f:
+                    return io.StringIO(f.read())
+    raise FileNotFoundError(f"{file_name} not found in {source}")
+
+
+def read_video_info(source, video_set):
+    """ Rows of one *_video_info.csv as dicts (the trailing Total row is dropped) """
+    if video_set not in VIDEO_SETS:
+        raise ValueError(f"Unknown video set: {video_set} (choose from {', '.join(VIDEO_SETS)})")
+
+    rows = []
+    for row in csv.DictReader(_open_csv(source, VIDEO_SETS[video_set])):
+        if row["name"] == "Total":
+            continue
+        width, height = (int(v) for v in row["dimensions"].split("x"))
+        rows.append({
+            "set": video_set,
+            "name": row["name"],
+            "frames": int(row["frames"]),
+            "fps": float(row["frame/second"]),
+            "duration_min": float(row["duration_min"]),
+            "width": width,
+            "height": height,
+        })
+    return rows
+
+
+def _frame_count(path):
+    import cv2
+    cap = cv2.VideoCapture(path)
+    try:
+        return int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    finally:
+        cap.release()
+
+
+def resolve_videos(rows, videos_dir):
+    """
+    Match CSV rows to files under videos_dir.
+    Returns (resolved, missing): resolved is a list of (row, path), missing a list of rows.
+    """
+    by_name = {}
+    for root, _, files in os.walk(videos_dir):
+        for file_name in sorted(files):
+            if file_name.lower().endswith(VIDEO_EXTENSIONS):
+                by_name.setdefault(file_name, []).append(os.path.join(root, file_name))
+
+    resolved, missing, used = [], [], set()
+    for row in rows:
+        candidates = [p for p in by_name.get(row["name"], []) if p not in used]
+        if len(candidates) > 1:
+            # Same name in several folders: pick the one whose length matches the CSV
+            matching = [p for p in candidates if _frame_count(p) == row["frames"]]
+            candidates = matching or candidates
+        if candidates:
+            used.add(candidates[0])
+            resolved.append((row, candidates[0]))
+        else:
+            missing.append(row)
+    return resolved, missing
+
+
+def video_id(path, videos_dir):
+    """ Stable, filesystem-safe id for a video: its path relative to videos_dir """
+    relative = os.path.relpath(path, videos_dir)
+    return os.path.splitext(relative)[0].replace(os.sep, "__").replace(" ", "_")
@@ -0,0 +1,136 @@
+"""
+Live counters for the detection loop, served over local HTTP.
+
+The loop only bumps plain attributes on a LiveMetrics object and adds one
+sample to a ring buffer per inference. Rates and percentiles are computed by
+the HTTP thread when a client asks, so scraping costs the loop nothing.
+
+    metrics = LiveMetrics()
+    MetricsServer(metrics, port=9108).start()
+    ...
+    metrics.record(decision, inference_seconds)   # once per frame
+
+    curl http://127.0.0.1:9108/metrics        # Prometheus text format
+    curl http://127.0.0.1:9108/metrics.json
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from drivesafe.profiling import RollingHistogram
+
+
+class LiveMetrics:
+    """ Counters written by the loop thread, read by the metrics server """
+
+    def __init__(self, window=1000, clock=time.monotonic):
+        self.clock = clock
+        self.started = clock()
+        self.frames = 0
+        self.inferences = 0
+        self.alerts = 0          # alarm on-transitions
+        self.state = None
+        self.alarm = False
+        self.inference_latency = RollingHistogram(window)
+
+    def record(self, decision, inference_seconds=None):
+        """ Call once per frame; inference_seconds is None when the model was skipped """
+        self.frames += 1
+        if inference_seconds is not None:
+            self.inferences += 1
+            self.inference_latency.add(inference_seconds)
+        if decision.alarm and not self.alarm:
+            self.alerts += 1
+        self.alarm = decision.alarm
+        self.state = decision.state
+
+
+class _Snapshot:
+    """ Turns counter deltas between two scrapes into rates """
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self._lock = threading.Lock()
+        self._last = (metrics.started, 0, 0)
+
+    def take(self):
+        m = self.metrics
+        with self._lock:
+            now, frames, inferences = m.clock(), m.frames, m.inferences
+            last_time, last_frames, last_inferences = self._last
+            self._last = (now, frames, inferences)
+        elapsed = max(now - last_time, 1e-9)
+        return {
+            "uptime_s": now - m.started,
+            "frames": frames,
+            "inferences": inferences,
+            "alerts": m.alerts,
+            "alarm": m.alarm,
+            "state": m.state,
+            "fps": (frames - last_frames) / elapsed,
+            "inference_fps": (inferences - last_inferences) / elapsed,
+            "inference_latency": m.inference_latency.summary(),
+        }
+
+
+def _prometheus(snapshot):
+    lines = []
+
+    def metric(name, kind, value, help_text, labels=""):
+        lines.append(f"# HELP drivesafe_{name} {help_text}")
+        lines.append(f"# TYPE drivesafe_{name} {kind}")
+        lines.append(f"drivesafe_{name}{labels} {value}")
+
+    metric("frames_total", "counter", snapshot["frames"], "Frames processed")
+    metric("inferences_total", "counter", snapshot["inferences"], "Model invocations")
+    metric("alerts_total", "counter", snapshot["alerts"], "Drowsiness alarms raised")
+    metric("alarm", "gauge", int(snapshot["alarm"]), "1 while the alarm is on")
+    metric("fps", "gauge", f"{snapshot['fps']:.3f}", "Frame rate since the previous scrape")
+    metric("uptime_seconds", "gauge", f"{snapshot['uptime_s']:.1f}", "Seconds since start")
+    latency = snapshot["inference_latency"]
+    lines.append("# HELP drivesafe_inference_latency_seconds Recent inference latency")
+    lines.append("# TYPE drivesafe_inference_latency_seconds summary")
+    if latency["count"]:
+        for quantile, key in (("0.5", "p50_ms"), ("0.95", "p95_ms"), ("0.99", "p99_ms")):
+            lines.append(f'drivesafe_inference_latency_seconds{{quantile="{quantile}"}} {latency[key] / 1000.0:.6f}')
+    lines.append(f"drivesafe_inference_latency_seconds_count {latency['count']}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """ Serves a LiveMetrics object on a background thread (localhost by default) """
+
+    def __init__(self, metrics, port=9108, host="127.0.0.1"):
+        snapshot = _Snapshot(metrics)
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path in ("/metrics", "/"):
+                    body, kind = _prometheus(snapshot.take()).encode(), "text/plain; version=0.0.4"
+                elif self.path == "/metrics.json":
+                    body, kind = json.dumps(snapshot.take()).encode(), "application/json"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", kind)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="metrics", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
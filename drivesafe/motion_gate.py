@@ -0,0 +1,113 @@
+"""
+Motion-gated, adaptive-rate inference.
+
+MotionGate compares a tiny thumbnail of each frame against the one the model
+last saw and lets the caller reuse the previous result while the scene is
+effectively unchanged. The change is measured per block of the frame (the
+largest block wins), not averaged over the whole frame, so eyes closing in a
+still head still count. A staleness bound, well below the alert delay, forces
+a fresh inference every so often, so a missed change delays an alarm by at
+most that long.
+
+AdaptiveRate picks the inference rate from the driver state: fast while the
+drowsiness timer is climbing, slow once the driver has been steadily awake or
+absent for a while.
+"""
+import time
+
+import cv2
+import numpy as np
+
+
+class MotionGate:
+    """ Decides per frame whether the model needs to run again """
+
+    def __init__(self, threshold=2.0, max_staleness=0.25, thumb_size=32, grid=8, clock=time.monotonic):
+        # Mean absolute gray-level difference (0-255) inside any one block that counts as a change
+        self.threshold = threshold
+        # Seconds a cached result may be reused before inference is forced (keep well below the alert delay)
+        self.max_staleness = max_staleness
+        self.thumb_size = thumb_size
+        # Blocks per side: 8 -> each block is 1/8 of the frame width, about the size of an eye region
+        self.grid = grid
+        self.clock = clock
+
+        self._thumb = np.empty((thumb_size, thumb_size), dtype=np.uint8)
+        self._reference = np.empty((thumb_size, thumb_size), dtype=np.uint8)
+        self._diff = np.empty((thumb_size, thumb_size), dtype=np.uint8)
+        self._blocks = np.empty((grid, grid), dtype=np.uint8)
+        self._has_reference = False
+        self._last_inference = 0.0
+
+        # Stats
+        self.frames = 0
+        self.skipped = 0
+        self._inference_time = 0.0
+        self._inferences_timed = 0
+
+    def should_infer(self, gray):
+        """ gray: single-channel frame (any size). Returns True if the model should run on it """
+        self.frames += 1
+        now = self.clock()
+        cv2.resize(gray, (self.thumb_size, self.thumb_size), dst=self._thumb, interpolation=cv2.INTER_AREA)
+
+        if self._has_reference and now - self._last_inference < self.max_staleness:
+            cv2.absdiff(self._thumb, self._reference, dst=self._diff)
+            # Area averaging down to the grid gives each block's mean difference
+            cv2.resize(self._diff, (self.grid, self.grid), dst=self._blocks, interpolation=cv2.INTER_AREA)
+            if cv2.minMaxLoc(self._blocks)[1] < self.threshold:
+                self.skipped += 1
+                return False
+
+        # Compare future frames against what the model actually saw
+        self._reference, self._thumb = self._thumb, self._reference
+        self._has_reference = True
+        self._last_inference = now
+        return True
+
+    def record_inference(self, seconds):
+        """ Feed back how long the model took, used to estimate the CPU time saved """
+        self._inference_time += seconds
+        self._inferences_timed += 1
+
+    def reset(self):
+        self._has_reference = False
+
+    def stats(self):
+        mean_inference = self._inference_time / max(1, self._inferences_timed)
+        return {
+            "frames": self.frames,
+            "skipped": self.skipped,
+            "skip_rate": self.skipped / max(1, self.frames),
+            "cpu_saved_s": self.skipped * mean_inference,
+        }
+
+
+class AdaptiveRate:
+    """ Chooses the inference rate from the latest label and drowsiness level """
+
+    def __init__(self, min_fps=3.0, max_fps=10.0, settle_frames=20):
+        self.min_fps = min_fps
+        self.max_fps = max_fps
+        # Consecutive steady awake/absent frames before slowing down
+        self.settle_frames = settle_frames
+        self.fps = max_fps
+        self._steady = 0
+        self._last_level = 0
+
+    def update(self, label, drowsy_level):
+        """
+        drowsy_level: anything that grows while drowsiness builds (frame counter or seconds).
+        Returns the inference rate to use for the next frame.
+        """
+        climbing = drowsy_level > self._last_level
+        self._last_level = drowsy_level
+
+        if climbing or label == "drowsy":
+            self._steady = 0
+            self.fps = self.max_fps
+        elif label in ("awake", "absent"):
+            self._steady += 1
+            if self._steady >= self.settle_frames:
+                self.fps = self.min_fps
+        return self.fps
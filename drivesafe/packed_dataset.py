@@ -0,0 +1,89 @@
+"""
+Packed, memory-mapped image dataset written by tools/preprocess_dataset.py --pack.
+
+A packed split is a folder of .npy shards, each an (N, size, size) uint8 array
+of center-cropped grayscale images, plus index.json listing every image's
+source path, content hash, label and (shard, row). Shards are opened with
+np.load(mmap_mode="r"), so loading costs no decoding and only the pages that
+are actually touched get read.
+
+    data = PackedDataset("dataset_preprocessed/packed/test")
+    for indices, images in data.batches(64):
+        ...   # images: (n, size, size) uint8 view, labels: data.labels[indices]
+"""
+import json
+import os
+
+import numpy as np
+
+from drivesafe import LABELS
+
+INDEX_NAME = "index.json"
+FORMAT_VERSION = 1
+
+
+def shard_name(number):
+    return f"shard-{number:05d}.npy"
+
+
+def load_index(directory):
+    """ Parsed index.json of a packed split, or None if there is none (yet) """
+    path = os.path.join(directory, INDEX_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        index = json.load(f)
+    if index.get("version") != FORMAT_VERSION:
+        return None
+    return index
+
+
+def save_index(directory, index):
+    """ Written last and atomically: shards without an index are never picked up """
+    index["version"] = FORMAT_VERSION
+    tmp_path = os.path.join(directory, INDEX_NAME + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, os.path.join(directory, INDEX_NAME))
+
+
+class PackedDataset:
+    """ Read-only view of a packed split """
+
+    def __init__(self, directory):
+        index = load_index(directory)
+        if index is None:
+            raise FileNotFoundError(f"No packed dataset in {directory}")
+        self.directory = directory
+        self.size = index["size"]
+        self.classes = [LABELS[i] for i in sorted(LABELS)]
+        self.shards = [np.load(os.path.join(directory, s["file"]), mmap_mode="r") for s in index["shards"]]
+
+        items = index["items"]
+        self.paths = [item["path"] for item in items]
+        self.hashes = [item["sha1"] for item in items]
+        self.labels = np.array([item["label"] for item in items], dtype=np.int64)
+        self._shard = np.array([item["shard"] for item in items], dtype=np.int64)
+        self._row = np.array([item["row"] for item in items], dtype=np.int64)
+
+    def __len__(self):
+        return len(self.labels)
+
+    def __getitem__(self, i):
+        """ (size x size uint8 view, label) """
+        return self.shards[self._shard[i]][self._row[i]], self.labels[i]
+
+    def batches(self, batch_size):
+        """ Yields (item indices, images) in storage order; images are zero-copy slices of a shard """
+        order = np.lexsort((self._row, self._shard))
+        start = 0
+        while start < len(order):
+            shard = self._shard[order[start]]
+            first_row = self._row[order[start]]
+            stop = start + 1
+            # Extend while the rows are consecutive in the same shard
+            while (stop < len(order) and stop - start < batch_size and self._shard[order[stop]] == shard
+                   and self._row[order[stop]] == first_row + (stop - start)):
+                stop += 1
+            yield order[start:stop], self.shards[shard][first_row:first_row + (stop - start)]
+            start = stop
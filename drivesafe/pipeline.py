@@ -0,0 +1,378 @@
+"""
+The Pi monitor as three processes: capture, inference and output.
+
+The single-process loop captures, resizes, runs NCNN, drives the GPIO and
+draws, all in one thread, so no two of those overlap. Here each stage has
+its own process (and core on a Pi 5):
+
+- capture: reads the camera and writes each frame straight into a
+  SharedFrameRing slot (shared memory, never pickled);
+- inference: pins the newest frame, preprocesses it in place, runs the
+  model and the state engine, and sends a small decision tuple on a queue;
+- output: applies decisions to the LEDs/buzzer and handles the console,
+  event log, metrics, clips, preview and window. It reads the newest frame
+  from the ring only when something has to be drawn.
+
+Shutdown: Ctrl+C, ESC in the window, the end of a video file or a crashed
+child all set one stop event. Capture and inference finish first. Output
+drains the queue, switches the LEDs and buzzer off and exits. If output
+itself died, the parent switches them off.
+
+    python hardware/drowsiness.py --processes --headless
+    run_pipeline({"source": "synthetic", "gpio": "mock", "headless": True}, seconds=10)
+"""
+import multiprocessing
+import queue
+import signal
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from drivesafe.shm_ring import SharedFrameRing
+
+# Ring consumers
+INFERENCE, OUTPUT = 0, 1
+
+DEFAULT_SETTINGS = {
+    # capture
+    "source": "picamera2", "capture_size": (320, 240), "camera_fps": 30, "loop": False, "realtime": True,
+    # inference
+    # input_size: tuned size for models that accept any; imgsz: fallback when the model records none
+    "backend": "ncnn", "model": "best_ncnn_model", "threads": 4, "imgsz": 640, "input_size": None,
+    "fps": 10, "min_fps": 3, "adaptive_rate": True, "overrun_policy": "skip", "motion_gate": True,
+    "roi": False, "roi_imgsz": 320, "face_model": None, "alert_seconds": 1.0,
+    # output
+    "gpio": "gpiozero", "buzzer_pattern": None, "headless": False, "verbose": True,
+    "preview_port": None, "preview_host": "127.0.0.1", "preview_fps": 5.0,
+    "event_log": None, "metrics_port": None, "clips": None, "clip_mode": "jpeg",
+    "queue_size": 64,
+}
+
+
+def _child_signals():
+    # Ctrl+C reaches the whole process group; only the parent reacts, then stops the children in order
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+# -------------------- Capture --------------------
+def capture_process(settings, ring, stop, results):
+    from drivesafe.capture import open_capture
+
+    _child_signals()
+    height, width = ring.shape[:2]
+    camera = open_capture(settings["source"], size=(width, height), fps=settings["camera_fps"],
+                          loop=settings["loop"], realtime=settings["realtime"])
+    stats = {"frames": 0, "resized": 0}
+    try:
+        if not camera.isOpened():
+            print(f"Cannot open capture source: {settings['source']}")
+            return
+        print(f"Capture: {camera.name} at {camera.size[0]}x{camera.size[1]}")
+        while not stop.is_set():
+            ret, frame = camera.read()
+            if not ret:
+                print("End of capture source")
+                break
+            captured_at = time.monotonic()
+            slot = ring.claim()
+            if frame.shape[:2] == (height, width):
+                np.copyto(ring.frames[slot], frame)
+            else:
+                # The driver picked another size; scale straight into the slot
+                cv2.resize(frame, (width, height), dst=ring.frames[slot], interpolation=cv2.INTER_AREA)
+                stats["resized"] += 1
+            ring.publish(slot, captured_at)
+            stats["frames"] += 1
+    finally:
+        # Whatever ended capture ends the pipeline
+        stop.set()
+        camera.release()
+        results.put(("capture", stats))
+        ring.close()
+
+
+# -------------------- Inference --------------------
+def inference_process(settings, ring, decisions, stop, results, ready):
+    from drivesafe.backends import load_backend
+    from drivesafe.motion_gate import MotionGate, AdaptiveRate
+    from drivesafe.preprocess import Preprocessor
+    from drivesafe.roi import FaceROI, create_face_detector, ABSENT_PROBS
+    from drivesafe.scheduler import FrameScheduler
+    from drivesafe.state_engine import DrowsinessStateEngine
+    from drivesafe.tuning import input_size_for
+
+    _child_signals()
+    model = load_backend(settings["backend"], settings["model"], threads=settings["threads"])
+    preprocess = Preprocessor(input_size_for(model, settings["input_size"], settings["imgsz"]))
+    roi = FaceROI(create_face_detector(settings["face_model"])) if settings["roi"] else None
+    if roi is not None:
+        preprocess = Preprocessor(settings["roi_imgsz"] if model.dynamic_size else model.input_size)
+    motion_gate = MotionGate() if settings["motion_gate"] else None
+    state_engine = DrowsinessStateEngine(alert_after=settings["alert_seconds"])
+    scheduler = FrameScheduler(settings["fps"], policy=settings["overrun_policy"]) if settings["fps"] else None
+    adaptive_rate = None
+    if scheduler is not None and settings["adaptive_rate"]:
+        adaptive_rate = AdaptiveRate(min_fps=settings["min_fps"], max_fps=settings["fps"])
+    ready.set()
+
+    stats = {"frames": 0, "inferences": 0, "skipped_frames": 0, "queue_full": 0}
+    last_seq = 0
+    probs = None
+    try:
+        while not stop.is_set():
+            if scheduler is not None:
+                scheduler.wait()
+            item = ring.acquire(INFERENCE, last_seq, timeout=0.5)
+            if item is None:
+                continue
+            seq, captured_at, frame = item
+            try:
+                # Read in place; the slot is not reused until it is released
+                if roi is None:
+                    box = None
+                    model_input = preprocess(frame)
+                else:
+                    box = roi.update(frame)
+                    model_input = None if box is None else preprocess(roi.crop(frame, box))
+            finally:
+                del frame
+                ring.release(INFERENCE)
+            if last_seq:
+                stats["skipped_frames"] += seq - last_seq - 1
+            last_seq = seq
+
+            inference_seconds = None
+            if model_input is None:
+                # Face lost: report absent without running the model
+                probs = ABSENT_PROBS
+                if motion_gate is not None:
+                    motion_gate.reset()
+            elif motion_gate is None or motion_gate.should_infer(preprocess.gray):
+                started = time.monotonic()
+                probs = model.predict(model_input)[0]
+                inference_seconds = time.monotonic() - started
+                stats["inferences"] += 1
+                if motion_gate is not None:
+                    motion_gate.record_inference(inference_seconds)
+
+            decision = state_engine.update(probs, captured_at)
+            if adaptive_rate is not None:
+                scheduler.set_fps(adaptive_rate.update(decision.label, decision.drowsy_seconds))
+            stats["frames"] += 1
+            try:
+                decisions.put_nowait((seq, captured_at, np.array(probs), decision, inference_seconds, box))
+            except queue.Full:
+                stats["queue_full"] += 1
+    finally:
+        stop.set()
+        if motion_gate is not None:
+            stats["motion_gate"] = motion_gate.stats()
+        if roi is not None:
+            stats["roi"] = roi.stats()
+        try:
+            # Tells output there is nothing more to come
+            decisions.put(None, timeout=1.0)
+        except queue.Full:
+            pass
+        model.close()
+        results.put(("inference", stats))
+        ring.close()
+
+
+# -------------------- Output --------------------
+def output_process(settings, ring, decisions, stop, results):
+    from drivesafe.actuators import ActuatorController, create_backend
+    from drivesafe.clip_recorder import ClipRecorder
+    from drivesafe.decision_outputs import DecisionOutputs
+    from drivesafe.event_log import EventLog
+    from drivesafe.metrics import LiveMetrics, MetricsServer
+    from drivesafe.preview import PreviewServer, annotate
+    from drivesafe.profiling import RollingHistogram
+
+    _child_signals()
+    # GPIO SETUP (all off until the first decision)
+    outputs = ActuatorController(create_backend(settings["gpio"]))
+    event_log = EventLog(settings["event_log"]) if settings["event_log"] else None
+    metrics = LiveMetrics() if settings["metrics_port"] else None
+    metrics_server = MetricsServer(metrics, settings["metrics_port"]).start() if metrics is not None else None
+    clip_recorder = ClipRecorder(settings["clips"], mode=settings["clip_mode"]).start() if settings["clips"] else None
+    preview = None
+    if settings["preview_port"]:
+        preview = PreviewServer(settings["preview_port"], host=settings["preview_host"],
+                                max_fps=settings["preview_fps"]).start()
+        print(f"Preview: http://{settings['preview_host']}:{preview.port}/")
+    show_window = not settings["headless"]
+    decision_outputs = DecisionOutputs(outputs, settings["buzzer_pattern"], event_log=event_log, metrics=metrics,
+                                       verbose=settings["verbose"])
+
+    # Capture -> LEDs/buzzer updated, per decision
+    latency = RollingHistogram(window=10000)
+    stats = {"decisions": 0, "alerts": 0}
+    alarm_was_on = False
+    started = None
+    try:
+        while True:
+            try:
+                item = decisions.get(timeout=0.5)
+            except queue.Empty:
+                if stop.is_set():
+                    break
+                continue
+            if item is None:
+                break
+            seq, captured_at, probs, decision, inference_seconds, box = item
+
+            # GPIO first (it is what the driver notices), then log, metrics and console
+            decision_outputs.publish(decision, seq, probs, inference_seconds)
+            now = decision_outputs.actuated_at
+            latency.add(now - captured_at)
+            if started is None:
+                started = now
+            stats["decisions"] += 1
+            if decision.alarm and not alarm_was_on:
+                stats["alerts"] += 1
+
+            # Frames are only fetched from the ring when something uses them
+            send_preview = preview is not None and preview.wants_frame()
+            if show_window or send_preview or clip_recorder is not None:
+                item = ring.acquire(OUTPUT, 0, timeout=0)
+                if item is not None:
+                    # Own copy: it is drawn on and kept by the clip recorder / preview
+                    frame = item[2].copy()
+                    item = None
+                    ring.release(OUTPUT)
+                    if show_window or send_preview:
+                        annotate(frame, decision, settings["alert_seconds"], box)
+                    if clip_recorder is not None:
+                        clip_recorder.push(frame, now)
+                        if decision.alarm and not alarm_was_on:
+                            clip_recorder.trigger(now)
+                    if send_preview:
+                        preview.publish(frame)
+                    if show_window:
+                        cv2.imshow("Driver Monitor", frame)
+                        if cv2.waitKey(1) & 0xFF == 27:  # ESC
+                            stop.set()
+            alarm_was_on = decision.alarm
+    finally:
+        # Turn off all devices
+        outputs.close()
+        stop.set()
+        if show_window:
+            cv2.destroyAllWindows()
+        if event_log is not None:
+            event_log.close()
+        if metrics_server is not None:
+            metrics_server.stop()
+        if clip_recorder is not None:
+            clip_recorder.stop()
+            print(clip_recorder.format_stats())
+        if preview is not None:
+            preview.stop()
+        stats["gpio"] = outputs.stats()
+        stats["latency"] = latency.summary()
+        stats["seconds"] = 0.0 if started is None else time.monotonic() - started
+        results.put(("output", stats))
+        ring.close()
+
+
+# -------------------- Parent --------------------
+def run_pipeline(settings, seconds=None):
+    """
+    Start the three processes and wait until the pipeline stops (or `seconds`
+    pass). Returns {"capture": ..., "inference": ..., "output": ..., "exitcodes": ...} stats.
+    """
+    settings = dict(DEFAULT_SETTINGS, **settings)
+    # fork: the children inherit the ring, queues and event without re-running the caller's script
+    ctx = multiprocessing.get_context("fork" if sys.platform != "win32" else "spawn")
+    width, height = settings["capture_size"]
+    ring = SharedFrameRing((height, width, 3), slots=4, consumers=2, ctx=ctx)
+    stop = ctx.Event()
+    ready = ctx.Event()
+    decisions = ctx.Queue(settings["queue_size"])
+    results = ctx.Queue()
+
+    output = ctx.Process(target=output_process, name="output", args=(settings, ring, decisions, stop, results))
+    inference = ctx.Process(target=inference_process, name="inference",
+                            args=(settings, ring, decisions, stop, results, ready))
+    capture = ctx.Process(target=capture_process, name="capture", args=(settings, ring, stop, results))
+    processes = (capture, inference, output)
+    # Output first so the LEDs are set up, capture last so no frame waits for a model still loading
+    output.start()
+    inference.start()
+
+    deadline = None if seconds is None else time.monotonic() + seconds
+    try:
+        # Like the single-process loop, open the camera only once the model has loaded
+        while not ready.wait(0.2):
+            if not inference.is_alive():
+                break
+        if inference.is_alive():
+            capture.start()
+        while not stop.is_set():
+            if not all(p.is_alive() for p in processes):
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            stop.wait(0.2)
+    except KeyboardInterrupt:
+        print("\n" + "=" * 50)
+        print("System stopped by user")
+        print("=" * 50)
+    finally:
+        stop.set()
+        # Capture and inference first, so output drains the last decisions and then switches everything off
+        for process in processes:
+            if process.pid is None:
+                continue  # never started
+            process.join(timeout=5.0)
+            if process.is_alive():
+                print(f"{process.name} process did not stop; terminating it")
+                process.terminate()
+                process.join()
+        if output.exitcode != 0:
+            from drivesafe.actuators import ActuatorController, create_backend
+            print("Output process did not exit cleanly; switching the LEDs and buzzer off")
+            try:
+                ActuatorController(create_backend(settings["gpio"])).close()
+            except Exception as e:
+                # Still collect the stats and exit codes; the caller reports the failed process
+                print(f"Could not switch the LEDs and buzzer off: {e}")
+
+        stats = {"exitcodes": {p.name: p.exitcode for p in processes}}
+        while True:
+            try:
+                name, values = results.get(timeout=0.1)
+            except queue.Empty:
+                break
+            stats[name] = values
+        ring.close()
+        ring.unlink()
+    return stats
+
+
+def format_stats(stats):
+    """ Summary lines for the stats returned by run_pipeline() """
+    lines = []
+    capture, inference, output = (stats.get(k, {}) for k in ("capture", "inference", "output"))
+    if capture:
+        lines.append(f"Capture: {capture['frames']} frames")
+    if inference:
+        lines.append(f"Inference: {inference['frames']} frames, {inference['inferences']} model runs, "
+                     f"{inference['skipped_frames']} newer frames skipped, {inference['queue_full']} decisions dropped")
+        if "motion_gate" in inference:
+            gate = inference["motion_gate"]
+            lines.append(f"Motion gate: skipped {gate['skipped']}/{gate['frames']} frames "
+                         f"({100 * gate['skip_rate']:.1f}%), ~{gate['cpu_saved_s']:.1f}s inference saved")
+    if output:
+        fps = output["decisions"] / output["seconds"] if output["seconds"] else 0.0
+        lines.append(f"Output: {output['decisions']} decisions ({fps:.1f}/s), {output['alerts']} alerts")
+        latency = output["latency"]
+        if latency["count"]:
+            lines.append(f"Capture -> GPIO latency p50/p95/max: {latency['p50_ms']:.1f}/"
+                         f"{latency['p95_ms']:.1f}/{latency['max_ms']:.1f} ms")
+        lines.append(f"GPIO: {output['gpio']['writes']} pin writes, "
+                     f"{output['gpio']['redundant']} unchanged updates skipped")
+    return "\n".join(lines)
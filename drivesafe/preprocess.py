@@ -0,0 +1,81 @@
+"""
+Shared frame preprocessing: resize -> gray -> model input, into preallocated buffers.
+
+The classifier was trained on grayscale images replicated to 3 channels, so
+both front ends used to convert at full camera resolution and let the model
+wrapper resize again. Here the frame is resized straight to the network input
+size before any color work, and every intermediate lives in a buffer that is
+allocated once and reused, so steady-state preprocessing allocates nothing.
+
+CENTER_CROP is the one crop policy for the live loops and the tools: a model
+is trained, evaluated, quantized and run on the same centered square.
+"""
+import cv2
+import numpy as np
+
+# Output formats
+BGR = "bgr"              # HxWx3 uint8, gray replicated (for wrappers that expect a BGR image)
+GRAY = "gray"            # HxW uint8 (backends that take a single channel)
+BROADCAST = "broadcast"  # HxWx3 uint8 read-only view of the gray plane, zero copy
+TENSOR = "tensor"        # 1x3xHxW float32 in [0, 1], ready for the network
+
+_SCALE = np.float32(1.0 / 255.0)
+
+# Crop the centered square before resizing (Ultralytics classify does the same)
+# rather than squashing a 4:3 frame; everything preprocesses this way by default
+CENTER_CROP = True
+
+
+class Preprocessor:
+    """ Turns camera frames into model input. Reuses the same output buffer on every call """
+
+    def __init__(self, size=640, output=TENSOR, color_code=cv2.COLOR_BGR2GRAY,
+                 interpolation=cv2.INTER_LINEAR, center_crop=CENTER_CROP):
+        if output not in (BGR, GRAY, BROADCAST, TENSOR):
+            raise ValueError(f"Unknown preprocess output: {output}")
+        self.size = size
+        self.output = output
+        self.color_code = color_code
+        self.interpolation = interpolation
+        self.center_crop = center_crop
+
+        # Preallocated buffers
+        self._resized = np.empty((size, size, 3), dtype=np.uint8)
+        self._gray = np.empty((size, size), dtype=np.uint8)
+        self._bgr = np.empty((size, size, 3), dtype=np.uint8) if output == BGR else None
+        self._tensor = np.empty((1, 3, size, size), dtype=np.float32) if output == TENSOR else None
+
+    def __call__(self, frame):
+        """
+        Preprocess one frame. The returned array is owned by the preprocessor and
+        overwritten by the next call; copy it if it has to outlive the frame.
+        """
+        if self.center_crop:
+            h, w = frame.shape[:2]
+            side = min(h, w)
+            top, left = (h - side) // 2, (w - side) // 2
+            frame = frame[top:top + side, left:left + side]
+        if frame.ndim == 2:
+            cv2.resize(frame, (self.size, self.size), dst=self._gray, interpolation=self.interpolation)
+        else:
+            cv2.resize(frame, (self.size, self.size), dst=self._resized, interpolation=self.interpolation)
+            cv2.cvtColor(self._resized, self.color_code, dst=self._gray)
+
+        if self.output == GRAY:
+            return self._gray
+        if self.output == BROADCAST:
+            return np.broadcast_to(self._gray[:, :, None], (self.size, self.size, 3))
+        if self.output == BGR:
+            cv2.cvtColor(self._gray, cv2.COLOR_GRAY2BGR, dst=self._bgr)
+            return self._bgr
+
+        plane = self._tensor[0, 0]
+        np.copyto(plane, self._gray)
+        plane *= _SCALE
+        self._tensor[0, 1:] = plane
+        return self._tensor
+
+    @property
+    def gray(self):
+        """ Gray plane of the last preprocessed frame (model size) """
+        return self._gray
@@ -0,0 +1,192 @@
+"""
+On-demand MJPEG preview of the Pi monitor, served over local HTTP.
+
+In the car nobody watches the screen, so the monitor can run headless. This
+server lets a phone or laptop look in when needed, without costing anything
+the rest of the time. The loop asks wants_frame() once per frame; that is
+False unless a client is connected and the preview interval has passed.
+Only then does the loop draw the overlay and publish() the frame. JPEG
+encoding happens on the client's handler thread, once per published frame
+however many clients watch.
+
+    preview = PreviewServer(port=8090, max_fps=5).start()
+    if preview.wants_frame():
+        annotate(frame, decision, ALERT_SECONDS, box)
+        preview.publish(frame)      # frame must not be modified afterwards
+
+    open http://127.0.0.1:8090/    (or /stream, /frame.jpg)
+"""
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+
+from drivesafe.state_engine import ABSENT, AWAKE
+
+BOUNDARY = "frame"
+
+_PAGE = b"""<!doctype html>
+<title>Driver Monitor</title>
+<body style="margin:0;background:#111"><img src="/stream" style="width:100%"></body>
+"""
+
+
+# -------------------- Overlay --------------------
+def annotate(frame, decision, alert_seconds, box=None):
+    """ The Pi monitor's overlay: state, drowsiness timer and the face box (in place) """
+    if decision.state == ABSENT:
+        display_text, color = "Face not detected", (0, 0, 255)  # Red
+    elif decision.state == AWAKE:
+        display_text, color = "Awake", (0, 255, 0)  # Green
+    else:  # DROWSY_ALERT
+        display_text, color = "DROWSY - ALERT", (0, 0, 255)  # Red
+
+    if box is not None:
+        cv2.rectangle(frame, box[:2], box[2:], (255, 255, 0), 1)
+
+    cv2.putText(frame, f"State: {display_text}", (20, 40),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
+
+    cv2.putText(frame, f"Drowsy: {decision.drowsy_seconds:.1f}/{alert_seconds:.1f}s", (20, 110),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+    return frame
+
+
+# -------------------- Server --------------------
+class PreviewServer:
+    """ Latest published frame as multipart MJPEG, at most max_fps, only while watched """
+
+    def __init__(self, port=8090, host="127.0.0.1", max_fps=5.0, quality=70, clock=time.monotonic):
+        self.interval = 1.0 / max_fps
+        self.quality = quality
+        self.clock = clock
+        self._cond = threading.Condition()
+        self._encode_lock = threading.Lock()
+        self._frame = None
+        self._seq = 0
+        self._jpeg = None
+        self._jpeg_seq = -1
+        self._last_publish = float("-inf")
+        self._closed = False
+
+        # Counters (clients is read by the loop without the lock)
+        self.clients = 0
+        self.published = 0
+        self.encoded = 0
+        self.bytes_sent = 0
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path in ("/", "/index.html"):
+                    self._send(200, "text/html", _PAGE)
+                elif self.path == "/stream":
+                    self._stream()
+                elif self.path == "/frame.jpg":
+                    # The next frame published after the request, never an old one
+                    with server.watching() as seq:
+                        jpeg, _ = server.next_jpeg(seq, timeout=5.0)
+                    if jpeg is None:
+                        self.send_error(503, "No frame")
+                    else:
+                        self._send(200, "image/jpeg", jpeg)
+                else:
+                    self.send_error(404)
+
+            def _send(self, code, kind, body):
+                self.send_response(code)
+                self.send_header("Content-Type", kind)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                server.bytes_sent += len(body)
+
+            def _stream(self):
+                self.send_response(200)
+                self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={BOUNDARY}")
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                with server.watching() as seq:
+                    try:
+                        while True:
+                            jpeg, seq = server.next_jpeg(seq, timeout=1.0)
+                            if server._closed:
+                                return
+                            if jpeg is None:
+                                continue
+                            self.wfile.write(f"--{BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                                             f"Content-Length: {len(jpeg)}\r\n\r\n".encode())
+                            self.wfile.write(jpeg)
+                            self.wfile.write(b"\r\n")
+                            server.bytes_sent += len(jpeg)
+                    except (BrokenPipeError, ConnectionResetError):
+                        pass
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer((host, port), Handler)
+        self.httpd.daemon_threads = True
+        self.port = self.httpd.server_address[1]
+        self._thread = threading.Thread(target=self.httpd.serve_forever, name="preview", daemon=True)
+
+    # ---- loop side ----
+    def wants_frame(self):
+        """ True when someone is watching and the next preview frame is due; cheap enough for every frame """
+        return self.clients > 0 and self.clock() - self._last_publish >= self.interval
+
+    def publish(self, frame):
+        with self._cond:
+            self._frame = frame
+            self._seq += 1
+            self._last_publish = self.clock()
+            self.published += 1
+            self._cond.notify_all()
+
+    # ---- client side ----
+    @contextmanager
+    def watching(self):
+        """ Counts a client for as long as it is inside the block; yields the current frame number """
+        with self._cond:
+            self.clients += 1
+            seq = self._seq
+        try:
+            yield seq
+        finally:
+            with self._cond:
+                self.clients -= 1
+
+    def next_jpeg(self, after_seq, timeout):
+        """ JPEG of the first frame newer than after_seq, encoded once and shared; (None, after_seq) on timeout """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._seq > after_seq or self._closed, timeout):
+                return None, after_seq
+            if self._closed:
+                return None, after_seq
+        with self._encode_lock:
+            with self._cond:
+                frame, seq = self._frame, self._seq
+            if self._jpeg_seq != seq:
+                ok, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, self.quality])
+                if ok:
+                    self._jpeg, self._jpeg_seq = buffer.tobytes(), seq
+                    self.encoded += 1
+            return self._jpeg, self._jpeg_seq
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def stats(self):
+        return {"published": self.published, "encoded": self.encoded, "bytes_sent": self.bytes_sent,
+                "clients": self.clients}
@@ -0,0 +1,86 @@
+"""
+Low-overhead per-stage latency instrumentation.
+
+A frame is timed as a sequence of marks: begin() at the start, then
+mark("stage") after each stage records the time since the previous mark.
+Samples go into fixed-size rolling windows, and percentiles are only
+computed when a report is requested. When disabled, begin()/mark()/end()
+return immediately.
+"""
+import time
+
+import numpy as np
+
+# Stage names used by both front ends, in pipeline order
+STAGES = ("capture", "preprocess", "inference", "postprocess", "render")
+
+
+class RollingHistogram:
+    """ Keeps the last `window` samples (seconds) in a ring buffer """
+
+    def __init__(self, window=1000):
+        self._samples = np.zeros(window, dtype=np.float64)
+        self._index = 0
+        self.count = 0
+
+    def add(self, value):
+        self._samples[self._index] = value
+        self._index = (self._index + 1) % len(self._samples)
+        self.count += 1
+
+    def summary(self):
+        """ p50/p95/p99/mean/max in milliseconds over the current window """
+        samples = self._samples[:min(self.count, len(self._samples))]
+        if not len(samples):
+            return {"count": 0}
+        p50, p95, p99 = np.percentile(samples, (50, 95, 99))
+        return {
+            "count": self.count,
+            "p50_ms": 1000.0 * p50,
+            "p95_ms": 1000.0 * p95,
+            "p99_ms": 1000.0 * p99,
+            "mean_ms": 1000.0 * samples.mean(),
+            "max_ms": 1000.0 * samples.max(),
+        }
+
+
+class StageProfiler:
+    """ Per-stage latency histograms for one processing loop """
+
+    def __init__(self, enabled=False, stages=STAGES, window=1000, clock=time.perf_counter):
+        self.enabled = enabled
+        self.clock = clock
+        self.histograms = {stage: RollingHistogram(window) for stage in stages}
+        self.total = RollingHistogram(window)
+        self._frame_start = 0.0
+        self._last = 0.0
+
+    def begin(self):
+        if not self.enabled:
+            return
+        self._frame_start = self._last = self.clock()
+
+    def mark(self, stage):
+        if not self.enabled:
+            return
+        now = self.clock()
+        self.histograms[stage].add(now - self._last)
+        self._last = now
+
+    def end(self):
+        if not self.enabled:
+            return
+        self.total.add(self.clock() - self._frame_start)
+
+    def report(self):
+        """ Summary of every stage plus the whole frame, for printing or JSON """
+        report = {stage: h.summary() for stage, h in self.histograms.items()}
+        report["total"] = self.total.summary()
+        return report
+
+    def format_report(self):
+        lines = [f"{'stage':<12}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"]
+        for stage, s in self.report().items():
+            if s["count"]:
+                lines.append(f"{stage:<12}{s['count']:>8}{s['p50_ms']:>10.2f}{s['p95_ms']:>10.2f}{s['p99_ms']:>10.2f}")
+        return "\n".join(lines)
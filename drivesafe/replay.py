@@ -0,0 +1,166 @@
+"""
+Faster-than-real-time replay of recorded drives through the live loops.
+
+ReplayClock is a simulated monotonic clock: waiting (scheduler sleeps, a
+camera that has no new frame yet) costs nothing, while time spent computing
+counts at its real duration times cost_scale. A drive therefore replays as
+fast as the CPU allows, but a slower model or loop still shows up as later
+decisions. ReplaySource plays a video as the camera would deliver it on that
+clock. The loops take the clock wherever they would call time.monotonic().
+
+Ground truth comes from an events CSV, one drowsy episode per row (times in
+seconds from the start of the video). A row without times marks a video that
+has no drowsiness at all; videos not listed are not replayed.
+
+    name,start_s,end_s
+    001.mp4,12.5,19.0
+    001.mp4,41.0,47.5
+    002.mp4,,
+
+score() turns the alarm-on times of one replay into detections, alert
+latencies, missed events and false alarms (see tools/replay.py).
+"""
+import csv
+import os
+import time
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+
+
+class ReplayClock:
+    """
+    Simulated time. sleep() advances it instantly; computing advances it by
+    the real elapsed time times cost_scale (0 = free, 2 = a CPU half as fast).
+    """
+
+    def __init__(self, cost_scale=1.0, start=0.0):
+        self.cost_scale = cost_scale
+        self._offset = start
+        self._real = time.perf_counter()
+
+    def __call__(self):
+        return self._offset + (time.perf_counter() - self._real) * self.cost_scale
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            self._offset += seconds
+
+    @contextmanager
+    def paused(self):
+        """ Real time spent in the block does not count (decoding stands in for the camera) """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._real += time.perf_counter() - started
+
+
+class ReplaySource:
+    """
+    A recorded video as a live camera on a ReplayClock. read() returns the
+    frame the camera shows at clock(): frames that passed while the loop was
+    busy are dropped, and if the current one was already read it waits for the
+    next, as a camera read blocks. Returns (False, None) at the end.
+    """
+
+    def __init__(self, path, clock, size=None):
+        self.name = f"replay:{os.path.basename(path)}"
+        self.cap = cv2.VideoCapture(path)
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 30.0
+        native = (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        self.size = tuple(size) if size is not None else native
+        self._resize = self.size != native
+        self.clock = clock
+        self.start = clock()
+        self._index = -1          # last frame decoded
+        self._delivered = -1      # last frame returned by read()
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self.finished = False
+
+    @property
+    def seconds(self):
+        """ Seconds of video played so far (all of it once finished, whether or not the last frames were read) """
+        return (self._index + 1) / self.fps
+
+    def isOpened(self):
+        return self.cap.isOpened()
+
+    def read(self):
+        if self.finished:
+            return False, None
+        due = int((self.clock() - self.start) * self.fps)
+        if due <= self._delivered:
+            # Nothing new yet: block until the camera delivers the next frame
+            due = self._delivered + 1
+            self.clock.sleep(self.start + due / self.fps - self.clock())
+        with self.clock.paused():
+            while self._index < due - 1:
+                if not self.cap.grab():
+                    self.finished = True
+                    return False, None
+                self._index += 1
+            ret, frame = self.cap.read()
+            if not ret:
+                self.finished = True
+                return False, None
+            self._index += 1
+            if self._resize:
+                frame = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        self.frames_dropped += due - self._delivered - 1
+        self._delivered = due
+        self.frames_read += 1
+        return True, frame
+
+    def release(self):
+        self.cap.release()
+
+
+# -------------------- Ground truth and scoring --------------------
+def read_events(path):
+    """ events CSV -> {video name: [(start_s, end_s), ...]} (an empty list for a drowsiness-free video) """
+    events = {}
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        for row in csv.DictReader(f):
+            episodes = events.setdefault(row["name"].strip(), [])
+            if row.get("start_s", "").strip():
+                episodes.append((float(row["start_s"]), float(row["end_s"])))
+    for episodes in events.values():
+        episodes.sort()
+    return events
+
+
+def score(alarm_on_times, events, duration, grace=2.0):
+    """
+    Match alarm-on times (seconds into the video) against drowsy episodes.
+    An episode is detected by the first alarm between its start and end +
+    grace (latency = alarm - start); any other alarm is a false alarm.
+    """
+    detected, latencies, used = 0, [], set()
+    for start, end in events:
+        hits = [i for i, t in enumerate(alarm_on_times) if start <= t <= end + grace and i not in used]
+        if hits:
+            used.update(hits)
+            detected += 1
+            latencies.append(alarm_on_times[hits[0]] - start)
+    return {"events": len(events), "detected": detected, "missed": len(events) - detected,
+            "latencies_s": latencies, "false_alarms": len(alarm_on_times) - len(used),
+            "false_alarm_times_s": [t for i, t in enumerate(alarm_on_times) if i not in used],
+            "hours": duration / 3600.0}
+
+
+def summarize(scores):
+    """ Totals over the per-video results of score() """
+    latencies = np.array([t for s in scores for t in s["latencies_s"]])
+    hours = sum(s["hours"] for s in scores)
+    false_alarms = sum(s["false_alarms"] for s in scores)
+    summary = {"videos": len(scores), "events": sum(s["events"] for s in scores),
+               "detected": sum(s["detected"] for s in scores), "missed": sum(s["missed"] for s in scores),
+               "false_alarms": false_alarms, "hours": hours,
+               "false_alarms_per_hour": false_alarms / hours if hours else 0.0}
+    if len(latencies):
+        summary.update(latency_p50_s=float(np.percentile(latencies, 50)),
+                       latency_p95_s=float(np.percentile(latencies, 95)), latency_max_s=float(latencies.max()))
+    return summary
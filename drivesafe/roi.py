@@ -0,0 +1,170 @@
+"""
+Face region-of-interest stage: detect every N frames, track in between.
+
+Most of a cabin frame is seat, window and headliner. FaceROI finds the face
+with a cheap detector on a downscaled gray frame, follows it between
+detections with template matching, and returns a padded square box so only
+the crop around the face goes to the classifier (at a smaller input size).
+When no face can be found or tracked for `lost_after` frames in a row, it
+returns None and the caller reports the driver as absent.
+"""
+import cv2
+import numpy as np
+
+# What the classifier would say for an empty seat; used when the face is lost
+ABSENT_PROBS = np.array([1.0, 0.0, 0.0], dtype=np.float32)
+
+
+# -------------------- Face detectors --------------------
+class HaarFaceDetector:
+    """ OpenCV's frontal-face Haar cascade (ships with opencv-python 4.x) """
+
+    def __init__(self, cascade_path=None):
+        if not hasattr(cv2, "CascadeClassifier"):
+            raise RuntimeError("This OpenCV build has no CascadeClassifier; pass a YuNet model instead")
+        if cascade_path is None:
+            cascade_path = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+        self.cascade = cv2.CascadeClassifier(cascade_path)
+        if self.cascade.empty():
+            raise RuntimeError(f"Cannot load Haar cascade: {cascade_path}")
+
+    def detect(self, gray):
+        faces = self.cascade.detectMultiScale(gray, scaleFactor=1.15, minNeighbors=5, minSize=(30, 30))
+        return [tuple(int(v) for v in face) for face in faces]
+
+
+class YuNetFaceDetector:
+    """ OpenCV's YuNet CNN detector (cv2.FaceDetectorYN, needs the .onnx model file) """
+
+    def __init__(self, model_path, score_threshold=0.6):
+        self.detector = cv2.FaceDetectorYN.create(model_path, "", (320, 320), score_threshold)
+        self._size = None
+
+    def detect(self, gray):
+        h, w = gray.shape[:2]
+        if self._size != (w, h):
+            self.detector.setInputSize((w, h))
+            self._size = (w, h)
+        _, faces = self.detector.detect(cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR))
+        if faces is None:
+            return []
+        return [tuple(int(v) for v in face[:4]) for face in faces]
+
+
+def create_face_detector(model_path=None):
+    """ YuNet when a model file is given, otherwise the Haar cascade """
+    if model_path:
+        return YuNetFaceDetector(model_path)
+    return HaarFaceDetector()
+
+
+# -------------------- Detect + track --------------------
+class FaceROI:
+    """ Call update(frame) per frame; returns (x0, y0, x1, y1) of the face crop or None """
+
+    def __init__(self, detector=None, detect_every=10, padding=0.3, detect_width=320,
+                 track_threshold=0.6, lost_after=3):
+        self.detector = detector or create_face_detector()
+        # Run the detector at least every N frames, track in between
+        self.detect_every = detect_every
+        # Extra margin around the face box, as a fraction of its size on each side
+        self.padding = padding
+        # Detection and tracking run on a frame downscaled to this width
+        self.detect_width = detect_width
+        # Minimum normalized correlation for a tracking step to count
+        self.track_threshold = track_threshold
+        # Consecutive frames without a face before reporting it lost
+        self.lost_after = lost_after
+        self.reset()
+
+        # Stats
+        self.frames = 0
+        self.detections = 0
+        self.tracked = 0
+        self.lost = 0
+
+    def reset(self):
+        self._box = None
+        self._template = None
+        self._since_detect = 0
+        self._misses = 0
+
+    def update(self, frame):
+        self.frames += 1
+        scale = self.detect_width / frame.shape[1]
+        small = cv2.resize(frame, (self.detect_width, int(round(frame.shape[0] * scale))),
+                           interpolation=cv2.INTER_AREA)
+        if small.ndim == 3:
+            small = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+
+        box = None
+        if self._box is not None and self._since_detect < self.detect_every:
+            box = self._track(small)
+        if box is None:
+            box = self._detect(small)
+
+        if box is None:
+            self._misses += 1
+            if self._box is None or self._misses >= self.lost_after:
+                if self._box is not None:
+                    self.lost += 1
+                self.reset()
+                return None
+            # Hold the last box for a few frames rather than flickering to absent
+            box = self._box
+        else:
+            self._misses = 0
+
+        self._box = box
+        self._since_detect += 1
+        return self._crop_box(box, scale, frame.shape)
+
+    def crop(self, frame, box):
+        """ View of the frame inside box (no copy) """
+        x0, y0, x1, y1 = box
+        return frame[y0:y1, x0:x1]
+
+    def _detect(self, small):
+        faces = self.detector.detect(small)
+        if not faces:
+            return None
+        self.detections += 1
+        box = max(faces, key=lambda f: f[2] * f[3])
+        x, y, w, h = box
+        self._template = small[y:y + h, x:x + w].copy()
+        self._since_detect = 0
+        return box
+
+    def _track(self, small):
+        x, y, w, h = self._box
+        margin = max(w, h) // 2
+        sx0, sy0 = max(0, x - margin), max(0, y - margin)
+        sx1, sy1 = min(small.shape[1], x + w + margin), min(small.shape[0], y + h + margin)
+        search = small[sy0:sy1, sx0:sx1]
+        if search.shape[0] < h or search.shape[1] < w:
+            return None
+        result = cv2.matchTemplate(search, self._template, cv2.TM_CCOEFF_NORMED)
+        _, score, _, location = cv2.minMaxLoc(result)
+        if score < self.track_threshold:
+            return None
+        self.tracked += 1
+        return (sx0 + location[0], sy0 + location[1], w, h)
+
+    def _crop_box(self, box, scale, shape):
+        """ Padded square around the face, in full-frame pixels, clipped to the frame """
+        x, y, w, h = (v / scale for v in box)
+        side = max(w, h) * (1.0 + 2.0 * self.padding)
+        cx, cy = x + w / 2.0, y + h / 2.0
+        frame_h, frame_w = shape[:2]
+        side = min(side, frame_w, frame_h)
+        x0 = int(min(max(0.0, cx - side / 2.0), frame_w - side))
+        y0 = int(min(max(0.0, cy - side / 2.0), frame_h - side))
+        return x0, y0, x0 + int(side), y0 + int(side)
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "detections": self.detections,
+            "tracked": self.tracked,
+            "lost": self.lost,
+        }
@@ -0,0 +1,80 @@
+"""
+Deadline-based frame scheduler on a monotonic clock.
+
+Replaces spin-waiting on time.time(): the caller sleeps until the next frame
+deadline, and the scheduler keeps track of how late each wake-up was.
+"""
+import time
+
+# What to do when an iteration ran past one or more deadlines
+CATCH_UP = "catch-up"  # run the missed slots back-to-back until back on schedule
+SKIP = "skip"          # drop the missed slots and realign to the next one
+
+
+class FrameScheduler:
+    """ Paces a loop at a fixed rate: call wait() once at the top of every iteration """
+
+    def __init__(self, fps, policy=SKIP, max_catch_up=3, clock=time.monotonic, sleep=time.sleep):
+        if policy not in (CATCH_UP, SKIP):
+            raise ValueError(f"Unknown overrun policy: {policy}")
+        self.interval = 1.0 / fps
+        self.policy = policy
+        # With CATCH_UP, never owe more than this many slots (a long stall would otherwise cause a burst)
+        self.max_catch_up = max_catch_up
+        self.clock = clock
+        self.sleep = sleep
+        self.next_deadline = None
+
+        # Stats
+        self.frames = 0
+        self.overruns = 0      # iterations that arrived after their deadline
+        self.skipped = 0       # slots dropped by the SKIP policy
+        self.jitter_sum = 0.0  # seconds between deadline and actual wake-up
+        self.jitter_max = 0.0
+
+    def wait(self):
+        """ Sleep until the next deadline. Returns the number of slots skipped to get there """
+        now = self.clock()
+        if self.next_deadline is None:
+            self.next_deadline = now + self.interval
+            self.frames += 1
+            return 0
+
+        late = now - self.next_deadline
+        if late < 0:
+            self.sleep(-late)
+            now = self.clock()
+        elif late > 0:
+            self.overruns += 1
+
+        jitter = max(0.0, now - self.next_deadline)
+        self.jitter_sum += jitter
+        self.jitter_max = max(self.jitter_max, jitter)
+        self.frames += 1
+
+        # Advance to the following slot
+        missed = int(max(0.0, late) // self.interval)
+        if self.policy == SKIP:
+            self.skipped += missed
+            self.next_deadline += (missed + 1) * self.interval
+        else:
+            self.next_deadline += self.interval
+            if missed > self.max_catch_up:
+                self.next_deadline = now - self.max_catch_up * self.interval + self.interval
+        return missed if self.policy == SKIP else 0
+
+    def set_fps(self, fps):
+        """ Change the rate; takes effect from the next deadline """
+        self.interval = 1.0 / fps
+
+    def reset(self):
+        self.next_deadline = None
+
+    def stats(self):
+        return {
+            "frames": self.frames,
+            "overruns": self.overruns,
+            "skipped": self.skipped,
+            "jitter_mean_ms": 1000.0 * self.jitter_sum / max(1, self.frames - 1),
+            "jitter_max_ms": 1000.0 * self.jitter_max,
+        }
@@ -0,0 +1,242 @@
+"""
+One inference process for many camera streams, with dynamic cross-stream batching.
+
+Each stream owns a latest-frame slot (drivesafe.frame_buffer), its own
+drowsiness state engine and a bounded queue of decisions. A single batcher
+thread waits for the first stream to have a frame, keeps collecting until
+either max_batch streams are ready or max_wait seconds have passed, and then
+runs the model once for the whole batch.
+
+Backpressure is applied per stream on both sides, so one stream can never
+stall the others:
+
+- a producer faster than the server only overwrites its own slot (counted as
+  dropped), and a stream contributes at most one frame per batch;
+- a consumer that stops reading only loses its own oldest decisions; the
+  batcher never blocks on a queue.
+
+    server = InferenceServer(load_backend("auto", "best.pt"))
+    server.start()
+    cam = server.add_stream("cab-3")
+    cam.submit(frame)                  # from the capture thread
+    result = cam.get_decision(1.0)     # from the consumer thread
+"""
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+
+import numpy as np
+
+from drivesafe.frame_buffer import LatestFrameBuffer
+from drivesafe.preprocess import Preprocessor, GRAY
+from drivesafe.profiling import RollingHistogram
+from drivesafe.state_engine import DrowsinessStateEngine
+
+_SCALE = np.float32(1.0 / 255.0)
+
+StreamResult = namedtuple("StreamResult", [
+    "stream_id",
+    "timestamp",   # capture time of the frame (time.monotonic)
+    "latency",     # seconds from capture to decision
+    "batch_size",  # how many streams shared the model call
+    "decision",    # drivesafe.state_engine.Decision
+])
+
+
+class Stream:
+    """ Producer/consumer handle for one camera. Created by InferenceServer.add_stream() """
+
+    def __init__(self, server, stream_id, size, max_age, queue_size, engine):
+        self.id = stream_id
+        self.engine = engine
+        self._server = server
+        # Resize + gray happen on the producer's thread; the batcher only scales to float
+        self._preprocess = Preprocessor(size, output=GRAY)
+        self.buffer = LatestFrameBuffer(max_age=max_age)
+        self._results = deque(maxlen=queue_size)
+        self._results_cond = threading.Condition()
+        self.closed = False
+
+        # Counters
+        self.decisions = 0
+        self.results_dropped = 0  # decisions the consumer never picked up
+
+    def submit(self, frame, timestamp=None):
+        """ Hand a BGR frame to the server. Never blocks on inference """
+        if self.closed:
+            return
+        gray = self._preprocess(frame).copy()
+        self.buffer.put(gray, time.monotonic() if timestamp is None else timestamp)
+        self._server._mark_ready(self)
+
+    def get_decision(self, timeout=None):
+        """ Oldest undelivered StreamResult, or None on timeout / close """
+        with self._results_cond:
+            if not self._results and not self.closed:
+                self._results_cond.wait(timeout)
+            return self._results.popleft() if self._results else None
+
+    def close(self):
+        self._server.remove_stream(self.id)
+
+    def _deliver(self, result):
+        with self._results_cond:
+            if len(self._results) == self._results.maxlen:
+                self.results_dropped += 1
+            self._results.append(result)
+            self.decisions += 1
+            self._results_cond.notify()
+
+    def _shutdown(self):
+        self.closed = True
+        self.buffer.close()
+        with self._results_cond:
+            self._results_cond.notify_all()
+
+    def stats(self):
+        stats = self.buffer.stats()
+        stats.update(decisions=self.decisions, results_dropped=self.results_dropped)
+        return stats
+
+
+class InferenceServer:
+    """ Batches the newest frame of every ready stream into one model call """
+
+    def __init__(self, model, max_batch=8, max_wait=0.010, size=None, max_age=0.5,
+                 queue_size=32, engine_factory=DrowsinessStateEngine):
+        self.model = model
+        # Largest batch to form; the backend splits it further if it has to
+        self.max_batch = max_batch
+        # How long the first waiting frame may be held back to fill the batch (seconds)
+        self.max_wait = max_wait
+        self.size = size or model.input_size or 640
+        self.max_age = max_age
+        self.queue_size = queue_size
+        self.engine_factory = engine_factory
+
+        self._streams = {}
+        self._ready = OrderedDict()   # streams with an unread frame, oldest first
+        self._cond = threading.Condition()
+        self._thread = None
+        self.running = False
+
+        # Preallocated batch tensor, filled in place every round
+        self._batch = np.empty((max_batch, 3, self.size, self.size), dtype=np.float32)
+
+        # Counters
+        self.batches = 0
+        self.frames = 0
+        self.latency = RollingHistogram(5000)
+        self.batch_time = RollingHistogram(1000)
+        self._started_at = None
+        # Drop counts of streams that have already been removed
+        self._removed_frames_dropped = 0
+        self._removed_results_dropped = 0
+
+    # -------------------- Streams --------------------
+    def add_stream(self, stream_id):
+        with self._cond:
+            if stream_id in self._streams:
+                raise ValueError(f"Stream {stream_id!r} already exists")
+            stream = Stream(self, stream_id, self.size, self.max_age, self.queue_size, self.engine_factory())
+            self._streams[stream_id] = stream
+            return stream
+
+    def remove_stream(self, stream_id):
+        with self._cond:
+            stream = self._streams.pop(stream_id, None)
+            self._ready.pop(stream_id, None)
+        if stream is not None:
+            stream._shutdown()
+            self._removed_frames_dropped += stream.buffer.dropped + stream.buffer.stale
+            self._removed_results_dropped += stream.results_dropped
+
+    def streams(self):
+        with self._cond:
+            return list(self._streams.values())
+
+    def _mark_ready(self, stream):
+        with self._cond:
+            if stream.id in self._streams and stream.id not in self._ready:
+                self._ready[stream.id] = stream
+                self._cond.notify()
+
+    # -------------------- Batching loop --------------------
+    def start(self):
+        self.running = True
+        self._started_at = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="inference-server", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        with self._cond:
+            self.running = False
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+        for stream in self.streams():
+            self.remove_stream(stream.id)
+
+    def _collect(self):
+        """ Wait for the first ready stream, then up to max_wait for the batch to fill """
+        with self._cond:
+            while self.running and not self._ready:
+                self._cond.wait(0.1)
+            if not self.running:
+                return []
+            deadline = time.monotonic() + self.max_wait
+            while self.running and len(self._ready) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            taken = []
+            while self._ready and len(taken) < self.max_batch:
+                taken.append(self._ready.popitem(last=False)[1])
+            return taken
+
+    def _run(self):
+        while self.running:
+            ready = self._collect()
+            batch = []
+            for stream in ready:
+                # Non-blocking: may come back empty if the frame went stale while waiting
+                item = stream.buffer.get(timeout=0)
+                if item is not None:
+                    batch.append((stream, item[1], item[2]))
+            if not batch:
+                continue
+
+            started = time.perf_counter()
+            for i, (_, _, gray) in enumerate(batch):
+                plane = self._batch[i, 0]
+                np.copyto(plane, gray)
+                plane *= _SCALE
+                self._batch[i, 1:] = plane
+            probs = self.model.predict(self._batch[:len(batch)])
+            self.batch_time.add(time.perf_counter() - started)
+
+            now = time.monotonic()
+            for (stream, timestamp, _), p in zip(batch, probs):
+                decision = stream.engine.update(p, timestamp)
+                latency = now - timestamp
+                self.latency.add(latency)
+                stream._deliver(StreamResult(stream.id, timestamp, latency, len(batch), decision))
+            self.batches += 1
+            self.frames += len(batch)
+
+    # -------------------- Reporting --------------------
+    def stats(self):
+        elapsed = time.monotonic() - self._started_at if self._started_at else 0.0
+        streams = self.streams()
+        return {
+            "streams": len(streams),
+            "batches": self.batches,
+            "frames": self.frames,
+            "mean_batch": self.frames / self.batches if self.batches else 0.0,
+            "throughput_fps": self.frames / elapsed if elapsed else 0.0,
+            "latency": self.latency.summary(),
+            "batch_time": self.batch_time.summary(),
+            "frames_dropped": self._removed_frames_dropped + sum(s.buffer.dropped + s.buffer.stale for s in streams),
+            "results_dropped": self._removed_results_dropped + sum(s.results_dropped for s in streams),
+        }
@@ -0,0 +1,145 @@
+"""
+Fixed-size frame slots in shared memory, for passing camera frames between processes.
+
+One producer writes frames straight into a slot and publishes it. Each
+consumer (up to `consumers`) pins the newest slot, reads it in place and
+releases it. Frames are never pickled or copied by the ring itself. Slots
+are triple-buffered per consumer: the producer only ever writes a slot that
+is neither the newest nor pinned, so a reader never sees a frame change
+under it. A slow reader simply skips frames; it always gets the latest.
+
+Only the small header (newest slot, sequence number, pins) is guarded by
+a multiprocessing Condition, which is also what consumers wait on for the
+next frame.
+
+    ring = SharedFrameRing((240, 320, 3), slots=4, consumers=2)
+    # producer process
+    slot = ring.claim()
+    np.copyto(ring.frames[slot], frame)
+    ring.publish(slot, captured_at)
+    # consumer process
+    item = ring.acquire(consumer=0, after_seq=last_seq, timeout=0.5)
+    if item is not None:
+        seq, captured_at, frame = item   # a view into shared memory
+        ...                              # use it, then
+        ring.release(0)
+"""
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+
+def _align(n, to=64):
+    return (n + to - 1) // to * to
+
+
+def _attach(name):
+    try:
+        # Python 3.13+: an attaching process must not unlink the segment when it exits
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+class SharedFrameRing:
+    """ Latest-frame handoff from one producer to a few consumers through shared memory """
+
+    def __init__(self, shape, slots=4, consumers=1, dtype=np.uint8, ctx=multiprocessing):
+        if slots < consumers + 2:
+            raise ValueError(f"{consumers} consumer(s) need at least {consumers + 2} slots")
+        self.shape = tuple(shape)
+        self.slots = slots
+        self.consumers = consumers
+        self.dtype = np.dtype(dtype)
+        self._cond = ctx.Condition()
+        self._shm = shared_memory.SharedMemory(create=True, size=self._layout())
+        self._owner = True
+        self._map()
+        self._header[:] = -1
+        self._header[1] = 0      # nothing published yet
+        self._times[:] = 0.0
+
+    # Header (int64): newest slot, newest seq, one pinned slot per consumer, seq per slot
+    def _layout(self):
+        self._header_len = 2 + self.consumers + self.slots
+        self._frames_offset = _align(8 * self._header_len + 8 * self.slots)
+        return self._frames_offset + self.slots * int(np.prod(self.shape)) * self.dtype.itemsize
+
+    def _map(self):
+        buf = self._shm.buf
+        self._header = np.ndarray((self._header_len,), np.int64, buf, 0)
+        self._pinned = self._header[2:2 + self.consumers]
+        self._slot_seq = self._header[2 + self.consumers:]
+        self._times = np.ndarray((self.slots,), np.float64, buf, 8 * self._header_len)
+        self.frames = np.ndarray((self.slots, *self.shape), self.dtype, buf, self._frames_offset)
+
+    # Passed to child processes by name; the Condition travels with Process arguments
+    def __getstate__(self):
+        return {"name": self._shm.name, "shape": self.shape, "slots": self.slots,
+                "consumers": self.consumers, "dtype": self.dtype.str, "cond": self._cond}
+
+    def __setstate__(self, state):
+        self.shape, self.slots, self.consumers = state["shape"], state["slots"], state["consumers"]
+        self.dtype = np.dtype(state["dtype"])
+        self._cond = state["cond"]
+        self._shm = _attach(state["name"])
+        self._owner = False
+        self._layout()
+        self._map()
+
+    @property
+    def name(self):
+        return self._shm.name
+
+    # ---- producer ----
+    def claim(self):
+        """ Index of a slot that is safe to overwrite: not the newest, not pinned, oldest first """
+        with self._cond:
+            busy = {int(self._header[0]), *self._pinned.tolist()}
+            free = [slot for slot in range(self.slots) if slot not in busy]
+            return min(free, key=lambda slot: self._slot_seq[slot])
+
+    def publish(self, slot, timestamp):
+        """ Make frames[slot] the newest frame and wake the consumers; returns its sequence number """
+        with self._cond:
+            seq = int(self._header[1]) + 1
+            self._slot_seq[slot] = seq
+            self._times[slot] = timestamp
+            self._header[0] = slot
+            self._header[1] = seq
+            self._cond.notify_all()
+        return seq
+
+    # ---- consumers ----
+    def acquire(self, consumer, after_seq=0, timeout=None):
+        """
+        Pin the newest frame once it is newer than after_seq. Returns
+        (seq, timestamp, frame view), or None on timeout. The view stays valid
+        until release(consumer).
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._header[1] > after_seq, timeout):
+                return None
+            slot = int(self._header[0])
+            self._pinned[consumer] = slot
+            return int(self._header[1]), float(self._times[slot]), self.frames[slot]
+
+    def release(self, consumer):
+        with self._cond:
+            self._pinned[consumer] = -1
+
+    def latest_seq(self):
+        with self._cond:
+            return int(self._header[1])
+
+    # ---- cleanup ----
+    def close(self):
+        """ Unmap in this process (views handed out by acquire() must be dropped first) """
+        self._header = self._pinned = self._slot_seq = self._times = self.frames = None
+        self._shm.close()
+
+    def unlink(self):
+        """ Free the segment; called once, by the process that created the ring """
+        if self._owner:
+            self._shm.unlink()
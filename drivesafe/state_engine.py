@@ -0,0 +1,105 @@
+"""
+Time-based drowsiness state machine shared by the desktop app and the Pi monitor.
+
+Both front ends used to count consecutive "drowsy" frames, so the real alert
+delay depended on whatever frame rate the machine reached. This engine works
+on timestamps and the full probability vector instead:
+
+- probabilities are smoothed with an exponential moving average whose time
+  constant is in seconds, so smoothing is identical at 5 or 30 fps;
+- drowsiness switches on when drowsy is the most likely smoothed class
+  (or, if `on_threshold` is given, once its probability reaches it) and off
+  only when drowsy is no longer the most likely class and its probability
+  has fallen below `off_threshold` (hysteresis), so a single misclassified
+  frame does not reset the timer;
+- the alarm fires once drowsiness has been continuously on for `alert_after`
+  seconds of wall-clock time, however many frames arrived (or were dropped)
+  in between.
+"""
+import math
+from collections import namedtuple
+
+import numpy as np
+
+from drivesafe import LABELS
+
+# Displayed states (same meaning in both front ends)
+ABSENT = "ABSENT"
+AWAKE = "AWAKE"
+DROWSY_ALERT = "DROWSY_ALERT"
+
+_ABSENT, _AWAKE, _DROWSY = 0, 1, 2
+
+# Seconds of continuous drowsiness before the alarm, in both front ends
+ALERT_SECONDS = 1.0
+
+Decision = namedtuple("Decision", [
+    "label",           # smoothed class name: absent / awake / drowsy
+    "state",           # ABSENT, AWAKE or DROWSY_ALERT
+    "alarm",           # True while the alarm should sound
+    "drowsy_seconds",  # how long drowsiness has been continuously on
+    "probs",           # smoothed probabilities
+])
+
+
+class DrowsinessStateEngine:
+    """ Feed it (probs, timestamp) for every decision; it returns a Decision """
+
+    def __init__(self, alert_after=ALERT_SECONDS, smoothing=0.2, on_threshold=None, off_threshold=0.4, max_gap=1.0):
+        if on_threshold is not None and off_threshold > on_threshold:
+            raise ValueError("off_threshold must not be above on_threshold")
+        # Seconds of continuous drowsiness before the alarm
+        self.alert_after = alert_after
+        # EMA time constant in seconds (0 disables smoothing)
+        self.smoothing = smoothing
+        # None: on as soon as drowsy is the top class, however close the call
+        self.on_threshold = on_threshold
+        self.off_threshold = off_threshold
+        # After a gap longer than this (seconds) the average restarts from the new frame
+        self.max_gap = max_gap
+        self.reset()
+
+    def reset(self):
+        self.probs = None
+        self.last_timestamp = None
+        self.drowsy_since = None
+        self.alarm = False
+
+    def update(self, probs, timestamp):
+        probs = np.asarray(probs, dtype=np.float32)
+        if self.probs is None or timestamp - self.last_timestamp > self.max_gap:
+            # Nothing is known about the gap: drowsiness has to build up again
+            self.probs = probs.copy()
+            self.drowsy_since = None
+            self.alarm = False
+        else:
+            dt = max(0.0, timestamp - self.last_timestamp)
+            alpha = 1.0 if self.smoothing <= 0 else 1.0 - math.exp(-dt / self.smoothing)
+            self.probs += alpha * (probs - self.probs)
+        self.last_timestamp = timestamp
+
+        # Hysteresis on the drowsy probability
+        p_drowsy = float(self.probs[_DROWSY])
+        top_drowsy = int(self.probs.argmax()) == _DROWSY
+        turn_on = top_drowsy if self.on_threshold is None else p_drowsy >= self.on_threshold
+        if self.drowsy_since is None and turn_on:
+            self.drowsy_since = timestamp
+        elif not top_drowsy and p_drowsy < self.off_threshold:
+            self.drowsy_since = None
+
+        drowsy_seconds = 0.0 if self.drowsy_since is None else timestamp - self.drowsy_since
+        self.alarm = self.drowsy_since is not None and drowsy_seconds >= self.alert_after
+
+        if self.drowsy_since is not None:
+            label = LABELS[_DROWSY]
+        else:
+            label = LABELS[int(self.probs.argmax())]
+
+        if self.alarm:
+            state = DROWSY_ALERT
+        elif label == LABELS[_ABSENT]:
+            state = ABSENT
+        else:
+            # Awake, or drowsy but not for long enough yet
+            state = AWAKE
+        return Decision(label, state, self.alarm, drowsy_seconds, self.probs.copy())
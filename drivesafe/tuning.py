@@ -0,0 +1,112 @@
+"""
+Per-device tuning profile: which model, backend, input size and thread count to run.
+
+tools/autotune.py measures every combination on the device and saves the
+fastest one that still agrees with the reference model. Both front ends load
+the profile at startup and use it for any of those options not given on the
+command line. A profile measured on a different kind of device (CPU
+architecture or core count) is ignored rather than trusted.
+
+Standard library only, so the desktop app can read it before cv2 and the
+inference runtime are imported.
+
+    tuning = load_tuning()                     # None when there is no usable profile
+    apply_tuning(args, tuning, backend="ncnn", model="best_ncnn_model", threads=4)
+    preprocess = Preprocessor(input_size_for(model, args.imgsz))
+"""
+import json
+import os
+import platform
+import time
+
+VERSION = 1
+DEFAULT_PATH = os.environ.get("DRIVESAFE_TUNING") or os.path.join(
+    os.path.expanduser("~"), ".config", "drivesafe", "tuning.json")
+# The tuned backend, model and input size only make sense together
+MODEL_FIELDS = ("backend", "model", "imgsz")
+
+
+def device_info():
+    """ What a profile is valid for: a profile from another CPU says nothing about this one """
+    return {"system": platform.system(), "machine": platform.machine(), "cpus": os.cpu_count()}
+
+
+def save_tuning(path, tuning):
+    """ Write a profile (the chosen settings plus measurements) and stamp it with this device """
+    tuning = dict(tuning, version=VERSION, device=device_info(), created=time.strftime("%Y-%m-%dT%H:%M:%S"))
+    folder = os.path.dirname(os.path.abspath(path))
+    os.makedirs(folder, exist_ok=True)
+    temp = path + ".tmp"
+    with open(temp, "w") as f:
+        json.dump(tuning, f, indent=2)
+    # Replace atomically so a front end starting meanwhile never reads half a file
+    os.replace(temp, path)
+    return tuning
+
+
+def load_tuning(path=DEFAULT_PATH):
+    """ The profile at path, or None (with a note printed) if it is missing, stale or for another device """
+    try:
+        with open(path) as f:
+            tuning = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"Ignoring tuning profile {path}: {e}")
+        return None
+    if tuning.get("version") != VERSION:
+        print(f"Ignoring tuning profile {path}: version {tuning.get('version')} (expected {VERSION})")
+        return None
+    if tuning.get("device") != device_info():
+        print(f"Ignoring tuning profile {path}: measured on {tuning.get('device')}, this is {device_info()}")
+        return None
+    if not os.path.exists(tuning["model"]):
+        print(f"Ignoring tuning profile {path}: model {tuning['model']} not found")
+        return None
+    tuning["path"] = path
+    return tuning
+
+
+def apply_tuning(args, tuning, **defaults):
+    """
+    Fill the options an argparse namespace left as None: from the profile
+    first, then from `defaults`. If --backend, --model or the input size
+    names something other than what was tuned, only the tuned thread count is
+    used. Returns the names of the options taken from the profile.
+    """
+    used = []
+    if tuning is not None:
+        fields = list(MODEL_FIELDS)
+        for key in MODEL_FIELDS:
+            value = getattr(args, key, None)
+            if key == "model" and value is not None:
+                value = os.path.abspath(value)
+            if value is not None and value != tuning[key]:
+                fields = []
+                break
+        for key in fields + ["threads"]:
+            if getattr(args, key, None) is None:
+                setattr(args, key, tuning[key])
+                used.append(key)
+    for key, value in defaults.items():
+        if getattr(args, key, None) is None:
+            setattr(args, key, value)
+    return used
+
+
+def format_tuning(tuning, used):
+    """ One line for the startup log """
+    if tuning is None or not used:
+        return "Tuning: none (defaults and command line only)"
+    settings = ", ".join(f"{key}={tuning[key]}" for key in used)
+    return f"Tuning: {settings} from {tuning['path']} ({tuning['latency_ms']['p50']:.1f} ms/frame when measured)"
+
+
+def input_size_for(model, imgsz=None, default=640):
+    """
+    Model input size: the tuned imgsz when the model accepts any size,
+    otherwise the size the model records, otherwise imgsz or default.
+    """
+    if imgsz and model.dynamic_size:
+        return imgsz
+    return model.input_size or imgsz or default
@@ -1,160 +1,238 @@
 # import libraries
+import os
+import sys
+import argparse
+import json
+import traceback
 import cv2
 import time
-from picamera2 import Picamera2
-from gpiozero import LED, Buzzer
-from ultralytics import YOLO
 
+# Make the shared drivesafe package importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drivesafe.scheduler import FrameScheduler, SKIP
+from drivesafe.preprocess import Preprocessor
+from drivesafe.motion_gate import MotionGate, AdaptiveRate
+from drivesafe.profiling import StageProfiler
+from drivesafe.backends import BACKENDS, load_backend, export_input_size
+from drivesafe.state_engine import DrowsinessStateEngine, ALERT_SECONDS
+from drivesafe.roi import FaceROI, create_face_detector, ABSENT_PROBS
+from drivesafe.event_log import EventLog
+from drivesafe.metrics import LiveMetrics, MetricsServer
+from drivesafe.clip_recorder import ClipRecorder, JPEG, DOWNSCALE
+from drivesafe.actuators import ActuatorController, MockBackend, create_backend
+from drivesafe.decision_outputs import DecisionOutputs
+from drivesafe.preview import PreviewServer, annotate
+from drivesafe.capture import open_capture, capture_size_for, parse_size
+from drivesafe.replay import ReplayClock, ReplaySource
+from drivesafe.tuning import DEFAULT_PATH as TUNING_PATH, load_tuning, apply_tuning, format_tuning, input_size_for
 
-# GPIO SETUP
-green_led = LED(17)  
-red_led = LED(27)   
-buzzer = Buzzer(22)  
+# COMMAND LINE OPTIONS
+parser = argparse.ArgumentParser(description="Driver drowsiness monitor (Raspberry Pi)")
+parser.add_argument("--profile", action="store_true", help="Print per-stage latency percentiles on exit")
+parser.add_argument("--backend", choices=["auto", *BACKENDS], help="Inference backend (default: tuned, else ncnn)")
+parser.add_argument("--model", help="Model file or folder: .pt, NCNN folder, .onnx (default: tuned, else best_ncnn_model)")
+parser.add_argument("--threads", type=int, help="Inference threads (default: tuned, else 4)")
+parser.add_argument("--tuning", default=TUNING_PATH, help="Tuning profile written by tools/autotune.py")
+parser.add_argument("--no-tuning", action="store_true", help="Ignore the tuning profile")
+parser.add_argument("--roi", action="store_true", help="Classify a tracked face crop instead of the full frame")
+parser.add_argument("--roi-imgsz", type=int, default=320, help="Model input size for the face crop")
+parser.add_argument("--face-model", help="YuNet .onnx face detector (default: Haar cascade)")
+parser.add_argument("--event-log", metavar="DIR", help="Log every decision to a memory-mapped binary log in DIR")
+parser.add_argument("--metrics-port", type=int, help="Serve live metrics on http://127.0.0.1:PORT/metrics")
+parser.add_argument("--clips", metavar="DIR", help="Save a clip around every alarm to DIR")
+parser.add_argument("--clip-mode", default=JPEG, choices=[JPEG, DOWNSCALE], help="How the pre-event ring stores frames")
+parser.add_argument("--gpio", default="gpiozero", choices=["auto", "gpiozero", "mock"],
+                    help="LED/buzzer backend (mock: no hardware, transitions kept in memory)")
+parser.add_argument("--source", default="picamera2",
+                    help="picamera2 (low-res stream), picamera2:main, a camera index, a video file or synthetic")
+parser.add_argument("--capture-size", type=parse_size, metavar="WxH",
+                    help="Frame size to ask the camera for (default: the standard size nearest the model input)")
+parser.add_argument("--headless", action="store_true", help="No window and no drawing (stop with Ctrl+C)")
+parser.add_argument("--preview-port", type=int, help="MJPEG preview on http://HOST:PORT/, drawn only while watched")
+parser.add_argument("--preview-host", default="127.0.0.1", help="Preview address (0.0.0.0 to watch from another device)")
+parser.add_argument("--preview-fps", type=float, default=5.0, help="Preview frame rate cap")
+parser.add_argument("--processes", action="store_true",
+                    help="Run capture, inference and output in separate processes (frames over shared memory)")
+parser.add_argument("--replay", metavar="OUT.json",
+                    help="Play the --source video on a simulated clock as fast as possible, with mock GPIO, "
+                         "and write the LED/buzzer transitions to OUT.json (see tools/replay.py)")
+parser.add_argument("--replay-cost-scale", type=float, default=1.0,
+                    help="Replay: simulated seconds per second of computing (0 = free, 2 = a CPU half as fast)")
+args = parser.parse_args()
 
-# Turn off all devices initially
-for device in [green_led, red_led, buzzer]:
-    device.off()
+# TUNING PROFILE: what tools/autotune.py measured as fastest on this device, for options not given above
+tuning = None if args.no_tuning else load_tuning(args.tuning)
+tuned = apply_tuning(args, tuning, backend="ncnn", model="best_ncnn_model", threads=4, imgsz=None)
+print(format_tuning(tuning, tuned))
 
-# LOAD MODEL
-model = YOLO("best_ncnn_model", task="classify")
+# CLOCK: real time, or simulated time when replaying (waits cost nothing, computing counts)
+clock, sleep = time.monotonic, time.sleep
+if args.replay:
+    if args.processes:
+        parser.error("--replay runs the single-process loop")
+    clock = ReplayClock(args.replay_cost_scale)
+    sleep = clock.sleep
 
 # PARAMETERS
 FPS = 10
-FRAME_INTERVAL = 1.0 / FPS
+# When a frame overruns its budget: SKIP realigns to the next slot, CATCH_UP runs the missed ones
+OVERRUN_POLICY = SKIP
+# Drop to MIN_FPS while the driver is steadily awake/absent, back to FPS when drowsiness builds
+MIN_FPS = 3
+# Reuse the last prediction while the scene is unchanged (forced refresh every 0.25 s)
+MOTION_GATE = True
+
+IMGSZ = 640  # model input size, if the export does not record it
+
+# Seconds of continuous drowsiness before the buzzer: ALERT_SECONDS from drivesafe/state_engine.py,
+# shared with the desktop app (independent of the frame rate)
+# Buzzer while alarmed: None = steady tone, (on_s, off_s) = beep
+BUZZER_PATTERN = None
 
-DROWSY_THRESHOLD = 10
-drowsy_counter = 0
+# MULTI-PROCESS MODE: same loop split over three processes (see drivesafe/pipeline.py)
+if args.processes:
+    from drivesafe.pipeline import run_pipeline, format_stats
 
-labels = {
-    0: "absent",
-    1: "awake",
-    2: "drowsy"
-}
+    capture_size = args.capture_size or ((640, 480) if args.roi else
+                                         capture_size_for(args.imgsz or export_input_size(args.model) or IMGSZ))
+    stats = run_pipeline({
+        "source": args.source, "capture_size": capture_size,
+        "backend": args.backend, "model": args.model, "threads": args.threads, "imgsz": IMGSZ, "input_size": args.imgsz,
+        "fps": FPS, "min_fps": MIN_FPS, "overrun_policy": OVERRUN_POLICY, "motion_gate": MOTION_GATE,
+        "roi": args.roi, "roi_imgsz": args.roi_imgsz, "face_model": args.face_model,
+        "alert_seconds": ALERT_SECONDS, "gpio": args.gpio, "buzzer_pattern": BUZZER_PATTERN,
+        "headless": args.headless, "preview_port": args.preview_port, "preview_host": args.preview_host,
+        "preview_fps": args.preview_fps, "event_log": args.event_log, "metrics_port": args.metrics_port,
+        "clips": args.clips, "clip_mode": args.clip_mode,
+    })
+    print(format_stats(stats))
+    sys.exit(0 if not any(stats["exitcodes"].values()) else 1)
 
-# State tracking variables for printing
-previous_displayed_state = None  # Last displayed state
+# GPIO SETUP (all off initially; pins are only written when an output changes)
+outputs = ActuatorController(MockBackend(clock) if args.replay else create_backend(args.gpio))
+
+# LOAD MODEL
+model = load_backend(args.backend, args.model, threads=args.threads)
+
+# State tracking for clip triggers
 alarm_was_on = False   # Was alarm active before?
 
-# CAMERA SETUP
-picam2 = Picamera2()
-config = picam2.create_preview_configuration(
-    main={"size": (640, 480), "format": "RGB888"}
-)
-picam2.configure(config)
-picam2.start()
-time.sleep(2)  # Let camera stabilize
+# CAMERA SETUP: the camera delivers frames near the model size, so the CPU resizes very little.
+# ROI mode keeps 640x480 so the face crop has enough pixels.
+input_size = input_size_for(model, args.imgsz, IMGSZ)
+capture_size = args.capture_size or ((640, 480) if args.roi else capture_size_for(input_size))
+# A video file plays once, then the monitor stops
+if args.replay:
+    camera = ReplaySource(args.source, clock, size=capture_size)
+else:
+    camera = open_capture(args.source, size=capture_size, fps=FPS, loop=False)
+if not camera.isOpened():
+    raise SystemExit(f"Cannot open capture source: {args.source}")
+print(f"Capture: {camera.name} at {camera.size[0]}x{camera.size[1]}")
 
-last_time = time.time()
+scheduler = FrameScheduler(FPS, policy=OVERRUN_POLICY, clock=clock, sleep=sleep)
+# Center crop -> resize -> gray -> model tensor, reusing the same buffers every frame
+preprocess = Preprocessor(input_size)
+# Optional face ROI: detect every few frames, track in between, classify only the crop
+roi = FaceROI(create_face_detector(args.face_model)) if args.roi else None
+if roi is not None:
+    preprocess = Preprocessor(args.roi_imgsz if model.dynamic_size else model.input_size)
+box = None
+motion_gate = MotionGate(clock=clock) if MOTION_GATE else None
+adaptive_rate = AdaptiveRate(min_fps=MIN_FPS, max_fps=FPS)
+state_engine = DrowsinessStateEngine(alert_after=ALERT_SECONDS)
+probs = None
+# Per-stage latency histograms (no-op unless --profile)
+profiler = StageProfiler(args.profile)
+# Per-frame decision log and live counters (both optional)
+event_log = EventLog(args.event_log) if args.event_log else None
+metrics = LiveMetrics() if args.metrics_port else None
+metrics_server = MetricsServer(metrics, args.metrics_port).start() if metrics is not None else None
+# Every decision -> LEDs/buzzer, event log, metrics and a console line on state changes
+decision_outputs = DecisionOutputs(outputs, BUZZER_PATTERN, event_log=event_log, metrics=metrics)
+frame_no = 0
+# Last few seconds of frames, written out in the background when the alarm goes on
+clip_recorder = ClipRecorder(args.clips, mode=args.clip_mode).start() if args.clips else None
+# Preview for a phone/laptop; costs nothing while no one is connected
+preview = None
+if args.preview_port:
+    preview = PreviewServer(args.preview_port, host=args.preview_host, max_fps=args.preview_fps).start()
+    print(f"Preview: http://{args.preview_host}:{preview.port}/")
+show_window = not args.headless
 
 # MAIN LOOP
+failed = False
+loop_started = time.perf_counter()
 try:
     while True:
-        current_time = time.time()
-        
-        # Control FPS
-        if current_time - last_time < FRAME_INTERVAL:
-            continue
-        last_time = current_time
+        # Control FPS: sleep until the next frame deadline
+        scheduler.wait()
+        profiler.begin()
 
-        frame = picam2.capture_array()
+        ret, frame = camera.read()
+        if not ret:
+            print("End of capture source")
+            break
+        profiler.mark("capture")
 
-        # YOLO INFERENCE
-        frame_resized = cv2.resize(frame, (224, 224))
+        # YOLO INFERENCE (skipped while the scene is unchanged)
+        if roi is None:
+            model_input = preprocess(frame)
+        else:
+            box = roi.update(frame)
+            model_input = None if box is None else preprocess(roi.crop(frame, box))
+        profiler.mark("preprocess")
+        inference_seconds = None
+        if model_input is None:
+            # Face lost: report absent without running the model
+            probs = ABSENT_PROBS
+            if motion_gate is not None:
+                motion_gate.reset()
+        elif motion_gate is None or motion_gate.should_infer(preprocess.gray):
+            started = clock()
+            probs = model.predict(model_input)[0]
+            inference_seconds = clock() - started
+            if motion_gate is not None:
+                motion_gate.record_inference(inference_seconds)
 
-        frame_gray = cv2.cvtColor(frame_resized, cv2.COLOR_BGR2GRAY)
-        frame_3ch = cv2.cvtColor(frame_gray, cv2.COLOR_GRAY2BGR)
-        results = model(frame_3ch, verbose=False)
+        profiler.mark("inference")
 
-        
-        cls_id = int(results[0].probs.top1)
-        label = labels.get(cls_id, "unknown")
+        # DROWSINESS STATE (smoothed, time-based; same engine as the GUI)
+        decision = state_engine.update(probs, clock())
+        alarm_is_active = decision.alarm
+        scheduler.set_fps(adaptive_rate.update(decision.label, decision.drowsy_seconds))
+        profiler.mark("postprocess")
 
-        # DROWSY COUNTER LOGIC
-        if label == "drowsy":
-            drowsy_counter += 1
-        else:
-            drowsy_counter = 0
-
-        # Determine displayed state (same logic as GUI)
-        alarm_is_active = (drowsy_counter >= DROWSY_THRESHOLD)
-        
-        if label == "absent":
-            displayed_state = "ABSENT"
-        elif label == "awake":
-            displayed_state = "AWAKE"
-        elif label == "drowsy" and alarm_is_active:
-            displayed_state = "DROWSY_ALERT"
-        else:  # drowsy before threshold
-            displayed_state = "AWAKE"
-
-        # GPIO CONTROL (same logic as GUI)
-        if label == "absent":
-            # Red LED - Face not detected
-            red_led.on()
-            green_led.off()
-            buzzer.off()
-            
-        elif label == "awake":
-            # Green LED - Driver awake
-            green_led.on()
-            red_led.off()
-            buzzer.off()
-            
-        elif label == "drowsy":
-            # Green LED - Face present (even if drowsy)
-            green_led.on()
-            red_led.off()
-            
-            # Buzzer only when threshold is reached
-            if alarm_is_active:
-                buzzer.on()
-            else:
-                buzzer.off()
-
-      
-        # Print only when displayed state changes
-       
-        if displayed_state != previous_displayed_state:
-            timestamp = time.strftime("%H:%M:%S")
-            
-            if displayed_state == "ABSENT":
-                print(f"[{timestamp}] Face not detected")
-            
-            elif displayed_state == "AWAKE":
-                print(f"[{timestamp}] Awake")
-            
-            elif displayed_state == "DROWSY_ALERT":
-                print(f"[{timestamp}] DROWSY - ALERT!")
-                print("=" * 50)
-            
-            previous_displayed_state = displayed_state
+        # GPIO CONTROL, EVENT LOG, METRICS AND CONSOLE (shared with the --processes output process)
+        decision_outputs.publish(decision, frame_no, probs, inference_seconds)
+        frame_no += 1
 
        
-        # DISPLAY
+        # DISPLAY (headless: nothing is drawn unless a preview client is due a frame)
        
-        # Determine text color based on displayed state
-        if displayed_state == "ABSENT":
-            display_text = "Face not detected"
-            color = (0, 0, 255)  # Red
-        elif displayed_state == "AWAKE":
-            display_text = "Awake"
-            color = (0, 255, 0)  # Green
-        else:  # DROWSY_ALERT
-            display_text = "DROWSY - ALERT"
-            color = (0, 0, 255)  # Red
-        
-        alarm_status = "ON" if alarm_is_active else "OFF"
-        
-        cv2.putText(frame, f"State: {display_text}", (20, 40),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, color, 2)
-
-        cv2.putText(frame, f"Counter: {drowsy_counter}/{DROWSY_THRESHOLD}", (20, 110),
-                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
-
-
-        cv2.imshow("Driver Monitor", frame)
-
-        if cv2.waitKey(1) & 0xFF == 27:  # ESC
+        send_preview = preview is not None and preview.wants_frame()
+        if show_window or send_preview:
+            annotate(frame, decision, ALERT_SECONDS, box)
+
+        if clip_recorder is not None:
+            # Annotated frame (raw when headless); it is not touched again after this point
+            clip_recorder.push(frame, clock())
+            if alarm_is_active and not alarm_was_on:
+                clip_recorder.trigger(clock())
+        alarm_was_on = alarm_is_active
+
+        if send_preview:
+            preview.publish(frame)
+
+        key = None
+        if show_window:
+            cv2.imshow("Driver Monitor", frame)
+            key = cv2.waitKey(1) & 0xFF
+        # GPIO, console and display all count as render/actuate
+        profiler.mark("render")
+        profiler.end()
+
+        if key == 27:  # ESC
             break
 
 except KeyboardInterrupt:
@@ -162,15 +240,65 @@ except KeyboardInterrupt:
     print("System stopped by user")
     print("=" * 50)
 
-except Exception as e:
-    print(f"Error: {e}")
+except Exception:
+    # Clean up below, then exit non-zero so a service manager or replay run sees the failure
+    traceback.print_exc()
+    failed = True
 
 finally:
     # CLEANUP
   
-    picam2.stop()
-    cv2.destroyAllWindows()
+    camera.release()
+    if show_window:
+        cv2.destroyAllWindows()
+    if preview is not None:
+        preview.stop()
+        stats = preview.stats()
+        print(f"Preview: {stats['published']} frames published, {stats['encoded']} encoded, "
+              f"{stats['bytes_sent'] / 1e6:.1f} MB sent")
+    if event_log is not None:
+        event_log.close()
+        print(f"Event log: {event_log.appended} records, {event_log.rotations} rotations ({args.event_log})")
+    if metrics_server is not None:
+        metrics_server.stop()
+    if clip_recorder is not None:
+        clip_recorder.stop()
+        print(clip_recorder.format_stats())
+
+    stats = scheduler.stats()
+    print(f"Frames: {stats['frames']}, overruns: {stats['overruns']}, skipped: {stats['skipped']}, "
+          f"jitter mean/max: {stats['jitter_mean_ms']:.1f}/{stats['jitter_max_ms']:.1f} ms")
+    if motion_gate is not None:
+        stats = motion_gate.stats()
+        print(f"Motion gate: skipped {stats['skipped']}/{stats['frames']} frames "
+              f"({100 * stats['skip_rate']:.1f}%), ~{stats['cpu_saved_s']:.1f}s inference saved")
+    if roi is not None:
+        stats = roi.stats()
+        print(f"Face ROI: {stats['detections']} detections, {stats['tracked']} tracked, "
+              f"{stats['lost']} lost over {stats['frames']} frames")
+    if profiler.enabled:
+        print(profiler.format_report())
     
     # Turn off all devices
-    for device in [green_led, red_led, buzzer]:
-        device.off()
\ No newline at end of file
+    outputs.close()
+    stats = outputs.stats()
+    print(f"GPIO: {stats['writes']} pin writes, {stats['redundant']} unchanged updates skipped")
+
+    if args.replay:
+        # Times in seconds from the start of the video; finished is False if the loop stopped early
+        report = {
+            "source": args.source, "finished": camera.finished, "video_seconds": camera.seconds,
+            "frames_read": camera.frames_read, "frames_dropped": camera.frames_dropped, "decisions": frame_no,
+            "wall_seconds": time.perf_counter() - loop_started, "input_size": preprocess.size,
+            "transitions": [(t - camera.start, output, on) for t, output, on in outputs.backend.transitions],
+        }
+        if profiler.enabled:
+            # Real (not simulated) per-stage times, for tools/benchmark.py --front-end pi
+            report["stages"] = profiler.report()
+        if motion_gate is not None:
+            report["motion_gate"] = motion_gate.stats()
+        with open(args.replay, "w") as f:
+            json.dump(report, f, indent=2)
+
+if failed:
+    sys.exit(1)
@@ -1,4 +1,298 @@
-from ultralytics import YOLO
+# Export best.pt for the Raspberry Pi: FP32 / FP16 / INT8 variants of NCNN and ONNX,
+# each checked against the FP32 model on a held-out set before it is kept.
+#
+#   python model-export.py --weights best.pt --calib /data/dataset_preprocessed/train \
+#       --val /data/dataset_preprocessed/test --out exports
+#
+# INT8 calibration uses a class-balanced sample of training images. A variant
+# whose held-out accuracy falls more than --tolerance below FP32 is deleted
+# and the script exits 1, as it does when a requested variant cannot be exported
+# at all (leave it out of --variants to skip it). exports/export_report.json
+# records size, load time, per-frame latency and accuracy for every variant.
+import os
+import sys
+import glob
+import json
+import time
+import shutil
+import argparse
+import subprocess
 
-model = YOLO("best.pt")
-model.export(format="ncnn")
\ No newline at end of file
+import cv2
+import numpy as np
+
+# Make the shared drivesafe package importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drivesafe import LABELS
+from drivesafe.preprocess import Preprocessor, GRAY
+from drivesafe.backends import load_backend
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+CLASS_INDEX = {name: index for index, name in LABELS.items()}
+VARIANTS = ["ncnn-fp32", "ncnn-fp16", "ncnn-int8", "onnx-fp32", "onnx-fp16", "onnx-int8"]
+
+
+# SAMPLES
+def sample_images(folder, limit, seed=0):
+    """ Up to `limit` (path, label) pairs from <folder>/<class>/, balanced across classes """
+    per_class = {}
+    for class_name, index in CLASS_INDEX.items():
+        paths = sorted(p for p in glob.glob(os.path.join(folder, class_name, "*"))
+                       if p.lower().endswith(IMAGE_EXTENSIONS))
+        per_class[index] = paths
+    rng = np.random.default_rng(seed)
+    share = max(1, limit // max(1, sum(1 for p in per_class.values() if p)))
+    samples = []
+    for index, paths in per_class.items():
+        chosen = rng.permutation(len(paths))[:share]
+        samples.extend((paths[i], index) for i in sorted(chosen))
+    return samples
+
+
+def load_gray(samples, size):
+    """ Preprocessed like the live loops (center crop + gray), kept as uint8 to save memory """
+    preprocess = Preprocessor(size, output=GRAY)
+    images = np.empty((len(samples), size, size), dtype=np.uint8)
+    for i, (path, _) in enumerate(samples):
+        image = cv2.imread(path, cv2.IMREAD_COLOR)
+        if image is None:
+            raise SystemExit(f"Cannot read {path}")
+        images[i] = preprocess(image)
+    return images
+
+
+def to_tensor(gray):
+    """ N x S x S uint8 -> N x 3 x S x S float32 in [0, 1], the backends' input """
+    tensor = np.empty((len(gray), 3) + gray.shape[1:], dtype=np.float32)
+    tensor[:, 0] = gray
+    tensor[:, 0] *= np.float32(1.0 / 255.0)
+    tensor[:, 1:] = tensor[:, :1]
+    return tensor
+
+
+# EXPORTERS
+def export_ultralytics(weights, out_dir, name, fmt, imgsz, half=False):
+    """ Ultralytics names exports after the weights file, so export a renamed copy """
+    from ultralytics import YOLO
+
+    copy = os.path.join(out_dir, f"{name}.pt")
+    shutil.copyfile(weights, copy)
+    try:
+        return YOLO(copy, task="classify").export(format=fmt, imgsz=imgsz, half=half, verbose=False)
+    finally:
+        os.remove(copy)
+
+
+def export_ncnn_int8(fp32_dir, out_dir, calib_gray, threads):
+    """ ncnn2table (KL calibration on the sample) + ncnn2int8; both ship with ncnn's tools """
+    tools = [shutil.which("ncnn2table"), shutil.which("ncnn2int8")]
+    if None in tools:
+        raise RuntimeError("ncnn2table / ncnn2int8 not found on PATH (build ncnn with NCNN_BUILD_TOOLS=ON)")
+    param = glob.glob(os.path.join(fp32_dir, "*.param"))[0]
+    weights = param[:-len(".param")] + ".bin"
+    target = os.path.join(out_dir, "best_int8_ncnn_model")
+    os.makedirs(target, exist_ok=True)
+
+    # Calibration images already at the model size, so ncnn2table's own resize is a no-op
+    calib_dir = os.path.join(out_dir, "calib")
+    os.makedirs(calib_dir, exist_ok=True)
+    listing = os.path.join(calib_dir, "images.txt")
+    with open(listing, "w") as f:
+        for i, gray in enumerate(calib_gray):
+            path = os.path.join(calib_dir, f"{i:05d}.png")
+            cv2.imwrite(path, gray)
+            f.write(path + "\n")
+    size = calib_gray.shape[1]
+    table = os.path.join(target, "model.ncnn.table")
+    subprocess.run([tools[0], param, weights, listing, table, "mean=[0,0,0]",
+                    "norm=[0.003921569,0.003921569,0.003921569]", f"shape=[{size},{size},3]",
+                    "pixel=BGR", f"thread={threads}", "method=kl"], check=True)
+    subprocess.run([tools[1], param, weights, os.path.join(target, "model.ncnn.param"),
+                    os.path.join(target, "model.ncnn.bin"), table], check=True)
+    shutil.copyfile(os.path.join(fp32_dir, "metadata.yaml"), os.path.join(target, "metadata.yaml"))
+    shutil.rmtree(calib_dir)
+    return target
+
+
+def export_onnx_fp16(fp32_path, out_dir):
+    import onnx
+    from onnxruntime.transformers.float16 import convert_float_to_float16
+
+    # Keep float32 inputs/outputs so the backend feeds it exactly like FP32
+    model = convert_float_to_float16(onnx.load(fp32_path), keep_io_types=True)
+    target = os.path.join(out_dir, "best_fp16.onnx")
+    onnx.save(model, target)
+    return target
+
+
+def export_onnx_int8(fp32_path, out_dir, calib_gray):
+    """ ONNX Runtime static quantization (QDQ, per-channel weights) calibrated on the sample """
+    import onnx
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    class Reader(CalibrationDataReader):
+        # One image per call: the exported graph has a static batch of 1
+        def __init__(self, input_name):
+            self.input_name = input_name
+            self.images = iter(calib_gray)
+
+        def get_next(self):
+            gray = next(self.images, None)
+            return None if gray is None else {self.input_name: to_tensor(gray[None])}
+
+    prepared = os.path.join(out_dir, "best_prep.onnx")
+    quant_pre_process(fp32_path, prepared, skip_symbolic_shape=True)
+    target = os.path.join(out_dir, "best_int8.onnx")
+    quantize_static(prepared, target, Reader(onnx.load(fp32_path).graph.input[0].name),
+                    quant_format=QuantFormat.QDQ, per_channel=True,
+                    activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+    os.remove(prepared)
+    return target
+
+
+# MEASUREMENT
+def disk_size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files)
+    return os.path.getsize(path)
+
+
+def measure(backend, path, val_gray, val_labels, threads, runs):
+    started = time.perf_counter()
+    model = load_backend(backend, path, threads=threads)
+    first = to_tensor(val_gray[:1])
+    model.predict(first)
+    load_s = time.perf_counter() - started
+
+    # Per-frame latency, batch size 1 like the live loop
+    latencies = []
+    for i in range(runs):
+        tensor = to_tensor(val_gray[i % len(val_gray)][None])
+        started = time.perf_counter()
+        model.predict(tensor)
+        latencies.append(time.perf_counter() - started)
+
+    predictions = np.concatenate([model.predict(to_tensor(val_gray[i:i + 16])).argmax(axis=1)
+                                  for i in range(0, len(val_gray), 16)])
+    model.close()
+    latencies = 1000.0 * np.asarray(latencies)
+    return {
+        "size_mb": disk_size(path) / 1e6,
+        "load_s": load_s,
+        "latency_p50_ms": float(np.percentile(latencies, 50)),
+        "latency_p95_ms": float(np.percentile(latencies, 95)),
+        "accuracy": float((predictions == val_labels).mean()),
+        "predictions": predictions,
+    }
+
+
+# MAIN
+def main():
+    parser = argparse.ArgumentParser(description="Export FP32/FP16/INT8 NCNN and ONNX models with an accuracy gate")
+    parser.add_argument("--weights", default="best.pt")
+    parser.add_argument("--calib", required=True, help="Training images (<class>/ folders) for INT8 calibration")
+    parser.add_argument("--val", required=True, help="Held-out images (<class>/ folders) for the accuracy gate")
+    parser.add_argument("--out", default="exports")
+    parser.add_argument("--variants", nargs="+", default=VARIANTS, choices=VARIANTS)
+    parser.add_argument("--imgsz", type=int, default=None, help="Export size (default: the training size)")
+    parser.add_argument("--calib-images", type=int, default=300)
+    parser.add_argument("--val-images", type=int, default=600)
+    parser.add_argument("--tolerance", type=float, default=0.5, help="Max accuracy drop vs FP32, in percentage points")
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--runs", type=int, default=50, help="Timed single-frame inferences per variant")
+    parser.add_argument("--keep-failed", action="store_true", help="Keep variants that fail the accuracy gate")
+    args = parser.parse_args()
+
+    from ultralytics import YOLO
+    imgsz = args.imgsz or int(np.atleast_1d(YOLO(args.weights, task="classify").model.args.get("imgsz", 640))[0])
+    os.makedirs(args.out, exist_ok=True)
+
+    calib = sample_images(args.calib, args.calib_images)
+    val = sample_images(args.val, args.val_images, seed=1)
+    if not calib or not val:
+        raise SystemExit("No calibration or validation images found (expected <folder>/<class>/*.jpg)")
+    print(f"Calibration: {len(calib)} images from {args.calib}; held-out: {len(val)} images from {args.val}")
+    calib_gray = load_gray(calib, imgsz)
+    val_gray = load_gray(val, imgsz)
+    val_labels = np.array([label for _, label in val])
+
+    # FP32 reference straight from the PyTorch weights
+    reference = measure("torch", args.weights, val_gray, val_labels, args.threads, args.runs)
+    report = {"imgsz": imgsz, "tolerance_pp": args.tolerance, "variants": {"torch-fp32": reference}}
+
+    exported = {}
+    needed = set(args.variants) | ({"ncnn-fp32"} if "ncnn-int8" in args.variants else set()) \
+        | ({"onnx-fp32"} if {"onnx-fp16", "onnx-int8"} & set(args.variants) else set())
+    # Variants converted from another one rather than from the weights
+    sources = {"ncnn-int8": "ncnn-fp32", "onnx-fp16": "onnx-fp32", "onnx-int8": "onnx-fp32"}
+    failed = []
+    for variant in VARIANTS:
+        if variant not in needed:
+            continue
+        print(f"Exporting {variant} ...")
+        try:
+            if variant in sources and sources[variant] not in exported:
+                raise RuntimeError(f"{sources[variant]} was not exported")
+            if variant == "ncnn-fp32":
+                exported[variant] = export_ultralytics(args.weights, args.out, "best", "ncnn", imgsz)
+            elif variant == "ncnn-fp16":
+                exported[variant] = export_ultralytics(args.weights, args.out, "best_fp16", "ncnn", imgsz, half=True)
+            elif variant == "ncnn-int8":
+                exported[variant] = export_ncnn_int8(exported["ncnn-fp32"], args.out, calib_gray, args.threads)
+            elif variant == "onnx-fp32":
+                exported[variant] = export_ultralytics(args.weights, args.out, "best", "onnx", imgsz)
+            elif variant == "onnx-fp16":
+                exported[variant] = export_onnx_fp16(exported["onnx-fp32"], args.out)
+            elif variant == "onnx-int8":
+                exported[variant] = export_onnx_int8(exported["onnx-fp32"], args.out, calib_gray)
+        except Exception as e:
+            print(f"  skipped: {e}")
+            report["variants"][variant] = {"skipped": str(e)}
+            # Only variants left out of --variants may be missing from the export
+            if variant in args.variants:
+                failed.append(variant)
+
+    for variant, path in exported.items():
+        backend = "ncnn" if variant.startswith("ncnn") else "onnxruntime"
+        result = measure(backend, path, val_gray, val_labels, args.threads, args.runs)
+        result["path"] = path
+        result["agreement"] = float((result["predictions"] == reference["predictions"]).mean())
+        drop_pp = 100.0 * (reference["accuracy"] - result["accuracy"])
+        result["passed"] = drop_pp <= args.tolerance
+        if not result["passed"] and variant in args.variants:
+            failed.append(variant)
+            if not args.keep_failed:
+                shutil.rmtree(path) if os.path.isdir(path) else os.remove(path)
+                result["path"] = None
+        report["variants"][variant] = result
+
+    # Report in a fixed order, whatever was skipped or exported first
+    report["variants"] = {v: report["variants"][v] for v in ["torch-fp32", *VARIANTS] if v in report["variants"]}
+    print(f"\n{'variant':<12}{'size MB':>9}{'load s':>8}{'p50 ms':>8}{'p95 ms':>8}{'acc %':>8}{'agree %':>9}  gate")
+    for variant, r in report["variants"].items():
+        if "skipped" in r:
+            print(f"{variant:<12}  skipped: {r['skipped']}")
+            continue
+        gate = "ref" if variant == "torch-fp32" else ("ok" if r["passed"] else "FAIL")
+        agreement = 100.0 * r.get("agreement", 1.0)
+        print(f"{variant:<12}{r['size_mb']:>9.1f}{r['load_s']:>8.2f}{r['latency_p50_ms']:>8.1f}"
+              f"{r['latency_p95_ms']:>8.1f}{100 * r['accuracy']:>8.2f}{agreement:>9.2f}  {gate}")
+
+    for r in report["variants"].values():
+        r.pop("predictions", None)
+    with open(os.path.join(args.out, "export_report.json"), "w") as f:
+        json.dump(report, f, indent=2)
+
+    if failed:
+        skipped = [v for v in failed if "skipped" in report["variants"][v]]
+        if skipped:
+            print(f"\nNot exported: {', '.join(skipped)}")
+        below = [v for v in failed if v not in skipped]
+        if below:
+            print(f"\nAccuracy gate failed (> {args.tolerance} pp below FP32): {', '.join(below)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
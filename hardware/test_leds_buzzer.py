@@ -1,66 +1,115 @@
-from gpiozero import LED, Buzzer
+import os
+import sys
 import time
+import argparse
+import traceback
 
-# GPIO SETUP
-green_led = LED(17)
-red_led = LED(27)
-buzzer = Buzzer(22)
+# Make the shared drivesafe package importable when run as a script
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drivesafe.actuators import ActuatorController, create_backend, GREEN, RED, BUZZER
 
-# TEST SEQUENCE
-try:
+# Manual check of the wiring: watch/listen while it runs. The controller logic
+# itself (writes on transitions only, beep timing) is tested in tests/test_actuators.py.
+
+
+def run_sequence(outputs, pause, speed):
     print("Starting GPIO test...")
     print()
-    
-# Test Green LED
+
+    # Test Green LED
     print("Testing Green LED (GPIO 17)...")
-    green_led.on()
-    time.sleep(1)
-    green_led.off()
-    time.sleep(0.5)
+    outputs.set(GREEN, True)
+    pause(1)
+    outputs.set(GREEN, False)
+    pause(0.5)
     print("Green LED: OK")
     print()
-    
-# Test Red LED
+
+    # Test Red LED
     print("Testing Red LED (GPIO 27)...")
-    red_led.on()
-    time.sleep(1)
-    red_led.off()
-    time.sleep(0.5)
+    outputs.set(RED, True)
+    pause(1)
+    outputs.set(RED, False)
+    pause(0.5)
     print("Red LED: OK")
     print()
-    
- # Test Buzzer
+
+    # Test Buzzer
     print("Testing Buzzer (GPIO 22)...")
-    buzzer.on()
-    time.sleep(1)
-    buzzer.off()
-    time.sleep(0.5)
+    outputs.set(BUZZER, True)
+    pause(1)
+    outputs.set(BUZZER, False)
+    pause(0.5)
     print("Buzzer: OK")
     print()
-    
- # Test all together
+
+    # Test buzzer pattern (runs on the controller's timer, this loop only sleeps)
+    print("Testing buzzer beep pattern...")
+    outputs.set_pattern(BUZZER, 0.2 / speed, 0.2 / speed)
+    pause(1)
+    outputs.set(BUZZER, False)
+    pause(0.5)
+    print("Buzzer pattern: OK")
+    print()
+
+    # Test all together
     print("Testing all devices together...")
-    green_led.on()
-    red_led.on()
-    buzzer.on()
-    time.sleep(2)
-    
-    green_led.off()
-    red_led.off()
-    buzzer.off()
+    outputs.set(GREEN, True)
+    outputs.set(RED, True)
+    outputs.set(BUZZER, True)
+    pause(2)
+
+    outputs.off()
+    print()
+
+    # Repeated identical requests must not reach the pins
+    print("Testing state-change-only writes...")
+    writes = outputs.writes
+    for _ in range(100):
+        outputs.apply("awake", False)
+    print(f"100 identical updates -> {outputs.writes - writes} writes")
+    outputs.off()
     print()
-    
+
     print("All devices working!")
 
-except KeyboardInterrupt:
-    print("\nTest stopped by user")
 
-except Exception as e:
-    print(f"Error: {e}")
+def main():
+    # COMMAND LINE OPTIONS
+    parser = argparse.ArgumentParser(description="LED / buzzer test (real GPIO or the in-memory mock)")
+    parser.add_argument("--backend", default="auto", choices=["auto", "gpiozero", "mock"],
+                        help="gpiozero on the Pi, mock anywhere else (auto picks)")
+    parser.add_argument("--speed", type=float, default=1.0, help="Divide every pause by this (e.g. 20 with the mock)")
+    args = parser.parse_args()
+
+    def pause(seconds):
+        time.sleep(seconds / args.speed)
+
+    # GPIO SETUP
+    backend = create_backend(args.backend)
+    outputs = ActuatorController(backend)
+    print(f"Backend: {backend.name}")
+
+    # TEST SEQUENCE
+    failed = False
+    try:
+        run_sequence(outputs, pause, args.speed)
+
+    except KeyboardInterrupt:
+        print("\nTest stopped by user")
+
+    except Exception:
+        traceback.print_exc()
+        failed = True
+
+    finally:
+        # Turn off all devices
+        outputs.close()
+        print("Test complete")
+
+    if failed:
+        sys.exit(1)
+
 
-finally:
-    # Turn off all devices
-    green_led.off()
-    red_led.off()
-    buzzer.off()
-    print("Test complete")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+ActuatorController against the in-memory MockBackend: writes only on
+transitions, and buzzer pattern timing.
+"""
+import time
+
+import numpy as np
+import pytest
+
+from drivesafe.actuators import BUZZER, GREEN, OUTPUTS, RED, ActuatorController, MockBackend
+
+
+def changes(backend):
+    return [(output, on) for _, output, on in backend.transitions]
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+@pytest.fixture
+def mock():
+    backend = MockBackend()
+    outputs = ActuatorController(backend)
+    yield backend, outputs
+    outputs.close()
+
+
+def test_starts_with_everything_off(mock):
+    backend, outputs = mock
+    assert changes(backend) == [(output, False) for output in OUTPUTS]
+    assert outputs.writes == len(OUTPUTS)
+
+
+def test_writes_only_on_transitions(mock):
+    backend, outputs = mock
+    start = len(backend.transitions)
+    for _ in range(100):
+        outputs.apply("awake", False)
+    assert changes(backend)[start:] == [(GREEN, True)]
+    outputs.apply("absent", False)
+    outputs.apply("absent", False)
+    outputs.apply("drowsy", True)
+    outputs.apply("drowsy", True)
+    assert changes(backend)[start:] == [(GREEN, True), (RED, True), (GREEN, False),
+                                        (RED, False), (GREEN, True), (BUZZER, True)]
+    # Every write reached the backend, every other update was skipped
+    assert outputs.writes == len(backend.transitions)
+    assert outputs.redundant > 0
+
+
+def test_device_sequence(mock):
+    """ The sequence hardware/test_leds_buzzer.py runs, without the beep pattern """
+    backend, outputs = mock
+    for output in (GREEN, RED, BUZZER):
+        outputs.set(output, True)
+        outputs.set(output, False)
+    for output in (GREEN, RED, BUZZER):
+        outputs.set(output, True)
+    outputs.off()
+    outputs.close()
+    assert changes(backend) == [
+        (GREEN, False), (RED, False), (BUZZER, False),
+        (GREEN, True), (GREEN, False), (RED, True), (RED, False), (BUZZER, True), (BUZZER, False),
+        (GREEN, True), (RED, True), (BUZZER, True), (GREEN, False), (RED, False), (BUZZER, False),
+    ]
+    assert not any(backend.state.values())
+    assert backend.closed
+
+
+def test_buzzer_pattern_timing(mock):
+    backend, outputs = mock
+    on_s, off_s = 0.05, 0.1
+    start = len(backend.transitions)
+    outputs.set_pattern(BUZZER, on_s, off_s)
+    assert wait_for(lambda: len(backend.transitions) - start >= 8)
+    outputs.set(BUZZER, False)
+    beeps = backend.transitions[start:start + 8]
+    # Strictly alternating, starting on
+    assert [(output, on) for _, output, on in beeps] == [(BUZZER, True), (BUZZER, False)] * 4
+    times = np.array([t for t, _, _ in beeps])
+    on_times, off_times = times[1::2] - times[0::2], times[2::2] - times[1:-1:2]
+    # Never early; late by at most a scheduling hiccup
+    assert on_times.min() >= on_s - 1e-3 and np.median(on_times) < on_s + 0.03
+    assert off_times.min() >= off_s - 1e-3 and np.median(off_times) < off_s + 0.03
+
+
+def test_steady_set_stops_the_pattern(mock):
+    backend, outputs = mock
+    outputs.set_pattern(BUZZER, 0.02, 0.02)
+    assert wait_for(lambda: backend.state[BUZZER])
+    outputs.set(BUZZER, False)
+    count = len(backend.transitions)
+    time.sleep(0.1)
+    assert len(backend.transitions) == count
+    assert not backend.state[BUZZER]
+
+
+def test_repeated_pattern_request_does_not_restart_it(mock):
+    backend, outputs = mock
+    outputs.set_pattern(BUZZER, 0.5, 0.5)
+    assert wait_for(lambda: backend.state[BUZZER])
+    count = len(backend.transitions)
+    for _ in range(50):
+        outputs.apply("drowsy", True, buzzer_pattern=(0.5, 0.5))
+    assert changes(backend)[count:] == [(GREEN, True)]
+
+
+def test_close_turns_everything_off(mock):
+    backend, outputs = mock
+    outputs.apply("drowsy", True, buzzer_pattern=(0.02, 0.02))
+    outputs.close()
+    assert not any(backend.state.values())
+    assert backend.closed
@@ -0,0 +1,110 @@
+"""
+Backend parity: every available backend must give the same top-1 class and
+nearly the same probabilities as the PyTorch reference.
+
+By default this uses the bundled best.pt, the images shipped with the repo and
+exports in their usual places (hardware/best_ncnn_model, DrowsinessApp/best.onnx).
+Point it elsewhere with environment variables (tools/check_backends.py sets them):
+
+    DRIVESAFE_PARITY_IMAGES  folder of test images (searched recursively)
+    DRIVESAFE_PARITY_LIMIT   max images to check (0 = all)
+    DRIVESAFE_PT / DRIVESAFE_NCNN / DRIVESAFE_ONNX   model paths
+    DRIVESAFE_PARITY_MAX_DISAGREEMENT   allowed fraction of images with a different top-1
+    DRIVESAFE_PARITY_ATOL    allowed absolute difference of any class probability
+
+A backend whose runtime is not installed or whose model is missing (or set to
+an empty string) is skipped.
+"""
+import os
+
+import cv2
+import numpy as np
+import pytest
+
+from drivesafe.backends import load_backend
+from drivesafe.files import list_images
+from drivesafe.preprocess import Preprocessor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+IMGSZ = 640
+
+
+def setting(name, default):
+    return os.environ.get(name, default)
+
+
+PT = setting("DRIVESAFE_PT", os.path.join(ROOT, "DrowsinessApp", "best.pt"))
+NCNN = setting("DRIVESAFE_NCNN", os.path.join(ROOT, "hardware", "best_ncnn_model"))
+ONNX = setting("DRIVESAFE_ONNX", os.path.join(ROOT, "DrowsinessApp", "best.onnx"))
+MAX_DISAGREEMENT = float(setting("DRIVESAFE_PARITY_MAX_DISAGREEMENT", 0.0))
+ATOL = float(setting("DRIVESAFE_PARITY_ATOL", 0.02))
+CANDIDATES = [("ncnn", NCNN), ("onnxruntime", ONNX), ("opencv", ONNX)]
+
+
+def image_paths():
+    folders = [os.environ["DRIVESAFE_PARITY_IMAGES"]] if "DRIVESAFE_PARITY_IMAGES" in os.environ else \
+        [os.path.join(ROOT, "images"), os.path.join(ROOT, "DrowsinessApp", "images")]
+    limit = int(setting("DRIVESAFE_PARITY_LIMIT", 8))
+    paths = [p for folder in folders for p in list_images(folder)]
+    if limit and len(paths) > limit:
+        paths = [paths[i] for i in np.linspace(0, len(paths) - 1, limit).astype(int)]
+    return paths
+
+
+def open_backend(name, path):
+    """ The backend, or a pytest skip when its runtime or model is missing """
+    if not path:
+        pytest.skip(f"{name}: no model given")
+    if not os.path.exists(path):
+        pytest.skip(f"{name}: no model at {path}")
+    try:
+        return load_backend(name, path)
+    except ImportError as e:
+        pytest.skip(f"{name}: {e}")
+
+
+def probabilities(backend, paths):
+    preprocess = Preprocessor(backend.input_size or IMGSZ)
+    probs = []
+    for path in paths:
+        image = cv2.imread(path)
+        assert image is not None, f"Cannot read image: {path}"
+        probs.append(backend.predict(preprocess(image))[0])
+    return np.array(probs)
+
+
+@pytest.fixture(scope="module")
+def images():
+    paths = image_paths()
+    if not paths:
+        pytest.skip("no test images found")
+    return paths
+
+
+@pytest.fixture(scope="module")
+def reference(images):
+    backend = open_backend("torch", PT)
+    try:
+        return probabilities(backend, images)
+    finally:
+        backend.close()
+
+
+@pytest.mark.parametrize("name,path", CANDIDATES, ids=[name for name, _ in CANDIDATES])
+def test_backend_matches_torch(name, path, images, request):
+    backend = open_backend(name, path)
+    try:
+        probs = probabilities(backend, images)
+    finally:
+        backend.close()
+    # Only load the reference once some backend is actually available
+    reference = request.getfixturevalue("reference")
+
+    mismatches = [p for p, a, b in zip(images, reference.argmax(axis=1), probs.argmax(axis=1)) if a != b]
+    rate = len(mismatches) / len(images)
+    assert rate <= MAX_DISAGREEMENT, \
+        f"{name}: top-1 differs on {len(mismatches)}/{len(images)} images, e.g. {mismatches[:5]}"
+
+    worst = np.abs(probs - reference).max(axis=1)
+    assert worst.max() <= ATOL, \
+        f"{name}: probabilities differ by up to {worst.max():.2g} (allowed {ATOL}) on {images[int(worst.argmax())]}"
@@ -0,0 +1,63 @@
+"""
+CaptureWorker: a failed read ends a file but is retried (a bounded number of
+times) for a live camera; either way the consumer is woken by a closed buffer.
+"""
+import numpy as np
+
+from drivesafe.frame_buffer import CaptureWorker, LatestFrameBuffer
+
+
+class ScriptedSource:
+    """ read() results from a list of True/False; False once the list runs out """
+
+    def __init__(self, script, live):
+        self.live = live
+        self.script = list(script)
+        self.reads = 0
+
+    def read(self):
+        self.reads += 1
+        if not self.script or not self.script.pop(0):
+            return False, None
+        return True, np.zeros((4, 4, 3), dtype=np.uint8)
+
+
+def run_worker(source, **kwargs):
+    buffer = LatestFrameBuffer(max_age=10.0)
+    worker = CaptureWorker(source, buffer, retry_wait=0.0, **kwargs)
+    worker.start()
+    worker.join(timeout=5.0)
+    assert not worker.is_alive()
+    return buffer
+
+
+def test_file_ends_on_first_failed_read():
+    source = ScriptedSource([True, True, True, False, True], live=False)
+    buffer = run_worker(source)
+    assert buffer.closed
+    assert buffer.captured == 3
+    assert source.reads == 4
+    assert buffer.get(timeout=0.1) is None
+
+
+def test_source_without_live_flag_is_treated_as_a_file():
+    source = ScriptedSource([True, False, True], live=False)
+    del source.live
+    buffer = run_worker(source)
+    assert buffer.closed
+    assert buffer.captured == 1
+
+
+def test_camera_survives_transient_failures():
+    source = ScriptedSource([True, False, False, True, False, True], live=True)
+    buffer = run_worker(source, max_retries=2)
+    # Two failures in a row are retried; the trailing run of failures is not
+    assert buffer.captured == 3
+    assert buffer.closed
+
+
+def test_camera_retries_are_bounded():
+    source = ScriptedSource([], live=True)
+    buffer = run_worker(source, max_retries=5)
+    assert source.reads == 6
+    assert buffer.closed
@@ -0,0 +1,69 @@
+"""
+MotionGate on synthetic gray frames: what counts as a change, and the staleness bound.
+"""
+import cv2
+import numpy as np
+
+from drivesafe.motion_gate import MotionGate
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def face(rng, eyes_closed=False):
+    """ A still 640x480 scene with sensor noise; closed eyes are two dark bars, a few % of the frame """
+    frame = np.full((480, 640), 110, dtype=np.uint8)
+    cv2.circle(frame, (320, 240), 150, 170, -1)
+    if eyes_closed:
+        cv2.rectangle(frame, (250, 200), (300, 212), 40, -1)
+        cv2.rectangle(frame, (340, 200), (390, 212), 40, -1)
+    noise = rng.normal(0, 3, frame.shape)
+    return np.clip(frame + noise, 0, 255).astype(np.uint8)
+
+
+def test_static_scene_is_skipped():
+    rng = np.random.default_rng(0)
+    clock = FakeClock()
+    gate = MotionGate(clock=clock)
+    assert gate.should_infer(face(rng))
+    for _ in range(5):
+        clock.now += 0.03
+        assert not gate.should_infer(face(rng))
+
+
+def test_eyes_closing_in_a_still_head_runs_the_model():
+    rng = np.random.default_rng(1)
+    clock = FakeClock()
+    gate = MotionGate(clock=clock)
+    gate.should_infer(face(rng))
+    clock.now += 0.03
+    assert gate.should_infer(face(rng, eyes_closed=True))
+
+
+def test_staleness_forces_inference_well_before_the_alert_delay():
+    rng = np.random.default_rng(2)
+    clock = FakeClock()
+    gate = MotionGate(clock=clock)
+    assert gate.max_staleness <= 0.25
+    gate.should_infer(face(rng))
+    inferred_at = []
+    for _ in range(100):
+        clock.now += 0.01
+        if gate.should_infer(face(rng)):
+            inferred_at.append(clock.now)
+    gaps = np.diff([0.0] + inferred_at)
+    assert len(inferred_at) >= 3
+    assert gaps.max() <= gate.max_staleness + 0.01 + 1e-9
+
+
+def test_reset_forces_inference():
+    rng = np.random.default_rng(3)
+    gate = MotionGate(clock=FakeClock())
+    gate.should_infer(face(rng))
+    gate.reset()
+    assert gate.should_infer(face(rng))
@@ -0,0 +1,192 @@
+"""
+Replay harness: scoring, the simulated clock and camera, and an end-to-end
+replay of a synthetic drive through the desktop front end with a stub model.
+"""
+import argparse
+import importlib.util
+import os
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from drivesafe.backends import Backend
+from drivesafe.replay import ReplayClock, ReplaySource, read_events, score, summarize
+from drivesafe.state_engine import ALERT_SECONDS
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def write_video(path, brightness, fps=10.0, size=(160, 120)):
+    """ One frame per brightness value (0-255), gray, as MJPG """
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), fps, size)
+    for value in brightness:
+        writer.write(np.full((size[1], size[0], 3), value, dtype=np.uint8))
+    writer.release()
+    return path
+
+
+def busy(seconds):
+    """ Real computing time (not sleeping) """
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+# -------------------- score() / summarize() --------------------
+def test_score_hits_misses_and_false_alarms():
+    events = [(10.0, 20.0), (40.0, 45.0), (100.0, 105.0)]
+    # 11.2: first episode; 12.0: same episode again; 30.0: false alarm;
+    # 46.5: second episode within the 2 s grace; nothing for the third
+    result = score([11.2, 12.0, 30.0, 46.5], events, duration=3600.0, grace=2.0)
+    assert result["events"] == 3
+    assert result["detected"] == 2
+    assert result["missed"] == 1
+    assert result["latencies_s"] == pytest.approx([1.2, 6.5])
+    assert result["false_alarms"] == 1
+    assert result["false_alarm_times_s"] == [30.0]
+    assert result["hours"] == pytest.approx(1.0)
+
+
+def test_score_alarm_after_grace_is_a_false_alarm():
+    result = score([23.0], [(10.0, 20.0)], duration=60.0, grace=2.0)
+    assert result["detected"] == 0
+    assert result["missed"] == 1
+    assert result["false_alarms"] == 1
+
+
+def test_score_drowsiness_free_video():
+    result = score([5.0, 50.0], [], duration=1800.0)
+    assert result["events"] == 0
+    assert result["false_alarms"] == 2
+
+
+def test_summarize_totals_and_rates():
+    scores = [score([11.0, 30.0], [(10.0, 20.0)], duration=1800.0),
+              score([42.0], [(40.0, 45.0)], duration=1800.0),
+              score([], [(5.0, 8.0)], duration=3600.0)]
+    summary = summarize(scores)
+    assert summary["videos"] == 3
+    assert summary["events"] == 3
+    assert summary["detected"] == 2
+    assert summary["missed"] == 1
+    assert summary["false_alarms"] == 1
+    assert summary["hours"] == pytest.approx(2.0)
+    assert summary["false_alarms_per_hour"] == pytest.approx(0.5)
+    assert summary["latency_p50_s"] == pytest.approx(1.5)
+    assert summary["latency_max_s"] == pytest.approx(2.0)
+
+
+def test_summarize_without_detections_has_no_latency():
+    summary = summarize([score([], [(5.0, 8.0)], duration=60.0)])
+    assert "latency_p50_s" not in summary
+    assert summary["missed"] == 1
+
+
+def test_read_events(tmp_path):
+    path = tmp_path / "events.csv"
+    path.write_text("name,start_s,end_s\n001.mp4,41.0,47.5\n001.mp4,12.5,19.0\n002.mp4,,\n")
+    assert read_events(str(path)) == {"001.mp4": [(12.5, 19.0), (41.0, 47.5)], "002.mp4": []}
+
+
+# -------------------- ReplayClock / ReplaySource --------------------
+def test_clock_sleep_is_instant():
+    clock = ReplayClock(cost_scale=0.0)
+    started = time.perf_counter()
+    clock.sleep(100.0)
+    assert time.perf_counter() - started < 0.5
+    assert clock() == pytest.approx(100.0)
+
+
+def test_clock_cost_scale():
+    free = ReplayClock(cost_scale=0.0)
+    busy(0.05)
+    assert free() == 0.0
+    double = ReplayClock(cost_scale=2.0)
+    busy(0.05)
+    assert double() >= 0.1
+
+
+def test_clock_paused_time_does_not_count():
+    clock = ReplayClock(cost_scale=1.0)
+    with clock.paused():
+        busy(0.1)
+    assert clock() < 0.05
+
+
+def test_source_delivers_every_frame_when_keeping_up(tmp_path):
+    path = write_video(str(tmp_path / "ramp.avi"), [i * 8 for i in range(30)])
+    clock = ReplayClock(cost_scale=0.0)
+    source = ReplaySource(path, clock)
+    values, arrivals = [], []
+    while True:
+        ret, frame = source.read()
+        if not ret:
+            break
+        values.append(frame.mean())
+        arrivals.append(clock())
+    source.release()
+    assert source.finished
+    assert source.frames_read == 30
+    assert source.frames_dropped == 0
+    assert source.seconds == pytest.approx(3.0)
+    # A camera delivers frame i at i / fps
+    assert arrivals == pytest.approx([i / 10.0 for i in range(30)])
+    assert np.allclose(values, [i * 8 for i in range(30)], atol=3)
+
+
+def test_source_drops_frames_while_the_loop_is_busy(tmp_path):
+    path = write_video(str(tmp_path / "ramp.avi"), [i * 8 for i in range(30)])
+    clock = ReplayClock(cost_scale=0.0)
+    source = ReplaySource(path, clock, size=(80, 60))
+    ret, frame = source.read()
+    assert frame.shape == (60, 80, 3)
+    # 0.25 s of (simulated) work per frame at 10 fps: two or three frames pass meanwhile
+    clock.sleep(0.25)
+    ret, frame = source.read()
+    assert ret
+    assert source.frames_dropped == 1
+    assert frame.mean() == pytest.approx(2 * 8, abs=3)
+    source.release()
+
+
+# -------------------- End to end --------------------
+class StubModel(Backend):
+    """ Drowsy when the frame is bright, awake when it is dark """
+
+    name = "stub"
+
+    def _run(self, tensor):
+        drowsy = float(tensor.mean() > 0.5)
+        return np.array([[0.0, 1.0 - drowsy, drowsy]], dtype=np.float32)
+
+
+def load_replay_tool():
+    spec = importlib.util.spec_from_file_location("replay_tool", os.path.join(ROOT, "tools", "replay.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def test_desktop_replay_end_to_end(tmp_path):
+    pytest.importorskip("PyQt5")
+    tool = load_replay_tool()
+    desktop = tool.load_desktop()
+    # 3 s awake, 5 s drowsy (eyes "closed" = bright), at 10 fps
+    path = write_video(str(tmp_path / "drive.avi"), [30] * 30 + [220] * 50)
+    args = argparse.Namespace(cost_scale=0.0)
+    result = tool.replay_desktop(desktop, StubModel(), path, args)
+    assert result["finished"]
+    assert result["frames_read"] == 80
+
+    scored = score(result["alarm_on_s"], [(3.0, 8.0)], result["video_seconds"])
+    assert scored["detected"] == 1
+    assert scored["false_alarms"] == 0
+    latency = scored["latencies_s"][0]
+    assert ALERT_SECONDS <= latency <= ALERT_SECONDS + tool.LATENCY_ALLOWANCE
+
+    # The same budget check the CLI applies
+    budget = argparse.Namespace(max_missed=0, max_latency=ALERT_SECONDS + tool.LATENCY_ALLOWANCE,
+                                max_false_alarms_per_hour=None, tolerance=0.25)
+    assert tool.check("desktop", summarize([scored]), budget, None) == []
@@ -0,0 +1,147 @@
+"""
+DrowsinessStateEngine on synthetic timestamped probability streams.
+
+Probabilities are (absent, awake, drowsy) as in drivesafe.LABELS.
+"""
+import random
+
+import pytest
+
+from drivesafe.state_engine import ABSENT, AWAKE, DROWSY_ALERT, DrowsinessStateEngine
+
+AWAKE_PROBS = (0.0, 1.0, 0.0)
+DROWSY_PROBS = (0.0, 0.0, 1.0)
+ALERT_AFTER = 1.0
+# Smoothed drowsy overtakes awake after smoothing * ln 2 seconds
+SMOOTHING_DELAY = 0.2 * 0.6931
+
+
+def stream(fps, seconds, start=0.0):
+    """ Frame timestamps at fps for `seconds` """
+    return [start + i / fps for i in range(int(round(seconds * fps)))]
+
+
+def first_alarm(engine, frames):
+    """ Timestamp of the first Decision with the alarm on, or None; frames are (timestamp, probs) """
+    for timestamp, probs in frames:
+        if engine.update(probs, timestamp).alarm:
+            return timestamp
+    return None
+
+
+def drowsy_onset(fps, onset=5.0, seconds=10.0):
+    """ Awake until `onset`, drowsy after """
+    return [(t, AWAKE_PROBS if t < onset else DROWSY_PROBS) for t in stream(fps, seconds)]
+
+
+@pytest.mark.parametrize("fps", [5, 10, 30])
+def test_alert_latency_does_not_depend_on_fps(fps):
+    alarm_at = first_alarm(DrowsinessStateEngine(alert_after=ALERT_AFTER), drowsy_onset(fps))
+    assert alarm_at is not None
+    latency = alarm_at - 5.0
+    # Within a frame interval early (the first drowsy frame is averaged over the interval
+    # before it) and two late (one to turn on, one to notice the alarm is due)
+    assert ALERT_AFTER + SMOOTHING_DELAY - 1.0 / fps <= latency
+    assert latency <= ALERT_AFTER + SMOOTHING_DELAY + 2.0 / fps
+
+
+def test_alert_latency_matches_across_fps():
+    latencies = [first_alarm(DrowsinessStateEngine(alert_after=ALERT_AFTER), drowsy_onset(fps)) - 5.0
+                 for fps in (5, 10, 30)]
+    assert max(latencies) - min(latencies) <= 2.0 / 5
+
+
+def test_dropped_frames_do_not_delay_the_alarm():
+    rng = random.Random(0)
+    # Half the frames lost at random, with gaps well under max_gap
+    frames = [frame for frame in drowsy_onset(30) if rng.random() < 0.5]
+    alarm_at = first_alarm(DrowsinessStateEngine(alert_after=ALERT_AFTER), frames)
+    assert alarm_at is not None
+    assert alarm_at - 5.0 <= ALERT_AFTER + SMOOTHING_DELAY + 0.5
+
+
+def test_short_stall_keeps_drowsiness_timer():
+    engine = DrowsinessStateEngine(alert_after=ALERT_AFTER, max_gap=1.0)
+    engine.update(DROWSY_PROBS, 0.0)
+    assert not engine.update(DROWSY_PROBS, 0.5).alarm
+    # 0.8 s without frames (under max_gap): still continuous drowsiness
+    decision = engine.update(DROWSY_PROBS, 1.3)
+    assert decision.alarm
+    assert decision.drowsy_seconds == pytest.approx(1.3)
+
+
+def test_gap_longer_than_max_gap_resets_drowsiness():
+    engine = DrowsinessStateEngine(alert_after=ALERT_AFTER, max_gap=1.0)
+    engine.update(DROWSY_PROBS, 0.0)
+    decision = engine.update(DROWSY_PROBS, 5.0)
+    assert not decision.alarm
+    assert decision.drowsy_seconds == 0.0
+    assert decision.state != DROWSY_ALERT
+    # The timer restarts at the first frame after the gap
+    assert not engine.update(DROWSY_PROBS, 5.5).alarm
+    assert engine.update(DROWSY_PROBS, 6.0).alarm
+
+
+def test_gap_clears_an_active_alarm():
+    engine = DrowsinessStateEngine(alert_after=ALERT_AFTER, max_gap=1.0)
+    assert first_alarm(engine, [(t, DROWSY_PROBS) for t in stream(10, 2.0)]) is not None
+    decision = engine.update(DROWSY_PROBS, 10.0)
+    assert not decision.alarm
+    assert decision.drowsy_seconds == 0.0
+
+
+def test_drowsy_as_top_class_alarms_below_a_majority():
+    # Drowsy is the most likely class without ever reaching 0.6
+    probs = (0.0, 0.45, 0.55)
+    engine = DrowsinessStateEngine(alert_after=ALERT_AFTER)
+    alarm_at = first_alarm(engine, [(t, probs) for t in stream(10, 3.0)])
+    assert alarm_at == pytest.approx(ALERT_AFTER)
+
+
+def test_awake_as_top_class_never_alarms():
+    probs = (0.0, 0.55, 0.45)
+    engine = DrowsinessStateEngine(alert_after=ALERT_AFTER)
+    assert first_alarm(engine, [(t, probs) for t in stream(10, 5.0)]) is None
+
+
+def test_explicit_on_threshold():
+    engine = DrowsinessStateEngine(alert_after=ALERT_AFTER, on_threshold=0.6)
+    assert first_alarm(engine, [(t, (0.0, 0.45, 0.55)) for t in stream(10, 3.0)]) is None
+    with pytest.raises(ValueError):
+        DrowsinessStateEngine(on_threshold=0.3, off_threshold=0.4)
+
+
+def test_single_misclassified_frames_do_not_reset_the_timer():
+    # Drowsy driver, every fifth frame classified awake
+    frames = [(t, AWAKE_PROBS if i % 5 == 4 else DROWSY_PROBS) for i, t in enumerate(stream(30, 3.0))]
+    engine = DrowsinessStateEngine(alert_after=ALERT_AFTER)
+    alarm_at = first_alarm(engine, frames)
+    assert alarm_at is not None
+    assert alarm_at <= ALERT_AFTER + SMOOTHING_DELAY + 2.0 / 30
+
+
+def test_flapping_near_the_boundary_stays_on():
+    engine = DrowsinessStateEngine(alert_after=ALERT_AFTER, smoothing=0)
+    engine.update((0.0, 0.4, 0.6), 0.0)
+    # Drowsy loses the top spot but stays above off_threshold: still on
+    for i, t in enumerate(stream(10, 1.5, start=0.1)):
+        decision = engine.update((0.0, 0.55, 0.45) if i % 2 else (0.0, 0.45, 0.55), t)
+    assert decision.alarm
+    assert decision.drowsy_seconds == pytest.approx(1.5)
+    # Falling below off_threshold switches it off
+    decision = engine.update((0.0, 0.65, 0.35), 1.7)
+    assert not decision.alarm
+    assert decision.state == AWAKE
+
+
+def test_occasional_drowsy_frames_do_not_alarm():
+    # Awake driver, every tenth frame classified drowsy
+    frames = [(t, DROWSY_PROBS if i % 10 == 9 else AWAKE_PROBS) for i, t in enumerate(stream(30, 10.0))]
+    assert first_alarm(DrowsinessStateEngine(alert_after=ALERT_AFTER), frames) is None
+
+
+def test_absent_state():
+    engine = DrowsinessStateEngine()
+    decision = engine.update((0.9, 0.1, 0.0), 0.0)
+    assert decision.state == ABSENT
+    assert not decision.alarm
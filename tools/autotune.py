@@ -0,0 +1,252 @@
+"""
+Pick the model, backend, input size and thread count that run fastest on this device.
+
+Every model given with --models is loaded with each backend that can run
+it (.pt -> torch, NCNN folder -> ncnn, .onnx -> onnxruntime and OpenCV DNN;
+runtimes that are not installed are skipped). Each one is tried at every
+--sizes input size it accepts and every thread count. For each candidate:
+
+- agreement: share of calibration frames where its top-1 class matches the
+  reference model (measured once per size; thread count does not change it)
+- latency: p50/p95 of model.predict() on single frames after a warm-up
+
+Each model/backend/thread-count group runs in a fresh process. Runtimes
+keep process-wide state (thread pools, OpenMP), and torch and ncnn in one
+process can corrupt each other's heap, so a shared process would skew
+the timings or crash. A group that crashes is reported and skipped.
+
+The fastest candidate (by p50) with agreement >= --min-agreement is saved as
+the tuning profile that the desktop app and the Pi monitor load at startup.
+If nothing qualifies, the existing profile is left alone and the exit code is 1.
+
+    python tools/autotune.py --reference DrowsinessApp/best.pt \
+        --models DrowsinessApp/best.pt hardware/best_ncnn_model best.onnx --images dataset/test
+    python tools/autotune.py --models hardware/best_ncnn_model --video drive.mp4 --sizes 224,320 --threads 2,4
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drivesafe.backends import BACKENDS, detect_backend, load_backend
+from drivesafe.files import list_images
+from drivesafe.preprocess import CENTER_CROP, Preprocessor
+from drivesafe.profiling import RollingHistogram
+from drivesafe.tuning import DEFAULT_PATH, input_size_for, save_tuning
+
+
+# -------------------- Calibration frames --------------------
+def image_frames(folder, limit):
+    frames = []
+    for path in list_images(folder, limit):
+        image = cv2.imread(path)
+        if image is None:
+            raise SystemExit(f"Cannot read image: {path}")
+        frames.append(image)
+    return frames
+
+
+def video_sample(path, limit):
+    """ Up to `limit` frames spread evenly over the video (consecutive frames are near-duplicates) """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise SystemExit(f"Cannot open video: {path}")
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or limit
+    wanted = set(np.linspace(0, total - 1, min(limit, total)).astype(int).tolist())
+    frames = []
+    index = 0
+    while len(frames) < len(wanted) and cap.grab():
+        if index in wanted:
+            frames.append(cap.retrieve()[1])
+        index += 1
+    cap.release()
+    return frames
+
+
+def calibration_frames(images, video, limit):
+    frames = image_frames(images, limit) if images else video_sample(video, limit)
+    if not frames:
+        raise SystemExit("No calibration frames")
+    return frames
+
+
+_frames = None
+
+
+def _init_worker(images, video, limit):
+    """ Each worker reads the calibration frames itself rather than receiving them pickled """
+    global _frames
+    _frames = calibration_frames(images, video, limit)
+
+
+# -------------------- Candidates --------------------
+def backends_for(path):
+    """ Backend names that can run a model file or folder """
+    name = detect_backend(path)
+    if name in ("onnxruntime", "opencv"):
+        return ["onnxruntime", "opencv"]
+    return [name]
+
+
+def thread_counts(text):
+    if text != "auto":
+        return [int(n) for n in text.split(",")]
+    cpus = os.cpu_count() or 1
+    return sorted({n for n in (1, 2, 4, cpus) if n <= cpus})
+
+
+def top1(model, frames, size):
+    preprocess = Preprocessor(size)
+    return np.array([model.predict(preprocess(frame))[0].argmax() for frame in frames])
+
+
+def latency(model, frames, size, runs, warmup):
+    """ p50/p95 ms of single-frame predict(); preprocessing is the same for every backend and left out """
+    preprocess = Preprocessor(size)
+    histogram = RollingHistogram(window=runs)
+    for i in range(warmup + runs):
+        tensor = preprocess(frames[i % len(frames)])
+        started = time.perf_counter()
+        model.predict(tensor)
+        if i >= warmup:
+            histogram.add(time.perf_counter() - started)
+    return histogram.summary()
+
+
+def reference_top1(args):
+    """ (input size, top-1 per calibration frame) of the reference model """
+    model = load_backend(args.reference_backend, args.reference)
+    size = input_size_for(model, None, args.imgsz)
+    predictions = top1(model, _frames, size)
+    model.close()
+    return size, predictions
+
+
+def measure(args, path, backend, threads, reference, agreement):
+    """
+    One model/backend at one thread count, at every size it accepts. agreement
+    (size -> share of frames matching the reference, None if it cannot run at
+    that size) is carried over from earlier thread counts and returned updated.
+    """
+    model = load_backend(backend, path, threads=threads)
+    sizes = args.sizes if model.dynamic_size else [input_size_for(model, None, args.imgsz)]
+    results = []
+    for size in sizes:
+        if size not in agreement:
+            try:
+                agreement[size] = float(np.mean(top1(model, _frames, size) == reference))
+            except Exception as e:
+                print(f"{backend:<12} {path} @ {size}: cannot run ({str(e).strip().splitlines()[0]})")
+                agreement[size] = None
+        if agreement[size] is None:
+            continue
+        result = {"backend": backend, "model": os.path.abspath(path), "imgsz": size,
+                  "threads": threads, "agreement": agreement[size], "ok": agreement[size] >= args.min_agreement}
+        if result["ok"]:
+            # Candidates that fail the accuracy bound are not worth timing
+            result["latency_ms"] = latency(model, _frames, size, args.runs, args.warmup)
+        results.append(result)
+    model.close()
+    return results, agreement
+
+
+def in_fresh_process(args, fn, *fn_args):
+    """ Run fn(args, *fn_args) in a new process that loads the calibration frames first """
+    with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn"), initializer=_init_worker,
+                             initargs=(args.images, args.video, args.limit)) as pool:
+        return pool.submit(fn, args, *fn_args).result()
+
+
+def sweep(args, reference):
+    """ Measure every candidate; returns a list of result dicts """
+    results = []
+    for path in args.models:
+        for backend in backends_for(path):
+            if args.backends and backend not in args.backends:
+                continue
+            agreement = {}
+            for threads in args.threads:
+                try:
+                    group, agreement = in_fresh_process(args, measure, path, backend, threads, reference, agreement)
+                except ImportError as e:
+                    print(f"{backend:<12} {path}: skipped ({e})")
+                    break
+                except BrokenProcessPool:
+                    print(f"{backend:<12} {path} ({threads} threads): crashed, skipped")
+                    continue
+                for result in group:
+                    print(format_result(result))
+                results.extend(group)
+    return results
+
+
+def format_result(result):
+    line = (f"{result['backend']:<12} {os.path.basename(result['model']):<22} {result['imgsz']:>5} px "
+            f"{result['threads']:>2} threads  {100 * result['agreement']:6.2f}% agree")
+    if "latency_ms" in result:
+        line += f"  p50 {result['latency_ms']['p50_ms']:7.1f} ms  p95 {result['latency_ms']['p95_ms']:7.1f} ms"
+    else:
+        line += "  below the accuracy bound"
+    return line
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Find the fastest accurate inference settings for this device")
+    parser.add_argument("--reference", default="DrowsinessApp/best.pt", help="Model whose predictions count as correct")
+    parser.add_argument("--reference-backend", default="auto", choices=["auto", *BACKENDS])
+    parser.add_argument("--models", nargs="+", help="Model files/folders to try (default: the reference)")
+    parser.add_argument("--backends", help="Only try these backends (comma-separated)")
+    parser.add_argument("--sizes", default="224,320,480,640", help="Input sizes to try on models that accept any size")
+    parser.add_argument("--threads", default="auto", help="Thread counts to try (default: 1, 2, 4 and all cores)")
+    parser.add_argument("--imgsz", type=int, default=640, help="Input size if a model does not record it")
+    parser.add_argument("--images", help="Calibration images (folder, searched recursively)")
+    parser.add_argument("--video", help="Calibration video (frames sampled evenly)")
+    parser.add_argument("--limit", type=int, default=100, help="Calibration frames")
+    parser.add_argument("--min-agreement", type=float, default=0.98,
+                        help="Share of calibration frames that must match the reference's top-1")
+    parser.add_argument("--runs", type=int, default=50, help="Timed predictions per candidate")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--out", default=DEFAULT_PATH, help="Tuning profile to write")
+    args = parser.parse_args()
+    args.models = args.models or [args.reference]
+    args.backends = args.backends.split(",") if args.backends else None
+    args.sizes = [int(n) for n in args.sizes.split(",")]
+    args.threads = thread_counts(args.threads)
+
+    if not (args.images or args.video):
+        raise SystemExit("Give calibration frames with --images or --video")
+
+    reference_size, reference = in_fresh_process(args, reference_top1)
+    print(f"Reference: {args.reference} @ {reference_size} px on {len(reference)} frames, "
+          f"threads {args.threads}, sizes {args.sizes}")
+
+    results = sweep(args, reference)
+    passing = [r for r in results if r["ok"]]
+    if not passing:
+        print(f"No candidate agrees with the reference on {100 * args.min_agreement:.1f}% of frames; "
+              f"{args.out} left unchanged")
+        sys.exit(1)
+
+    best = min(passing, key=lambda r: r["latency_ms"]["p50_ms"])
+    print(f"Best: {format_result(best)}")
+    save_tuning(args.out, {
+        "backend": best["backend"], "model": best["model"], "imgsz": best["imgsz"], "threads": best["threads"],
+        "latency_ms": {"p50": best["latency_ms"]["p50_ms"], "p95": best["latency_ms"]["p95_ms"]},
+        "agreement": best["agreement"], "min_agreement": args.min_agreement,
+        "reference": {"model": os.path.abspath(args.reference), "imgsz": reference_size},
+        "calibration": {"source": args.images or args.video, "frames": len(reference),
+                        "center_crop": CENTER_CROP},
+        "candidates": results,
+    })
+    print(f"Saved tuning profile to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Inference FPS and CPU load of the Pi monitor's display modes.
+
+Runs the monitor's per-frame work (preprocess, inference, state engine) on
+recorded or synthetic frames, followed by each output mode:
+
+- headless     nothing drawn or shown (hardware/drowsiness.py --headless)
+- window       overlay + cv2.imshow/waitKey (the default; needs a display)
+- stream-idle  headless with the MJPEG preview server up but nobody watching
+- stream       headless with one client reading /stream (--preview-port)
+
+CPU load is process CPU time over wall time (100% = one core busy), so it
+includes the inference runtime's threads. The stream client only reads
+bytes off a socket; a real viewer would be another device.
+
+    python tools/bench_display.py --model best_ncnn_model --video drive.mp4
+    python tools/bench_display.py --fps 10 --seconds 20 --out display.json
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import threading
+import time
+
+import cv2
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drivesafe.backends import BACKENDS, load_backend
+from drivesafe.capture import read_frames
+from drivesafe.preprocess import Preprocessor
+from drivesafe.preview import PreviewServer, annotate
+from drivesafe.scheduler import FrameScheduler
+from drivesafe.state_engine import DrowsinessStateEngine
+
+MODES = ("headless", "window", "stream-idle", "stream")
+
+
+class StreamReader(threading.Thread):
+    """ Minimal /stream client: reads and discards the bytes """
+
+    def __init__(self, port):
+        super().__init__(daemon=True)
+        self.sock = socket.create_connection(("127.0.0.1", port))
+        self.sock.sendall(b"GET /stream HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        self.bytes = 0
+
+    def run(self):
+        buffer = bytearray(1 << 16)
+        try:
+            while True:
+                n = self.sock.recv_into(buffer)
+                if not n:
+                    return
+                self.bytes += n
+        except OSError:
+            pass
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+def has_display():
+    """ OpenCV's Qt/GTK window aborts the process instead of raising when there is no display """
+    return sys.platform != "linux" or bool(os.environ.get("DISPLAY") or os.environ.get("WAYLAND_DISPLAY"))
+
+
+def run_mode(mode, model, frames, args):
+    preprocess = Preprocessor(model.input_size or args.imgsz)
+    state_engine = DrowsinessStateEngine(alert_after=1.0)
+    scheduler = FrameScheduler(args.fps) if args.fps else None
+    preview = reader = None
+    if mode.startswith("stream"):
+        preview = PreviewServer(0, max_fps=args.preview_fps).start()
+        if mode == "stream":
+            reader = StreamReader(preview.port)
+            reader.start()
+            while not preview.clients:
+                time.sleep(0.01)
+    show_window = mode == "window"
+
+    count = 0
+    started = wall = cpu = None
+    warmup_until = time.perf_counter() + args.warmup
+    try:
+        while True:
+            now = time.perf_counter()
+            if started is None and now >= warmup_until:
+                started, cpu, count = now, time.process_time(), 0
+            if started is not None and now - started >= args.seconds:
+                break
+            if scheduler is not None:
+                scheduler.wait()
+            # A fresh array per frame, like picam2.capture_array()
+            frame = frames[count % len(frames)].copy()
+            probs = model.predict(preprocess(frame))[0]
+            decision = state_engine.update(probs, time.monotonic())
+
+            send_preview = preview is not None and preview.wants_frame()
+            if show_window or send_preview:
+                annotate(frame, decision, 1.0)
+            if send_preview:
+                preview.publish(frame)
+            if show_window:
+                cv2.imshow("Driver Monitor", frame)
+                cv2.waitKey(1)
+            count += 1
+        wall = time.perf_counter() - started
+        cpu = time.process_time() - cpu
+    finally:
+        if show_window:
+            cv2.destroyAllWindows()
+        if reader is not None:
+            reader.close()
+        if preview is not None:
+            preview.stop()
+
+    result = {"mode": mode, "frames": count, "fps": count / wall, "cpu_percent": 100.0 * cpu / wall,
+              "ms_per_frame": 1000.0 * wall / max(count, 1)}
+    if preview is not None:
+        stats = preview.stats()
+        result.update(preview_published=stats["published"], preview_encoded=stats["encoded"],
+                      preview_kbps=8 * stats["bytes_sent"] / wall / 1000.0)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark headless, window and MJPEG preview modes")
+    parser.add_argument("--model", default="best_ncnn_model")
+    parser.add_argument("--backend", default="auto", choices=["auto", *BACKENDS])
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--imgsz", type=int, default=640, help="Input size if the model does not record it")
+    parser.add_argument("--video", help="Frames to replay (default: synthetic 640x480)")
+    parser.add_argument("--frames", type=int, default=300, help="Frames kept in memory and looped")
+    parser.add_argument("--mode", action="append", choices=MODES, help="Mode(s) to run (default: all)")
+    parser.add_argument("--fps", type=float, default=0, help="Cap the loop like the Pi does (0 = as fast as possible)")
+    parser.add_argument("--preview-fps", type=float, default=5.0)
+    parser.add_argument("--seconds", type=float, default=10.0, help="Measured time per mode")
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--out", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    if args.video:
+        frames = list(read_frames(args.video, args.frames))
+    else:
+        frames = list(read_frames("synthetic", args.frames, size=(640, 480)))
+    if not frames:
+        raise SystemExit("No frames to replay")
+    model = load_backend(args.backend, args.model, threads=args.threads)
+
+    results = []
+    for mode in args.mode or MODES:
+        if mode == "window" and not has_display():
+            print(f"{mode:<12} skipped: no display")
+            continue
+        try:
+            result = run_mode(mode, model, frames, args)
+        except cv2.error as e:
+            # OpenCV built without GUI support (opencv-python-headless)
+            print(f"{mode:<12} skipped: {str(e).strip().splitlines()[-1]}")
+            continue
+        results.append(result)
+        line = f"{mode:<12} {result['fps']:7.1f} fps  {result['cpu_percent']:6.1f}% CPU  {result['ms_per_frame']:6.1f} ms/frame"
+        if "preview_published" in result:
+            line += (f"  preview: {result['preview_published']} published, "
+                     f"{result['preview_encoded']} encoded, {result['preview_kbps']:.0f} kbit/s")
+        print(line)
+    model.close()
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
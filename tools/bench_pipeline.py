@@ -0,0 +1,119 @@
+"""
+End-to-end FPS and latency: single-process Pi loop vs the multi-process pipeline.
+
+Both variants read the same camera stand-in (a video file or synthetic
+frames paced at --camera-fps, like a real sensor). They run the model
+uncapped and drive mock GPIO, with no window and no motion gate, so every
+decision costs a full inference. Latency is measured from the moment a
+frame leaves the camera to the moment the LEDs/buzzer are updated for it.
+
+- single: capture -> preprocess -> inference -> state -> GPIO in one loop
+  (what hardware/drowsiness.py does without --processes)
+- pipeline: drivesafe.pipeline with capture, inference and output in
+  separate processes (hardware/drowsiness.py --processes)
+
+CPU load is process CPU time over wall time (100% = one core busy),
+children included.
+
+    python tools/bench_pipeline.py --model best_ncnn_model --video drive.mp4 --seconds 20
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drivesafe.actuators import ActuatorController, MockBackend
+from drivesafe.backends import BACKENDS, load_backend
+from drivesafe.capture import open_capture, parse_size
+from drivesafe.pipeline import run_pipeline
+from drivesafe.preprocess import Preprocessor
+from drivesafe.profiling import RollingHistogram
+from drivesafe.state_engine import DrowsinessStateEngine
+
+
+def cpu_seconds():
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def single_process(args):
+    camera = open_capture(args.source, size=args.capture_size, fps=args.camera_fps, loop=True)
+    model = load_backend(args.backend, args.model, threads=args.threads)
+    preprocess = Preprocessor(model.input_size or args.imgsz)
+    state_engine = DrowsinessStateEngine(alert_after=1.0)
+    outputs = ActuatorController(MockBackend())
+    latency = RollingHistogram(window=100000)
+    count = 0
+    started = cpu = None
+    try:
+        while started is None or time.monotonic() - started < args.seconds:
+            ret, frame = camera.read()
+            captured_at = time.monotonic()
+            probs = model.predict(preprocess(frame))[0]
+            decision = state_engine.update(probs, captured_at)
+            outputs.apply(decision.label, decision.alarm)
+            now = time.monotonic()
+            if started is None:
+                # Timing starts with the first decision, like the pipeline's
+                started, cpu = now, cpu_seconds()
+                continue
+            latency.add(now - captured_at)
+            count += 1
+    finally:
+        camera.release()
+        model.close()
+        outputs.close()
+    elapsed = time.monotonic() - started
+    return {"variant": "single", "decisions": count, "fps": count / elapsed,
+            "cpu_percent": 100.0 * (cpu_seconds() - cpu) / elapsed, "latency": latency.summary()}
+
+
+def pipeline(args):
+    settings = {
+        "source": args.source, "capture_size": args.capture_size, "camera_fps": args.camera_fps, "loop": True,
+        "backend": args.backend, "model": args.model, "threads": args.threads, "imgsz": args.imgsz,
+        "fps": 0, "motion_gate": False, "gpio": "mock", "headless": True, "verbose": False,
+    }
+    cpu = cpu_seconds()
+    started = time.monotonic()
+    stats = run_pipeline(settings, seconds=args.seconds + args.startup)
+    wall = time.monotonic() - started
+    output = stats["output"]
+    return {"variant": "pipeline", "decisions": output["decisions"],
+            "fps": output["decisions"] / output["seconds"] if output["seconds"] else 0.0,
+            # Model loading happens inside the run here, so this slightly overstates the steady state
+            "cpu_percent": 100.0 * (cpu_seconds() - cpu) / wall, "latency": output["latency"],
+            "skipped_frames": stats["inference"]["skipped_frames"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the single-process loop with the multi-process pipeline")
+    parser.add_argument("--model", default="best_ncnn_model")
+    parser.add_argument("--backend", default="auto", choices=["auto", *BACKENDS])
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--imgsz", type=int, default=640, help="Input size if the model does not record it")
+    parser.add_argument("--video", help="Frames to replay (default: synthetic)")
+    parser.add_argument("--capture-size", type=parse_size, default=(320, 240), metavar="WxH")
+    parser.add_argument("--camera-fps", type=float, default=30.0, help="Rate the camera stand-in delivers frames at")
+    parser.add_argument("--seconds", type=float, default=15.0, help="Measured time per variant")
+    parser.add_argument("--startup", type=float, default=5.0, help="Extra pipeline time for loading the model")
+    parser.add_argument("--out", help="Also write the results as JSON")
+    args = parser.parse_args()
+    args.source = args.video or "synthetic"
+
+    results = [single_process(args), pipeline(args)]
+    print(f"{'variant':<10}{'fps':>8}{'CPU %':>8}{'p50 ms':>9}{'p95 ms':>9}{'max ms':>9}")
+    for r in results:
+        latency = r["latency"]
+        print(f"{r['variant']:<10}{r['fps']:>8.1f}{r['cpu_percent']:>8.1f}"
+              f"{latency['p50_ms']:>9.1f}{latency['p95_ms']:>9.1f}{latency['max_ms']:>9.1f}")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Micro-benchmark for the frame preprocessing chain.
+
+Compares the per-frame conversions both front ends used to do with the shared
+preallocated Preprocessor, reporting time and bytes allocated per frame.
+
+    python tools/bench_preprocess.py --frames 500 --width 640 --height 480
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drivesafe.preprocess import Preprocessor, BGR, GRAY, BROADCAST, TENSOR
+
+
+# -------------------- Chains under test --------------------
+def legacy_desktop(frame, size):
+    # VideoThread: full-resolution BGR->GRAY->BGR, then the model wrapper resizes
+    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    bgr = cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+    return cv2.resize(bgr, (size, size))
+
+
+def legacy_pi(frame, size):
+    # hardware/drowsiness.py: resize, gray, back to 3 channels
+    resized = cv2.resize(frame, (size, size))
+    gray = cv2.cvtColor(resized, cv2.COLOR_BGR2GRAY)
+    return cv2.cvtColor(gray, cv2.COLOR_GRAY2BGR)
+
+
+def measure(fn, frame, n):
+    # Warm up once so one-off buffer allocation is not counted
+    fn(frame)
+
+    start = time.perf_counter()
+    for _ in range(n):
+        fn(frame)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    before, _ = tracemalloc.get_traced_memory()
+    allocated = 0
+    for _ in range(n):
+        out = fn(frame)
+        current, peak = tracemalloc.get_traced_memory()
+        allocated += max(0, peak - before)
+        tracemalloc.reset_peak()
+        del out
+    tracemalloc.stop()
+
+    return 1e6 * elapsed / n, allocated / n
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark frame preprocessing")
+    parser.add_argument("--frames", type=int, default=300)
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--size", type=int, default=640)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 256, (args.height, args.width, 3), dtype=np.uint8)
+
+    chains = [
+        ("legacy desktop (full-res convert)", lambda f: legacy_desktop(f, args.size)),
+        ("legacy pi (resize, gray, bgr)", lambda f: legacy_pi(f, args.size)),
+    ]
+    for output in (BGR, GRAY, BROADCAST, TENSOR):
+        chains.append((f"preprocessor [{output}]", Preprocessor(args.size, output=output)))
+
+    print(f"{args.frames} frames, {args.width}x{args.height} -> {args.size}x{args.size}")
+    print(f"{'chain':<36}{'us/frame':>12}{'bytes/frame':>14}")
+    for name, fn in chains:
+        us, allocated = measure(fn, frame, args.frames)
+        print(f"{name:<36}{us:>12.1f}{allocated:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Latency / accuracy trade-off of face-ROI cropping against full-frame inference.
+
+Runs every image of a labelled test folder (class subfolders named absent,
+awake, drowsy) through both paths with the same backend and reports accuracy,
+per-class recall and per-image latency. The ROI path includes face detection,
+and counts an image as "absent" when no face is found, exactly like the live loops.
+
+    python tools/bench_roi.py --images dataset/test --model DrowsinessApp/best.pt --roi-imgsz 320
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drivesafe import LABELS
+from drivesafe.backends import BACKENDS, load_backend
+from drivesafe.preprocess import Preprocessor
+from drivesafe.roi import FaceROI, create_face_detector, ABSENT_PROBS
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+CLASS_INDEX = {name: index for index, name in LABELS.items()}
+
+
+def labelled_images(folder, limit):
+    samples = []
+    for root, _, files in os.walk(folder):
+        label = os.path.basename(root).lower()
+        if label not in CLASS_INDEX:
+            continue
+        samples.extend((os.path.join(root, f), CLASS_INDEX[label])
+                       for f in sorted(files) if f.lower().endswith(IMAGE_EXTENSIONS))
+    samples.sort()
+    if limit and len(samples) > limit:
+        samples = [samples[i] for i in np.linspace(0, len(samples) - 1, limit).astype(int)]
+    return samples
+
+
+def summarize(name, truth, predicted, latencies):
+    truth, predicted = np.asarray(truth), np.asarray(predicted)
+    latencies = 1000.0 * np.asarray(latencies)
+    recall = {LABELS[c]: float((predicted[truth == c] == c).mean()) if (truth == c).any() else None
+              for c in sorted(LABELS)}
+    return {
+        "mode": name,
+        "images": int(len(truth)),
+        "accuracy": float((truth == predicted).mean()),
+        "recall": recall,
+        "latency_ms": {"mean": float(latencies.mean()), "p50": float(np.percentile(latencies, 50)),
+                       "p95": float(np.percentile(latencies, 95))},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare face-ROI and full-frame inference")
+    parser.add_argument("--images", required=True, help="Test folder with absent/awake/drowsy subfolders")
+    parser.add_argument("--model", default="DrowsinessApp/best.pt")
+    parser.add_argument("--backend", default="auto", choices=["auto", *BACKENDS])
+    parser.add_argument("--imgsz", type=int, default=640, help="Full-frame input size if the model does not record it")
+    parser.add_argument("--roi-imgsz", type=int, default=320)
+    parser.add_argument("--face-model", help="YuNet .onnx face detector (default: Haar cascade)")
+    parser.add_argument("--limit", type=int, default=0, help="Max images (0 = all)")
+    parser.add_argument("--out", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    samples = labelled_images(args.images, args.limit)
+    if not samples:
+        raise SystemExit(f"No labelled images under {args.images}")
+
+    model = load_backend(args.backend, args.model)
+    full_preprocess = Preprocessor(model.input_size or args.imgsz)
+    roi_preprocess = Preprocessor(args.roi_imgsz if model.dynamic_size else model.input_size)
+    roi = FaceROI(create_face_detector(args.face_model), detect_every=1)
+
+    truth, full_pred, roi_pred, full_time, roi_time = [], [], [], [], []
+    faces_found = 0
+    for path, label in samples:
+        image = cv2.imread(path)
+        if image is None:
+            print(f"Cannot read {path}")
+            continue
+        truth.append(label)
+
+        started = time.perf_counter()
+        full_pred.append(int(model.predict(full_preprocess(image))[0].argmax()))
+        full_time.append(time.perf_counter() - started)
+
+        # Images are unrelated, so every one gets a fresh detection
+        started = time.perf_counter()
+        roi.reset()
+        box = roi.update(image)
+        if box is None:
+            probs = ABSENT_PROBS
+        else:
+            faces_found += 1
+            probs = model.predict(roi_preprocess(roi.crop(image, box)))[0]
+        roi_pred.append(int(probs.argmax()))
+        roi_time.append(time.perf_counter() - started)
+
+    results = [
+        summarize("full-frame", truth, full_pred, full_time),
+        summarize(f"roi@{roi_preprocess.size}", truth, roi_pred, roi_time),
+    ]
+    results[1]["face_found_rate"] = faces_found / max(1, len(truth))
+
+    print(f"{'mode':<14}{'acc':>8}{'absent':>9}{'awake':>9}{'drowsy':>9}{'mean ms':>10}{'p95 ms':>10}")
+    for r in results:
+        recall = [f"{100 * v:>8.1f}%" if v is not None else f"{'-':>9}" for v in r["recall"].values()]
+        print(f"{r['mode']:<14}{100 * r['accuracy']:>7.2f}%{''.join(recall)}"
+              f"{r['latency_ms']['mean']:>10.1f}{r['latency_ms']['p95']:>10.1f}")
+    print(f"Face found in {100 * results[1]['face_found_rate']:.1f}% of images")
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
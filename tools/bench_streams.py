@@ -0,0 +1,143 @@
+"""
+Throughput-vs-latency curve of the multi-stream inference server.
+
+For every stream count (and every --max-batch value, so batching can be
+compared with batch-size-1), N simulated cameras push frames at --fps into one
+InferenceServer. The tool measures decisions per second, capture-to-decision
+latency and the share of frames the server had to drop to keep up. With
+--slow-consumer, stream 0's reader stalls, to show it does not hold back the others.
+
+    python tools/bench_streams.py --model DrowsinessApp/best.pt --streams 1,2,4,8,16 --max-batch 1,8
+    python tools/bench_streams.py --video drive.mp4 --out curve.csv
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drivesafe.backends import BACKENDS, load_backend
+from drivesafe.capture import read_frames
+from drivesafe.server import InferenceServer
+
+
+def produce(stream, frames, fps, phase, stop):
+    period = 1.0 / fps
+    next_at = time.monotonic() + phase * period
+    i = 0
+    while not stop.is_set():
+        time.sleep(max(0.0, next_at - time.monotonic()))
+        stream.submit(frames[i % len(frames)])
+        i += 1
+        next_at += period
+
+
+def consume(stream, latencies, measure_from, stop, stall):
+    while not stop.is_set():
+        if stall:
+            time.sleep(stall)
+        result = stream.get_decision(timeout=0.2)
+        if result is not None and result.timestamp >= measure_from[0]:
+            latencies.append(result.latency)
+
+
+def run_point(model, frames, streams, max_batch, args):
+    server = InferenceServer(model, max_batch=max_batch, max_wait=args.max_wait_ms / 1000.0)
+    server.start()
+    stop = threading.Event()
+    measure_from = [float("inf")]
+    latencies = [[] for _ in range(streams)]
+    handles = [server.add_stream(i) for i in range(streams)]
+    threads = []
+    for i, stream in enumerate(handles):
+        stall = args.slow_consumer if i == 0 and streams > 1 else 0.0
+        threads.append(threading.Thread(target=produce, args=(stream, frames, args.fps, i / streams, stop)))
+        threads.append(threading.Thread(target=consume, args=(stream, latencies[i], measure_from, stop, stall)))
+    for t in threads:
+        t.start()
+
+    time.sleep(args.warmup)
+    frames_before = server.frames
+    captured_before = sum(s.buffer.captured for s in handles)
+    dropped_before = sum(s.buffer.dropped + s.buffer.stale for s in handles)
+    measure_from[0] = time.monotonic()
+    time.sleep(args.seconds)
+    elapsed = time.monotonic() - measure_from[0]
+    frames = server.frames - frames_before
+    captured = sum(s.buffer.captured for s in handles) - captured_before
+    dropped = sum(s.buffer.dropped + s.buffer.stale for s in handles) - dropped_before
+    mean_batch = server.stats()["mean_batch"]
+    stop.set()
+    for t in threads:
+        t.join()
+    server.stop()
+
+    # The stalled reader's own latency is not the server's latency
+    measured = [l for i, ls in enumerate(latencies) if not (args.slow_consumer and i == 0 and streams > 1) for l in ls]
+    latency = 1000.0 * np.asarray(measured) if measured else np.zeros(1)
+    return {
+        "streams": streams,
+        "max_batch": max_batch,
+        "offered_fps": streams * args.fps,
+        "throughput_fps": frames / elapsed,
+        "mean_batch": mean_batch,
+        "p50_ms": float(np.percentile(latency, 50)),
+        "p95_ms": float(np.percentile(latency, 95)),
+        "p99_ms": float(np.percentile(latency, 99)),
+        "dropped_pct": 100.0 * dropped / captured if captured else 0.0,
+        "slow_stream_results_dropped": handles[0].results_dropped if args.slow_consumer and streams > 1 else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput vs latency of the multi-stream server")
+    parser.add_argument("--model", default="DrowsinessApp/best.pt")
+    parser.add_argument("--backend", default="auto", choices=["auto", *BACKENDS])
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--video", help="Frames to replay (default: synthetic 640x480)")
+    parser.add_argument("--streams", default="1,2,4,8,16", help="Comma-separated stream counts")
+    parser.add_argument("--max-batch", default="1,8", help="Comma-separated batch limits to compare")
+    parser.add_argument("--max-wait-ms", type=float, default=10.0)
+    parser.add_argument("--fps", type=float, default=10.0, help="Frame rate of every simulated camera")
+    parser.add_argument("--seconds", type=float, default=10.0, help="Measured time per point")
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--slow-consumer", type=float, default=0.0, metavar="SECONDS",
+                        help="Stall stream 0's reader this long between reads")
+    parser.add_argument("--out", help="Write the curve as .csv or .json")
+    args = parser.parse_args()
+
+    frames = list(read_frames(args.video, 100)) if args.video else list(read_frames("synthetic", 100, size=(640, 480)))
+    if not frames:
+        raise SystemExit("No frames to replay")
+    model = load_backend(args.backend, args.model, threads=args.threads)
+    model.predict(np.zeros((1, 3, model.input_size or 640, model.input_size or 640), np.float32))
+
+    print(f"{'streams':>7}{'batch':>6}{'offered':>9}{'fps':>8}{'mean b':>8}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'drop %':>8}")
+    curve = []
+    for max_batch in [int(b) for b in args.max_batch.split(",")]:
+        for streams in [int(s) for s in args.streams.split(",")]:
+            point = run_point(model, frames, streams, max_batch, args)
+            curve.append(point)
+            print(f"{streams:>7}{max_batch:>6}{point['offered_fps']:>9.0f}{point['throughput_fps']:>8.1f}"
+                  f"{point['mean_batch']:>8.2f}{point['p50_ms']:>9.1f}{point['p95_ms']:>9.1f}"
+                  f"{point['p99_ms']:>9.1f}{point['dropped_pct']:>8.1f}")
+            if point["slow_stream_results_dropped"]:
+                print(f"{'':>13}stalled reader lost {point['slow_stream_results_dropped']} of its own results")
+
+    if args.out:
+        with open(args.out, "w", newline="") as f:
+            if args.out.endswith(".json"):
+                json.dump(curve, f, indent=2)
+            else:
+                writer = csv.DictWriter(f, fieldnames=list(curve[0]))
+                writer.writeheader()
+                writer.writerows(curve)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+Reproducible CPU benchmark of the detection pipeline.
+
+Replays a recorded video (or synthetic frames) through a front end's own
+per-frame code, timed by its own stage profiler (capture, preprocess,
+inference, postprocess and render):
+
+- desktop: DrowsinessApp's VideoThread.process_frame, called the way
+  run_serial calls it, back to back (needs PyQt5)
+- pi: hardware/drowsiness.py --replay --profile, the Pi monitor's own loop in
+  a subprocess, on a simulated clock so its frame-rate cap costs no time
+  (--video only; the whole video, with the Pi's own settings)
+
+Writes a JSON report with per-stage p50/p95/p99 and overall throughput. Given
+a previous report via --baseline, it exits non-zero if any stage's p95
+regressed by more than --tolerance.
+
+    python tools/benchmark.py --video drive.mp4 --out bench.json
+    python tools/benchmark.py --synthetic 300 --baseline bench.json
+    python tools/benchmark.py --front-end pi --video drive.mp4 --model hardware/best_ncnn_model
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from drivesafe import LABELS
+from drivesafe.capture import read_frames
+from drivesafe.files import file_sha256
+from drivesafe.profiling import StageProfiler
+from drivesafe.backends import BACKENDS, detect_backend, load_backend
+
+PI_SCRIPT = os.path.join(ROOT, "hardware", "drowsiness.py")
+FRONT_ENDS = ("desktop", "pi")
+
+
+# -------------------- Environment --------------------
+def environment():
+    env = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "opencv": cv2.__version__,
+        "numpy": np.__version__,
+    }
+    try:
+        import torch
+        env["torch"] = torch.__version__
+        env["torch_threads"] = torch.get_num_threads()
+    except ImportError:
+        pass
+    return env
+
+
+# -------------------- Front ends --------------------
+def run_desktop(frames, model, args):
+    sys.path.insert(0, os.path.join(ROOT, "DrowsinessApp"))
+    try:
+        import Drowsiness_Detection_App as desktop
+    except ImportError as e:
+        raise SystemExit(f"The desktop front end needs PyQt5 ({e}); try --front-end pi")
+    thread = desktop.VideoThread(model, dict(LABELS), pipelined=False, imgsz=args.imgsz,
+                                 motion_gate=args.motion_gate)
+    # Every frame of the run, not just the last 1000
+    thread.profiler = StageProfiler(True, window=100000)
+
+    # Warm up so one-off costs (lazy init, first-call allocation) stay out of the numbers
+    dummy = np.zeros((args.height, args.width, 3), dtype=np.uint8)
+    for _ in range(args.warmup):
+        model.predict(thread.preprocess(dummy))
+
+    started = time.perf_counter()
+    frames = iter(frames)
+    # VideoThread.run_serial without the camera wait
+    while True:
+        thread.profiler.begin()
+        frame = next(frames, None)
+        if frame is None:
+            break
+        thread.profiler.mark("capture")
+        thread.process_frame(frame, time.monotonic())
+        # A GUI that keeps up: the next frame may be rendered
+        thread.frame_shown()
+    elapsed = time.perf_counter() - started
+
+    report = {"stages": thread.profiler.report(), "frames": thread.frame_no, "seconds": elapsed,
+              "fps": thread.frame_no / max(elapsed, 1e-9), "imgsz": thread.preprocess.size}
+    if thread.motion_gate is not None:
+        report["motion_gate"] = thread.motion_gate.stats()
+    return report
+
+
+def run_pi(args):
+    with tempfile.TemporaryDirectory() as folder:
+        out = os.path.join(folder, "replay.json")
+        command = [sys.executable, PI_SCRIPT, "--source", args.video, "--replay", out, "--profile",
+                   "--gpio", "mock", "--headless", "--no-tuning", "--backend", args.backend, "--model", args.model]
+        if args.threads:
+            command += ["--threads", str(args.threads)]
+        process = subprocess.run(command, capture_output=True, text=True)
+        if process.returncode != 0 or not os.path.exists(out):
+            tail = (process.stderr or process.stdout).strip().splitlines()[-3:]
+            raise SystemExit(f"{PI_SCRIPT} failed with exit code {process.returncode}: {' / '.join(tail)}")
+        with open(out) as f:
+            result = json.load(f)
+    return {"stages": result["stages"], "frames": result["decisions"], "seconds": result["wall_seconds"],
+            "fps": result["decisions"] / max(result["wall_seconds"], 1e-9), "imgsz": result["input_size"],
+            "frames_dropped": result["frames_dropped"], "motion_gate": result.get("motion_gate")}
+
+
+def compare(report, baseline, tolerance):
+    """ Stages whose p95 got slower than baseline by more than `tolerance` (fraction) """
+    regressions = []
+    for stage, current in report["stages"].items():
+        before = baseline.get("stages", {}).get(stage, {})
+        if not current.get("count") or not before.get("count"):
+            continue
+        if current["p95_ms"] > before["p95_ms"] * (1.0 + tolerance):
+            regressions.append(f"{stage}: p95 {before['p95_ms']:.2f} -> {current['p95_ms']:.2f} ms")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the detection pipeline on CPU")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--video", help="Recorded video to replay")
+    source.add_argument("--synthetic", type=int, metavar="N", help="Use N synthetic frames")
+    parser.add_argument("--front-end", default="desktop", choices=FRONT_ENDS, help="Whose per-frame code to run")
+    parser.add_argument("--frames", type=int, help="Stop after this many video frames")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--model", default="DrowsinessApp/best.pt")
+    parser.add_argument("--backend", default="auto", choices=["auto", *BACKENDS])
+    parser.add_argument("--imgsz", type=int, default=640, help="Input size if the model does not record it")
+    parser.add_argument("--threads", type=int, help="Inference threads")
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--motion-gate", action="store_true", help="Enable motion-gated inference (desktop)")
+    parser.add_argument("--out", help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--baseline", help="Previous JSON report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed p95 slowdown per stage (fraction)")
+    args = parser.parse_args()
+    if args.front_end == "pi" and (args.synthetic or args.frames or args.motion_gate):
+        parser.error("--front-end pi replays a whole --video with the Pi's own settings")
+
+    if args.front_end == "pi":
+        report = run_pi(args)
+        backend = detect_backend(args.model) if args.backend == "auto" else args.backend
+        motion_gate = report["motion_gate"] is not None
+    else:
+        model = load_backend(args.backend, args.model, threads=args.threads)
+        if args.video:
+            frames = read_frames(args.video, args.frames)
+        else:
+            frames = read_frames("synthetic", args.synthetic, size=(args.width, args.height))
+        report = run_desktop(frames, model, args)
+        backend = model.name
+        motion_gate = args.motion_gate
+        model.close()
+    report["environment"] = environment()
+    report["config"] = {
+        "front_end": args.front_end,
+        "source": args.video or f"synthetic:{args.synthetic}",
+        "model": args.model,
+        "backend": backend,
+        "threads": args.threads,
+        "model_sha256": file_sha256(args.model),
+        "imgsz": report.pop("imgsz"),
+        "motion_gate": motion_gate,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(text)
+        print(f"{report['frames']} frames, {report['fps']:.1f} fps -> {args.out}")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        # Reports from before --front-end existed measured the desktop's stages
+        if baseline.get("config", {}).get("front_end", "desktop") != args.front_end:
+            raise SystemExit(f"{args.baseline} measured the {baseline['config']['front_end']} front end")
+        regressions = compare(report, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Backend parity check: every available backend must give the same top-1 class
+(and nearly the same probabilities) as the PyTorch reference on a folder of
+test images. A thin wrapper around tests/test_backend_parity.py.
+
+    python tools/check_backends.py --images dataset/test --pt DrowsinessApp/best.pt \
+        --ncnn hardware/best_ncnn_model --onnx best.onnx
+
+Backends whose runtime is not installed or whose model file is missing are
+reported as skipped. Exits non-zero if any backend disagrees on more than
+--max-disagreement of the images or on a probability by more than --atol.
+"""
+import argparse
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEST = os.path.join(ROOT, "tests", "test_backend_parity.py")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that all inference backends agree with PyTorch")
+    parser.add_argument("--images", required=True, help="Folder of test images (searched recursively)")
+    parser.add_argument("--pt", default="DrowsinessApp/best.pt", help="Reference PyTorch model")
+    parser.add_argument("--ncnn", help="NCNN export folder")
+    parser.add_argument("--onnx", help="ONNX export (checked with onnxruntime and OpenCV DNN)")
+    parser.add_argument("--limit", type=int, default=300, help="Max images to check (0 = all)")
+    parser.add_argument("--max-disagreement", type=float, default=0.0,
+                        help="Allowed fraction of images with a different top-1")
+    parser.add_argument("--atol", type=float, default=0.02, help="Allowed difference of any class probability")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.images):
+        raise SystemExit(f"No such folder: {args.images}")
+    os.environ.update({
+        "DRIVESAFE_PARITY_IMAGES": os.path.abspath(args.images),
+        "DRIVESAFE_PARITY_LIMIT": str(args.limit),
+        "DRIVESAFE_PT": os.path.abspath(args.pt),
+        # Empty = not given: skipped rather than looked up in its default place
+        "DRIVESAFE_NCNN": os.path.abspath(args.ncnn) if args.ncnn else "",
+        "DRIVESAFE_ONNX": os.path.abspath(args.onnx) if args.onnx else "",
+        "DRIVESAFE_PARITY_MAX_DISAGREEMENT": str(args.max_disagreement),
+        "DRIVESAFE_PARITY_ATOL": str(args.atol),
+    })
+    sys.exit(pytest.main([TEST, "-v", "-rs", "-p", "no:cacheprovider", "--rootdir", ROOT]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+Test-set evaluation: accuracy, per-class recall/precision, confusion matrix, images/sec.
+
+Reads a class-folder test set (<dir>/absent|awake|drowsy/*) or a split packed
+by tools/preprocess_dataset.py --pack. Images are decoded on a thread pool,
+preprocessed like the live loops and run through one or more backends in
+large batches.
+
+Predictions are cached under --cache, one file per (model file hash, backend,
+preprocessing config). An image whose fingerprint (size + mtime, or content
+hash for packed data) is already in the cache is not run again. A repeat
+run is then just a lookup, and after adding images only the new ones go
+through the model.
+
+    python tools/evaluate.py --images /data/dataset_preprocessed/test --model DrowsinessApp/best.pt
+    python tools/evaluate.py --packed /data/dataset_preprocessed/packed/test \\
+        --model DrowsinessApp/best.pt --model best_ncnn_model --min-accuracy 0.99
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drivesafe import LABELS
+from drivesafe.backends import BACKENDS, detect_backend, load_backend
+from drivesafe.files import file_sha256
+from drivesafe.packed_dataset import PackedDataset
+from drivesafe.preprocess import CENTER_CROP, Preprocessor, GRAY
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+CLASS_INDEX = {name: index for index, name in LABELS.items()}
+_SCALE = np.float32(1.0 / 255.0)
+
+
+# -------------------- Test sets --------------------
+class ImageFolder:
+    """ <root>/<class>/<image>; fingerprints are size + mtime, so unchanged files are never re-read """
+
+    def __init__(self, root, loaders):
+        self.root = root
+        self.paths, labels, self.fingerprints = [], [], []
+        for class_name in sorted(os.listdir(root)):
+            if class_name not in CLASS_INDEX or not os.path.isdir(os.path.join(root, class_name)):
+                continue
+            for name in sorted(os.listdir(os.path.join(root, class_name))):
+                if name.lower().endswith(IMAGE_EXTENSIONS):
+                    rel = f"{class_name}/{name}"
+                    st = os.stat(os.path.join(root, rel))
+                    self.paths.append(rel)
+                    labels.append(CLASS_INDEX[class_name])
+                    self.fingerprints.append(f"{st.st_size}:{st.st_mtime_ns}")
+        self.labels = np.array(labels, dtype=np.int64)
+        self.source = "images"
+        self._pool = ThreadPoolExecutor(loaders)
+        self._local = threading.local()
+
+    def load(self, indices, size, out):
+        """ Decode + preprocess indices into out (N x size x size uint8), in parallel """
+        def one(pair):
+            slot, i = pair
+            preprocess = getattr(self._local, "preprocess", None)
+            if preprocess is None or preprocess.size != size:
+                preprocess = self._local.preprocess = Preprocessor(size, output=GRAY)
+            image = cv2.imread(os.path.join(self.root, self.paths[i]), cv2.IMREAD_COLOR)
+            if image is None:
+                raise ValueError(f"Cannot read {self.paths[i]}")
+            out[slot] = preprocess(image)
+        list(self._pool.map(one, enumerate(indices)))
+
+
+class PackedSet:
+    """ A split from preprocess_dataset.py --pack: already gray and cropped, no decoding """
+
+    def __init__(self, directory):
+        self.data = PackedDataset(directory)
+        self.paths = self.data.paths
+        self.labels = self.data.labels
+        self.fingerprints = self.data.hashes
+        self.source = f"packed{self.data.size}"
+
+    def load(self, indices, size, out):
+        for slot, i in enumerate(indices):
+            image = self.data[i][0]
+            if image.shape[0] == size:
+                out[slot] = image
+            else:
+                cv2.resize(image, (size, size), dst=out[slot], interpolation=cv2.INTER_LINEAR)
+
+
+# -------------------- Cache --------------------
+def cache_path(cache_dir, model_hash, backend, config):
+    key = hashlib.sha256(json.dumps([model_hash, backend, config], sort_keys=True).encode()).hexdigest()[:24]
+    return os.path.join(cache_dir, f"{backend}-{key}.npz")
+
+
+def load_cache(path):
+    if not os.path.exists(path):
+        return {}
+    with np.load(path) as data:
+        return {(p, f): probs for p, f, probs in zip(data["paths"], data["fingerprints"], data["probs"])}
+
+
+def save_cache(path, cache):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    keys = list(cache)
+    tmp_path = path + ".tmp.npz"
+    np.savez(tmp_path,
+             paths=np.array([k[0] for k in keys], dtype=str),
+             fingerprints=np.array([k[1] for k in keys], dtype=str),
+             probs=np.array([cache[k] for k in keys], dtype=np.float32).reshape(-1, len(LABELS)))
+    os.replace(tmp_path, path)
+
+
+# -------------------- Evaluation --------------------
+def predict_missing(model, dataset, todo, size, batch_size):
+    """ Run the model on dataset indices `todo`; decoding of the next batch overlaps inference """
+    probs = np.empty((len(todo), len(LABELS)), dtype=np.float32)
+    gray = [np.empty((batch_size, size, size), dtype=np.uint8) for _ in range(2)]
+    tensor = np.empty((batch_size, 3, size, size), dtype=np.float32)
+    batches = [todo[i:i + batch_size] for i in range(0, len(todo), batch_size)]
+    model_seconds = 0.0
+    with ThreadPoolExecutor(1) as loader:
+        pending = loader.submit(dataset.load, batches[0], size, gray[0]) if batches else None
+        for b, indices in enumerate(batches):
+            pending.result()
+            if b + 1 < len(batches):
+                pending = loader.submit(dataset.load, batches[b + 1], size, gray[(b + 1) % 2])
+            n = len(indices)
+            plane = tensor[:n, 0]
+            np.copyto(plane, gray[b % 2][:n])
+            plane *= _SCALE
+            tensor[:n, 1:] = plane[:, None]
+            started = time.perf_counter()
+            probs[b * batch_size:b * batch_size + n] = model.predict(tensor[:n])
+            model_seconds += time.perf_counter() - started
+    return probs, model_seconds
+
+
+def percent(value):
+    return "-" if np.isnan(value) else f"{100 * value:.2f}%"
+
+
+def report(name, labels, predicted, elapsed, model_seconds, ran, cached):
+    classes = sorted(LABELS)
+    confusion = np.zeros((len(classes), len(classes)), dtype=np.int64)
+    np.add.at(confusion, (labels, predicted), 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # nan for classes with no images / no predictions
+        recall = confusion.diagonal() / confusion.sum(axis=1)
+        precision = confusion.diagonal() / confusion.sum(axis=0)
+    accuracy = float(confusion.diagonal().sum() / max(len(labels), 1))
+
+    print(f"\n== {name} ==")
+    print(f"Accuracy: {100 * accuracy:.2f}% on {len(labels)} images "
+          f"({ran} predicted, {cached} from cache)")
+    if ran:
+        print(f"Throughput: {ran / elapsed:.1f} images/sec end to end, {ran / max(model_seconds, 1e-9):.1f} model only")
+    print("true \\ predicted " + "".join(f"{LABELS[c]:>9}" for c in classes) + "   recall precision")
+    for c in classes:
+        print(f"{LABELS[c]:>17}" + "".join(f"{v:>9}" for v in confusion[c])
+              + f"  {percent(recall[c]):>7}  {percent(precision[c]):>7}")
+    return {
+        "name": name,
+        "images": int(len(labels)),
+        "accuracy": accuracy,
+        "recall": {LABELS[c]: None if np.isnan(recall[c]) else float(recall[c]) for c in classes},
+        "precision": {LABELS[c]: None if np.isnan(precision[c]) else float(precision[c]) for c in classes},
+        "confusion": confusion.tolist(),
+        "predicted": ran,
+        "cached": cached,
+        "images_per_sec": ran / elapsed if ran else None,
+        "model_images_per_sec": ran / model_seconds if ran and model_seconds else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the classifier on the test set")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--images", help="Test folder with absent/awake/drowsy subfolders")
+    source.add_argument("--packed", help="Packed split from tools/preprocess_dataset.py --pack")
+    parser.add_argument("--model", action="append",
+                        help="Model(s) to evaluate; repeat to compare (default: DrowsinessApp/best.pt)")
+    parser.add_argument("--backend", action="append", choices=["auto", *BACKENDS],
+                        help="Backend per --model, or one for all (default: auto)")
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--batch", type=int, default=64)
+    parser.add_argument("--imgsz", type=int, default=640, help="Input size if the model does not record it")
+    parser.add_argument("--loaders", type=int, default=min(8, os.cpu_count() or 1), help="Image decoding threads")
+    parser.add_argument("--cache", default=".eval_cache", help="Prediction cache folder")
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--min-accuracy", type=float, help="Exit 1 if any backend scores below this (0-1)")
+    parser.add_argument("--out", help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    models = args.model or ["DrowsinessApp/best.pt"]
+    backends = args.backend or ["auto"]
+    if len(backends) == 1:
+        backends = backends * len(models)
+    elif len(models) == 1:
+        models = models * len(backends)
+    if len(backends) != len(models):
+        raise SystemExit("Give one --backend, or one per --model")
+
+    if args.images:
+        dataset = ImageFolder(args.images, args.loaders)
+    else:
+        dataset = PackedSet(args.packed)
+    if not len(dataset.labels):
+        raise SystemExit("No test images found")
+
+    results = []
+    for model_path, backend_name in zip(models, backends):
+        if backend_name == "auto":
+            backend_name = detect_backend(model_path)
+        model_hash = file_sha256(model_path)
+        model = load_backend(backend_name, model_path, threads=args.threads)
+        size = model.input_size or args.imgsz
+        # Everything that changes the model's input goes into the cache key
+        config = {"size": size, "center_crop": CENTER_CROP, "gray": True, "source": dataset.source}
+        path = cache_path(args.cache, model_hash, backend_name, config)
+        cache = {} if args.no_cache else load_cache(path)
+
+        keys = list(zip(dataset.paths, dataset.fingerprints))
+        todo = [i for i, key in enumerate(keys) if key not in cache]
+        started = time.perf_counter()
+        model_seconds = 0.0
+        if todo:
+            probs, model_seconds = predict_missing(model, dataset, todo, size, args.batch)
+            for i, p in zip(todo, probs):
+                cache[keys[i]] = p
+            if not args.no_cache:
+                save_cache(path, cache)
+        elapsed = time.perf_counter() - started
+        model.close()
+
+        predicted = np.array([cache[key].argmax() for key in keys], dtype=np.int64)
+        results.append(report(f"{backend_name} ({os.path.basename(os.path.normpath(model_path))}, {size}px)",
+                              dataset.labels, predicted, elapsed, model_seconds, len(todo), len(keys) - len(todo)))
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.min_accuracy is not None:
+        failed = [r["name"] for r in results if r["accuracy"] < args.min_accuracy]
+        if failed:
+            print(f"\nBelow {100 * args.min_accuracy:.2f}%: {', '.join(failed)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,263 @@
+"""
+Extract training/evaluation images from the videos listed in meta_data.zip.
+
+Videos are decoded in parallel, one per worker process. Rather than decoding
+every frame, each worker jumps to the sample times (every --interval seconds):
+short gaps are crossed with grab(), which skips the color conversion, and long
+ones with a seek. Each sampled frame gets a 64-bit difference hash. Frames
+within --max-distance bits of a frame already kept for the same video and
+class are dropped as near-duplicates.
+
+Per-frame labels come from, in order of preference:
+- NTHU-DDD annotations next to the video (<name>_drowsiness.txt, one 0/1 per
+  frame: 0 = awake, 1 = drowsy);
+- the Parquet files written by tools/label_videos.py (--labels-dir);
+- --default-class for every frame.
+Frames without a label are skipped.
+
+Images go to <out>/<split>/<class>/ (the layout model_training.ipynb and
+tools/preprocess_dataset.py expect). <out>/extract_manifest.csv maps every
+image back to its video, frame and timestamp. <out>/extract_done.csv lists
+every video that was fully processed, including those that yielded no image
+(all unlabelled or duplicates); they are skipped on the next run.
+
+    python tools/extract_frames.py --videos-dir /data/videos --out /data/drowsiness_detection_dataset \\
+        --interval 0.5 --labels-dir labels/ --workers 8
+"""
+import argparse
+import csv
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drivesafe import LABELS
+from drivesafe.meta_data import VIDEO_SETS, read_video_info, resolve_videos, video_id
+
+MANIFEST_NAME = "extract_manifest.csv"
+MANIFEST_FIELDS = ["image", "split", "class", "set", "video", "frame", "time_s", "dhash"]
+DONE_NAME = "extract_done.csv"
+DONE_FIELDS = ["set", "video", "sampled", "kept"]
+NTHU_LABELS = {"0": "awake", "1": "drowsy"}
+DEFAULT_SPLITS = {"training": "train", "testing": "test", "recorded": "train"}
+
+# Bits set in every byte value, for Hamming distances between hashes
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+# -------------------- Hashing --------------------
+def dhash(gray):
+    """ 64-bit difference hash: sign of horizontal gradients on a 9x8 thumbnail """
+    small = cv2.resize(gray, (9, 8), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int(np.packbits(bits).view(">u8")[0])
+
+
+class HashIndex:
+    """ Kept hashes of one video/class; lookups are a vectorized XOR + popcount """
+
+    def __init__(self):
+        self._hashes = np.empty(64, dtype=np.uint64)
+        self._count = 0
+
+    def near(self, value, max_distance):
+        if not self._count:
+            return False
+        xor = np.bitwise_xor(self._hashes[:self._count], np.uint64(value))
+        distances = _POPCOUNT[xor.view(np.uint8)].reshape(-1, 8).sum(axis=1)
+        return bool((distances <= max_distance).any())
+
+    def add(self, value):
+        if self._count == len(self._hashes):
+            self._hashes = np.resize(self._hashes, 2 * len(self._hashes))
+        self._hashes[self._count] = value
+        self._count += 1
+
+
+# -------------------- Labels --------------------
+def nthu_annotation(path):
+    """ Per-frame labels from <stem>_drowsiness.txt in the video's folder, or None """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    matches = glob.glob(os.path.join(glob.escape(os.path.dirname(path)), f"*{glob.escape(stem)}_drowsiness.txt"))
+    if not matches:
+        return None
+    with open(matches[0]) as f:
+        digits = "".join(ch for ch in f.read() if ch in NTHU_LABELS)
+    return lambda frame: NTHU_LABELS[digits[frame]] if frame < len(digits) else None
+
+
+def parquet_labels(path):
+    """ Labels from a tools/label_videos.py output: the last labelled frame at or before each sample """
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(path, columns=["frame", "label"])
+    frames = table.column("frame").to_numpy()
+    labels = [str(v) for v in table.column("label").to_pylist()]
+
+    def lookup(frame):
+        i = int(np.searchsorted(frames, frame, side="right")) - 1
+        return labels[i] if i >= 0 else None
+    return lookup
+
+
+# -------------------- Worker --------------------
+def _init_worker():
+    cv2.setNumThreads(1)
+
+
+def extract_video(job):
+    """ Sample, label, dedup and write one video. Returns (manifest rows, stats) """
+    path, vid, video_set, split, out_dir, interval, max_distance, labels_path, default_class, quality, max_grab = job
+    started = time.perf_counter()
+    label_of = nthu_annotation(path)
+    if label_of is None and labels_path and os.path.exists(labels_path):
+        label_of = parquet_labels(labels_path)
+    if label_of is None:
+        label_of = lambda frame: default_class  # noqa: E731
+
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    step = max(1.0, interval * fps)
+    targets = sorted({int(round(i * step)) for i in range(int(total / step) + 1) if round(i * step) < total})
+
+    indexes = {}
+    rows = []
+    stats = {"sampled": 0, "duplicates": 0, "unlabelled": 0, "seeks": 0}
+    position = 0  # index of the next frame read() would return
+    try:
+        for target in targets:
+            label = label_of(target)
+            if label is None:
+                stats["unlabelled"] += 1
+                continue
+            if target - position > max_grab:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+                stats["seeks"] += 1
+            else:
+                while position < target and cap.grab():
+                    position += 1
+            position = target
+            ret, frame = cap.read()
+            if not ret:
+                break
+            position += 1
+            stats["sampled"] += 1
+
+            value = dhash(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+            index = indexes.setdefault(label, HashIndex())
+            if index.near(value, max_distance):
+                stats["duplicates"] += 1
+                continue
+            index.add(value)
+
+            name = f"{vid}_{target:06d}.jpg"
+            class_dir = os.path.join(out_dir, split, label)
+            os.makedirs(class_dir, exist_ok=True)
+            cv2.imwrite(os.path.join(class_dir, name), frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            rows.append({
+                "image": f"{split}/{label}/{name}", "split": split, "class": label, "set": video_set,
+                "video": vid, "frame": target, "time_s": f"{target / fps:.3f}", "dhash": f"{value:016x}",
+            })
+    finally:
+        cap.release()
+    stats["seconds"] = time.perf_counter() - started
+    return rows, stats
+
+
+# -------------------- CLI --------------------
+def read_manifest(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def write_manifest(path, rows, fields=MANIFEST_FIELDS):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+    os.replace(tmp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract deduplicated, labelled frames from the source videos")
+    parser.add_argument("--videos-dir", required=True, help="Folder containing the video files (searched recursively)")
+    parser.add_argument("--meta", default="meta_data.zip", help="meta_data.zip or its extracted folder")
+    parser.add_argument("--set", dest="sets", action="append", choices=sorted(VIDEO_SETS),
+                        help="Video set(s) to extract (default: all)")
+    parser.add_argument("--out", required=True, help="Dataset root; images go to <split>/<class>/")
+    parser.add_argument("--interval", type=float, default=0.5, help="Seconds between samples")
+    parser.add_argument("--max-distance", type=int, default=4,
+                        help="Drop frames within this many hash bits of one already kept (0 = exact only, -1 = off)")
+    parser.add_argument("--labels-dir", help="Parquet labels from tools/label_videos.py")
+    parser.add_argument("--default-class", choices=list(LABELS.values()),
+                        help="Class for frames without any other label")
+    parser.add_argument("--recorded-split", default="train", choices=["train", "test"])
+    parser.add_argument("--quality", type=int, default=95, help="JPEG quality")
+    parser.add_argument("--max-grab", type=int, default=60, help="Seek instead of grabbing past gaps longer than this")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+
+    splits = dict(DEFAULT_SPLITS, recorded=args.recorded_split)
+    rows = []
+    for video_set in args.sets or sorted(VIDEO_SETS):
+        rows.extend(read_video_info(args.meta, video_set))
+    resolved, missing = resolve_videos(rows, args.videos_dir)
+    for row in missing:
+        print(f"Missing: {row['set']}/{row['name']}")
+
+    os.makedirs(args.out, exist_ok=True)
+    manifest_path = os.path.join(args.out, MANIFEST_NAME)
+    manifest = read_manifest(manifest_path)
+    done_path = os.path.join(args.out, DONE_NAME)
+    finished = read_manifest(done_path)
+    # Videos with images in the manifest count too (manifests written before the done list existed)
+    done = {(r["set"], r["video"]) for r in finished + manifest}
+
+    jobs = []
+    for row, path in resolved:
+        vid = video_id(path, args.videos_dir)
+        if (row["set"], vid) in done:
+            continue
+        labels_path = os.path.join(args.labels_dir, f"{row['set']}__{vid}.parquet") if args.labels_dir else None
+        jobs.append((path, vid, row["set"], splits[row["set"]], args.out, args.interval, args.max_distance,
+                     labels_path, args.default_class, args.quality, args.max_grab))
+    print(f"{len(resolved)} videos found, {len(resolved) - len(jobs)} already extracted, {len(jobs)} to do")
+
+    started = time.perf_counter()
+    totals = {"sampled": 0, "duplicates": 0, "unlabelled": 0, "seeks": 0}
+    with ProcessPoolExecutor(args.workers, initializer=_init_worker) as pool:
+        futures = {pool.submit(extract_video, job): job for job in jobs}
+        for count, future in enumerate(as_completed(futures), 1):
+            job = futures[future]
+            try:
+                video_rows, stats = future.result()
+            except Exception as e:
+                print(f"[{count}/{len(jobs)}] {job[0]}: error: {e}")
+                continue
+            manifest.extend(video_rows)
+            finished.append({"set": job[2], "video": job[1], "sampled": stats["sampled"], "kept": len(video_rows)})
+            for key in totals:
+                totals[key] += stats[key]
+            print(f"[{count}/{len(jobs)}] {job[1]}: {len(video_rows)} kept of {stats['sampled']} sampled, "
+                  f"{stats['duplicates']} near-duplicates, {stats['unlabelled']} unlabelled ({stats['seconds']:.1f}s)")
+            # Saved after every video, so an interrupted run resumes where it stopped
+            write_manifest(manifest_path, manifest)
+            write_manifest(done_path, finished, DONE_FIELDS)
+
+    elapsed = time.perf_counter() - started
+    kept = totals["sampled"] - totals["duplicates"]
+    print(f"Kept {kept} of {totals['sampled']} sampled frames ({totals['duplicates']} near-duplicates dropped, "
+          f"{totals['unlabelled']} unlabelled, {totals['seeks']} seeks) in {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
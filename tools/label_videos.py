@@ -0,0 +1,165 @@
+"""
+Offline labelling of the archived videos listed in meta_data.zip.
+
+Each video is decoded in a worker process, frames are preprocessed exactly like
+the live loops and fed to the classifier in batches, and the per-frame
+absent/awake/drowsy label plus class probabilities go to one Parquet file per
+video. Videos that already have an output file are skipped, so an interrupted
+run picks up where it stopped.
+
+    python tools/label_videos.py --videos-dir /data/videos --set testing --out labels/ --workers 4
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drivesafe import LABELS
+from drivesafe.meta_data import VIDEO_SETS, read_video_info, resolve_videos, video_id
+from drivesafe.preprocess import Preprocessor
+from drivesafe.backends import BACKENDS, load_backend
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+
+# -------------------- Worker process --------------------
+_model = None
+
+
+def _init_worker(backend, model_path, threads):
+    global _model
+    cv2.setNumThreads(1)
+    _model = load_backend(backend, model_path, threads=threads)
+
+
+def _predict(batch):
+    return _model.predict(batch)
+
+
+def label_video(path, out_path, batch_size, imgsz, stride):
+    """ Label one video and write its Parquet file. Returns (frames labelled, seconds) """
+    started = time.perf_counter()
+    imgsz = _model.input_size or imgsz
+    # Center crop like Ultralytics' classify transforms, which the published accuracy was measured with
+    preprocess = Preprocessor(imgsz)
+    batch = np.empty((batch_size, 3, imgsz, imgsz), dtype=np.float32)
+
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    frame_index, filled = 0, 0
+    indices, probs = [], []
+    try:
+        while True:
+            if frame_index % stride:
+                if not cap.grab():
+                    break
+                frame_index += 1
+                continue
+            ret, frame = cap.read()
+            if not ret:
+                break
+            batch[filled] = preprocess(frame)[0]
+            indices.append(frame_index)
+            filled += 1
+            frame_index += 1
+            if filled == batch_size:
+                probs.append(_predict(batch))
+                filled = 0
+        if filled:
+            probs.append(_predict(batch[:filled]))
+    finally:
+        cap.release()
+
+    probs = np.concatenate(probs) if probs else np.empty((0, len(LABELS)), dtype=np.float32)
+    indices = np.asarray(indices, dtype=np.int32)
+    top1 = probs.argmax(axis=1) if len(probs) else np.empty(0, dtype=np.int64)
+
+    table = pa.table({
+        "frame": indices,
+        "time_s": (indices / fps).astype(np.float32),
+        "label": pa.array([LABELS[i] for i in top1], type=pa.string()).dictionary_encode(),
+        **{f"p_{LABELS[i]}": probs[:, i].astype(np.float32) for i in sorted(LABELS)},
+    })
+    # Write to a temporary name first so a killed run never leaves a half file behind
+    tmp_path = out_path + ".tmp"
+    pq.write_table(table, tmp_path, compression="zstd")
+    os.replace(tmp_path, out_path)
+    return len(indices), time.perf_counter() - started
+
+
+# -------------------- CLI --------------------
+def main():
+    parser = argparse.ArgumentParser(description="Label archived videos frame by frame")
+    parser.add_argument("--videos-dir", required=True, help="Folder containing the video files (searched recursively)")
+    parser.add_argument("--meta", default="meta_data.zip", help="meta_data.zip or its extracted folder")
+    parser.add_argument("--set", dest="sets", action="append", choices=sorted(VIDEO_SETS),
+                        help="Video set(s) to label (default: all)")
+    parser.add_argument("--model", default="DrowsinessApp/best.pt")
+    parser.add_argument("--backend", default="auto", choices=["auto", *BACKENDS])
+    parser.add_argument("--out", default="labels")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) // 2))
+    parser.add_argument("--batch", type=int, default=32)
+    parser.add_argument("--imgsz", type=int, default=640, help="Input size if the model does not record it")
+    parser.add_argument("--stride", type=int, default=1, help="Label every Nth frame")
+    args = parser.parse_args()
+
+    if pq is None:
+        sys.exit("pyarrow is required for the Parquet output: pip install pyarrow")
+
+    rows = []
+    for video_set in args.sets or sorted(VIDEO_SETS):
+        rows.extend(read_video_info(args.meta, video_set))
+    resolved, missing = resolve_videos(rows, args.videos_dir)
+    for row in missing:
+        print(f"Missing: {row['set']}/{row['name']}")
+
+    os.makedirs(args.out, exist_ok=True)
+    jobs = []
+    for row, path in resolved:
+        out_path = os.path.join(args.out, f"{row['set']}__{video_id(path, args.videos_dir)}.parquet")
+        if os.path.exists(out_path):
+            continue
+        jobs.append((path, out_path))
+    print(f"{len(resolved)} videos found, {len(resolved) - len(jobs)} already labelled, {len(jobs)} to do")
+
+    threads = max(1, (os.cpu_count() or 1) // args.workers)
+    started = time.perf_counter()
+    total_frames = 0
+    failed = []
+    with ProcessPoolExecutor(args.workers, initializer=_init_worker, initargs=(args.backend, args.model, threads)) as pool:
+        futures = {
+            pool.submit(label_video, path, out_path, args.batch, args.imgsz, args.stride): path
+            for path, out_path in jobs
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            path = futures[future]
+            try:
+                frames, seconds = future.result()
+            except Exception as e:
+                print(f"[{done}/{len(jobs)}] {path}: error: {e}")
+                failed.append(path)
+                continue
+            total_frames += frames
+            print(f"[{done}/{len(jobs)}] {os.path.basename(path)}: {frames} frames, {frames / max(seconds, 1e-9):.1f} fps")
+
+    elapsed = time.perf_counter() - started
+    print(f"Labelled {total_frames} frames in {elapsed:.1f}s ({total_frames / max(elapsed, 1e-9):.1f} frames/sec)")
+    if failed:
+        # Their Parquet files were not written, so the next run retries them
+        print(f"{len(failed)} of {len(jobs)} videos failed:")
+        for path in failed:
+            print(f"    {path}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+"""
+Parallel, incremental version of images_preproccessing.ipynb.
+
+Walks <input>/<split>/<class>/ and writes each image in grayscale to
+<output>/<split>/<class>/ under the same name, like the notebook did, on a
+process pool. A manifest in the output folder records every source's size,
+mtime and SHA-1:
+
+- same size and mtime as last time: skipped without being read;
+- mtime changed but same content hash: skipped, manifest updated;
+- otherwise it is converted again.
+
+With --pack, each split is also packed into memory-mapped uint8 shards plus
+an index (see drivesafe/packed_dataset.py), center-cropped to --pack-size
+like the classifier's own transforms. New images are appended as a new
+shard. The split is repacked only when images were changed or removed.
+
+    python tools/preprocess_dataset.py --input /data/drowsiness_detection_dataset \\
+        --output /data/dataset_preprocessed --workers 8 --pack
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drivesafe import LABELS
+from drivesafe.preprocess import Preprocessor, GRAY
+from drivesafe.packed_dataset import load_index, save_index, shard_name
+
+MANIFEST_NAME = ".preprocess_manifest.json"
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+CLASS_INDEX = {name: index for index, name in LABELS.items()}
+
+# Outcomes of process_image
+CONVERTED, SKIPPED, UNCHANGED, FAILED = "converted", "skipped", "unchanged", "failed"
+
+
+# -------------------- Worker processes --------------------
+def _init_worker():
+    # One image per process at a time; OpenCV's own threads would only compete
+    cv2.setNumThreads(1)
+
+
+def _write_atomic(path, gray):
+    ok, data = cv2.imencode(os.path.splitext(path)[1], gray)
+    if not ok:
+        raise ValueError(f"Cannot encode {path}")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data.tobytes())
+    os.replace(tmp_path, path)
+
+
+def process_image(job):
+    """ Convert one image to grayscale unless the manifest says it is up to date """
+    src, dst, cached = job
+    st = os.stat(src)
+    if (cached and cached["size"] == st.st_size and cached["mtime_ns"] == st.st_mtime_ns
+            and os.path.exists(dst)):
+        return SKIPPED, cached
+
+    with open(src, "rb") as f:
+        data = f.read()
+    entry = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "sha1": hashlib.sha1(data).hexdigest()}
+    if cached and cached["sha1"] == entry["sha1"] and os.path.exists(dst):
+        return UNCHANGED, entry
+
+    # Same as the notebook: decode in color, then BGR -> gray
+    img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        return FAILED, None
+    _write_atomic(dst, cv2.cvtColor(img, cv2.COLOR_BGR2GRAY))
+    return CONVERTED, entry
+
+
+def pack_rows(job):
+    """ Fill rows of a preallocated shard from the grayscale outputs """
+    shard_path, rows, size = job
+    shard = np.load(shard_path, mmap_mode="r+")
+    # Same crop and filter as the live loops, so evaluation on packed data matches them
+    preprocess = Preprocessor(size, output=GRAY)
+    for row, path in rows:
+        gray = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if gray is None:
+            raise ValueError(f"Cannot read {path}")
+        shard[row] = preprocess(gray)
+    shard.flush()
+    return len(rows)
+
+
+# -------------------- Manifest --------------------
+def load_manifest(output):
+    path = os.path.join(output, MANIFEST_NAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_manifest(output, manifest):
+    tmp_path = os.path.join(output, MANIFEST_NAME + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, os.path.join(output, MANIFEST_NAME))
+
+
+# -------------------- Packing --------------------
+def pack_split(pool, split_dir, items, size, shard_size, chunk):
+    """
+    items: sorted (relative path, sha1, label, grayscale image path).
+    Returns how many images were written into shards.
+    """
+    os.makedirs(split_dir, exist_ok=True)
+    index = load_index(split_dir)
+    current = {rel: sha1 for rel, sha1, _, _ in items}
+    if (index is not None and index["size"] == size
+            and all(current.get(item["path"]) == item["sha1"] for item in index["items"])):
+        # Nothing changed or removed: append the new images as new shards
+        packed = {item["path"] for item in index["items"]}
+        todo = [item for item in items if item[0] not in packed]
+    else:
+        if index is not None:
+            print(f"  {split_dir}: images or --pack-size changed, repacking")
+        for name in os.listdir(split_dir):
+            if name.startswith("shard-"):
+                os.remove(os.path.join(split_dir, name))
+        index = {"size": size, "shards": [], "items": []}
+        todo = items
+    if not todo:
+        return 0
+
+    jobs = []
+    for start in range(0, len(todo), shard_size):
+        part = todo[start:start + shard_size]
+        number = len(index["shards"])
+        name = shard_name(number)
+        # Preallocate on disk; workers fill their rows in place
+        np.lib.format.open_memmap(os.path.join(split_dir, name), mode="w+", dtype=np.uint8,
+                                  shape=(len(part), size, size)).flush()
+        index["shards"].append({"file": name, "count": len(part)})
+        for row, (rel, sha1, label, _) in enumerate(part):
+            index["items"].append({"path": rel, "sha1": sha1, "label": label, "shard": number, "row": row})
+        rows = [(row, item[3]) for row, item in enumerate(part)]
+        jobs.extend((os.path.join(split_dir, name), rows[i:i + chunk], size) for i in range(0, len(rows), chunk))
+
+    written = sum(pool.map(pack_rows, jobs))
+    save_index(split_dir, index)
+    return written
+
+
+# -------------------- CLI --------------------
+def main():
+    parser = argparse.ArgumentParser(description="Grayscale-convert (and optionally pack) the image dataset")
+    parser.add_argument("--input", required=True, help="Dataset root with <split>/<class>/ folders")
+    parser.add_argument("--output", required=True, help="Where the grayscale copy goes")
+    parser.add_argument("--splits", nargs="+", default=["train", "test"])
+    parser.add_argument("--classes", nargs="+", default=["awake", "drowsy", "absent"])
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--force", action="store_true", help="Ignore the manifest and convert everything")
+    parser.add_argument("--pack", action="store_true", help="Also write memory-mapped shards per split")
+    parser.add_argument("--pack-size", type=int, default=640, help="Side of the packed square images")
+    parser.add_argument("--shard-size", type=int, default=2048, help="Images per shard")
+    args = parser.parse_args()
+
+    unknown = [c for c in args.classes if c not in CLASS_INDEX]
+    if unknown:
+        raise SystemExit(f"Unknown class folder(s): {', '.join(unknown)} (expected {', '.join(CLASS_INDEX)})")
+
+    manifest = {} if args.force else load_manifest(args.output)
+    jobs, rels, images = [], [], {}
+    for split in args.splits:
+        images[split] = []
+        for class_name in args.classes:
+            class_dir = os.path.join(args.input, split, class_name)
+            if not os.path.isdir(class_dir):
+                continue
+            os.makedirs(os.path.join(args.output, split, class_name), exist_ok=True)
+            for name in sorted(os.listdir(class_dir)):
+                if not name.lower().endswith(IMAGE_EXTENSIONS):
+                    continue
+                rel = f"{split}/{class_name}/{name}"
+                dst = os.path.join(args.output, split, class_name, name)
+                jobs.append((os.path.join(class_dir, name), dst, manifest.get(rel)))
+                rels.append(rel)
+                images[split].append((rel, CLASS_INDEX[class_name], dst))
+    if not jobs:
+        raise SystemExit(f"No images under {args.input}/<split>/<class>/")
+
+    started = time.perf_counter()
+    counts = {CONVERTED: 0, SKIPPED: 0, UNCHANGED: 0, FAILED: 0}
+    new_manifest = {}
+    chunk = max(1, min(256, len(jobs) // (4 * args.workers)))
+    with ProcessPoolExecutor(args.workers, initializer=_init_worker) as pool:
+        for job, rel, (status, entry) in zip(jobs, rels, pool.map(process_image, jobs, chunksize=chunk)):
+            counts[status] += 1
+            if status == FAILED:
+                print(f"Error: cannot read {job[0]}")
+            else:
+                new_manifest[rel] = entry
+        save_manifest(args.output, new_manifest)
+        elapsed = time.perf_counter() - started
+        print(f"{len(jobs)} images: {counts[CONVERTED]} converted, {counts[SKIPPED]} skipped, "
+              f"{counts[UNCHANGED]} unchanged, {counts[FAILED]} failed in {elapsed:.1f}s "
+              f"({counts[CONVERTED] / max(elapsed, 1e-9):.0f} images/sec converted)")
+
+        if args.pack:
+            started = time.perf_counter()
+            for split in args.splits:
+                items = [(rel, new_manifest[rel]["sha1"], label, dst)
+                         for rel, label, dst in images[split] if rel in new_manifest]
+                split_dir = os.path.join(args.output, "packed", split)
+                written = pack_split(pool, split_dir, items, args.pack_size, args.shard_size, chunk=64)
+                print(f"Packed {split}: {written} new of {len(items)} images -> {split_dir}")
+            print(f"Packing took {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
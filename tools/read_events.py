@@ -0,0 +1,42 @@
+"""
+Read a DriveSafe event log (see drivesafe/event_log.py).
+
+Prints a summary of the records (time span, frames, alarms, share of time in
+each state) and optionally writes them out as CSV. Works on a single .bin
+file or on a log directory, including one that is still being written.
+
+    python tools/read_events.py logs/
+    python tools/read_events.py logs/ --csv trip.csv
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drivesafe.event_log import to_dataframe
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize / export a DriveSafe event log")
+    parser.add_argument("source", help="Log directory or .bin file")
+    parser.add_argument("--csv", help="Write all records to this CSV file")
+    args = parser.parse_args()
+
+    df = to_dataframe(args.source)
+    if df.empty:
+        raise SystemExit(f"No events in {args.source}")
+
+    span = (df["time"].iloc[-1] - df["time"].iloc[0]).total_seconds()
+    alarms = int((df["alarm"] & ~df["alarm"].shift(fill_value=False)).sum())
+    print(f"{len(df)} frames from {df['time'].iloc[0]} to {df['time'].iloc[-1]} ({span:.1f} s)")
+    print(f"Model ran on {100 * df['inferred'].mean():.1f}% of frames, {alarms} alarm(s)")
+    for state, share in df["state"].value_counts(normalize=True, sort=False).items():
+        print(f"  {state:<13}{100 * share:6.1f}%")
+
+    if args.csv:
+        df.to_csv(args.csv, index=False)
+        print(f"Wrote {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""
+Alert-latency regression test: replay annotated recorded drives through both front ends.
+
+The recorded videos listed in meta_data.zip that have ground truth in the
+events CSV (format in drivesafe/replay.py) are played through:
+
+- desktop: DrowsinessApp's VideoThread.process_frame, called the way
+  run_serial calls it
+- pi: hardware/drowsiness.py --replay, the Pi monitor's own loop, in a
+  subprocess
+
+Both run on a simulated clock (drivesafe.replay.ReplayClock). Waiting costs
+nothing and computing counts at its real duration times --cost-scale, so a
+drive replays as fast as the CPU allows. Stand-ins: the camera is the video,
+the alarm sound (audio thread and pygame mixer) is a recorder, and GPIO is
+the mock backend. With --cost-scale 0 the results depend only on the model
+and the decision logic, so repeated runs match exactly.
+
+Per front end it reports:
+- alert latency from the start of each drowsy episode to the alarm sound
+  (desktop) or buzzer (Pi)
+- missed episodes (no alarm before end + --grace)
+- false alarms per hour of video
+
+Exits 1 if a requested front end cannot run (desktop without PyQt5; pass
+--front-end pi to replay only the Pi), a video cannot be replayed or a budget
+is exceeded (--max-latency, --max-missed, --max-false-alarms-per-hour). Given a
+--baseline report, it also fails if p95 latency grew by more than
+--tolerance seconds, or if missed events or false alarms per hour increased.
+
+    python tools/replay.py --videos-dir /data/recorded --events recorded_events.csv --out replay.json
+    python tools/replay.py --videos-dir /data/recorded --events recorded_events.csv --baseline replay.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from drivesafe import LABELS
+from drivesafe.actuators import BUZZER
+from drivesafe.backends import BACKENDS, load_backend
+from drivesafe.capture import capture_size_for
+from drivesafe.meta_data import VIDEO_SETS, read_video_info, resolve_videos
+from drivesafe.replay import ReplayClock, ReplaySource, read_events, score, summarize
+from drivesafe.state_engine import ALERT_SECONDS
+
+PI_SCRIPT = os.path.join(ROOT, "hardware", "drowsiness.py")
+FRONT_ENDS = ("desktop", "pi")
+# Alert latency budget on top of the alert delay itself: EMA smoothing (~0.14 s)
+# plus a couple of frame intervals at the Pi's 10 fps
+LATENCY_ALLOWANCE = 0.5
+
+
+# -------------------- Desktop --------------------
+class AlarmRecorder:
+    """ Stands in for the AudioController (and so the mixer): records when the alarm sound would start/stop """
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.requests = []
+
+    def request(self, on):
+        self.requests.append((self.clock(), on))
+
+
+def load_desktop():
+    """ The desktop app module, or None if PyQt5 is missing """
+    sys.path.insert(0, os.path.join(ROOT, "DrowsinessApp"))
+    try:
+        import Drowsiness_Detection_App as desktop
+    except ImportError as e:
+        print(f"desktop: FAILED, cannot load the app ({e}); use --front-end pi to replay only the Pi")
+        return None
+    return desktop
+
+
+def replay_desktop(desktop, model, path, args):
+    clock = ReplayClock(args.cost_scale)
+    audio = AlarmRecorder(clock)
+    # Same settings as DrowsinessApp.create_thread, serial so every step runs on the simulated clock
+    thread = desktop.VideoThread(model, dict(LABELS), pipelined=False, audio=audio,
+                                 clock=clock, sleep=clock.sleep)
+    camera = ReplaySource(path, clock, size=capture_size_for(thread.preprocess.size))
+    started = time.perf_counter()
+    # VideoThread.run_serial, stopping at the end of the video
+    while True:
+        if thread.scheduler is not None:
+            thread.scheduler.wait()
+        ret, frame = camera.read()
+        if not ret:
+            break
+        thread.process_frame(frame, clock())
+        # A GUI that keeps up: the next frame may be rendered
+        thread.frame_shown()
+    camera.release()
+    return {"finished": camera.finished, "video_seconds": camera.seconds,
+            "wall_seconds": time.perf_counter() - started, "frames_read": camera.frames_read,
+            "frames_dropped": camera.frames_dropped,
+            "alarm_on_s": [t - camera.start for t, on in audio.requests if on]}
+
+
+# -------------------- Pi --------------------
+def replay_pi(path, args):
+    with tempfile.TemporaryDirectory() as folder:
+        out = os.path.join(folder, "replay.json")
+        command = [sys.executable, PI_SCRIPT, "--source", path, "--replay", out,
+                   "--replay-cost-scale", str(args.cost_scale), "--gpio", "mock", "--headless", "--no-tuning",
+                   "--backend", args.backend, "--model", args.model]
+        if args.threads:
+            command += ["--threads", str(args.threads)]
+        started = time.perf_counter()
+        process = subprocess.run(command, capture_output=True, text=True)
+        wall = time.perf_counter() - started
+        if process.returncode != 0 or not os.path.exists(out):
+            tail = (process.stderr or process.stdout).strip().splitlines()[-3:]
+            raise RuntimeError(f"exit code {process.returncode}: {' / '.join(tail)}")
+        with open(out) as f:
+            result = json.load(f)
+    return {"finished": result["finished"], "video_seconds": result["video_seconds"], "wall_seconds": wall,
+            "frames_read": result["frames_read"], "frames_dropped": result["frames_dropped"],
+            "alarm_on_s": [t for t, output, on in result["transitions"] if output == BUZZER and on]}
+
+
+# -------------------- Report --------------------
+def format_summary(summary):
+    line = (f"{summary['videos']} videos, {summary['hours']:.2f} h, {summary['detected']}/{summary['events']} "
+            f"events detected ({summary['missed']} missed), {summary['false_alarms_per_hour']:.1f} false alarms/h")
+    if "latency_p50_s" in summary:
+        line += (f", latency p50/p95/max {summary['latency_p50_s']:.2f}/{summary['latency_p95_s']:.2f}/"
+                 f"{summary['latency_max_s']:.2f} s")
+    return line
+
+
+def check(front_end, summary, args, baseline):
+    """ Budget and baseline failures for one front end, as messages """
+    failures = []
+    if summary["missed"] > args.max_missed:
+        failures.append(f"{summary['missed']} missed events (budget {args.max_missed})")
+    if args.max_latency is not None and summary.get("latency_max_s", 0.0) > args.max_latency:
+        failures.append(f"alert latency {summary['latency_max_s']:.2f} s (budget {args.max_latency:.2f} s)")
+    if args.max_false_alarms_per_hour is not None and summary["false_alarms_per_hour"] > args.max_false_alarms_per_hour:
+        failures.append(f"{summary['false_alarms_per_hour']:.1f} false alarms/h "
+                        f"(budget {args.max_false_alarms_per_hour:.1f})")
+    previous = (baseline or {}).get(front_end, {}).get("summary")
+    if previous:
+        if "latency_p95_s" in summary and "latency_p95_s" in previous and \
+                summary["latency_p95_s"] > previous["latency_p95_s"] + args.tolerance:
+            failures.append(f"p95 latency {previous['latency_p95_s']:.2f} -> {summary['latency_p95_s']:.2f} s")
+        if summary["missed"] > previous["missed"]:
+            failures.append(f"missed events {previous['missed']} -> {summary['missed']}")
+        if summary["false_alarms_per_hour"] > previous["false_alarms_per_hour"] + 1e-9:
+            failures.append(f"false alarms/h {previous['false_alarms_per_hour']:.1f} -> "
+                            f"{summary['false_alarms_per_hour']:.1f}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay annotated drives and check alert latency and false alarms")
+    parser.add_argument("--videos-dir", required=True, help="Folder containing the video files (searched recursively)")
+    parser.add_argument("--events", required=True, help="Ground-truth drowsy episodes (CSV: name,start_s,end_s)")
+    parser.add_argument("--meta", default="meta_data.zip", help="meta_data.zip or its extracted folder")
+    parser.add_argument("--set", default="recorded", choices=sorted(VIDEO_SETS))
+    parser.add_argument("--front-end", action="append", choices=FRONT_ENDS, help="Front end(s) to replay (default: both)")
+    parser.add_argument("--model", default="DrowsinessApp/best.pt", help="Model used by both front ends")
+    parser.add_argument("--backend", default="auto", choices=["auto", *BACKENDS])
+    parser.add_argument("--threads", type=int, help="Inference threads (default: each front end's own)")
+    parser.add_argument("--cost-scale", type=float, default=1.0,
+                        help="Simulated seconds per second of computing (0 = free and deterministic)")
+    parser.add_argument("--grace", type=float, default=2.0, help="Seconds after an episode ends an alarm still counts")
+    parser.add_argument("--max-latency", type=float, default=ALERT_SECONDS + LATENCY_ALLOWANCE,
+                        help=f"Budget for the slowest alert (seconds; default: the {ALERT_SECONDS:g} s alert delay "
+                             f"+ {LATENCY_ALLOWANCE:g} s)")
+    parser.add_argument("--max-missed", type=int, default=0)
+    parser.add_argument("--max-false-alarms-per-hour", type=float)
+    parser.add_argument("--baseline", help="Previous --out report to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed p95 latency increase over the baseline (seconds)")
+    parser.add_argument("--out", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    events = read_events(args.events)
+    resolved, missing = resolve_videos(read_video_info(args.meta, args.set), args.videos_dir)
+    for row in missing:
+        if row["name"] in events:
+            print(f"Missing video: {row['name']}")
+    videos = [(row["name"], path) for row, path in resolved if row["name"] in events]
+    if not videos:
+        raise SystemExit(f"No annotated {args.set} videos found in {args.videos_dir}")
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    report = {"settings": {"model": args.model, "backend": args.backend, "threads": args.threads,
+                           "cost_scale": args.cost_scale, "grace": args.grace, "set": args.set}}
+    failed = False
+    for front_end in args.front_end or FRONT_ENDS:
+        if front_end == "desktop":
+            desktop = load_desktop()
+            if desktop is None:
+                failed = True
+                continue
+            model = load_backend(args.backend, args.model, threads=args.threads)
+        results = []
+        for name, path in videos:
+            try:
+                if front_end == "desktop":
+                    result = replay_desktop(desktop, model, path, args)
+                else:
+                    result = replay_pi(path, args)
+                if not result["finished"]:
+                    raise RuntimeError("stopped before the end of the video")
+            except Exception as e:
+                print(f"{front_end:<8} {name}: FAILED ({e})")
+                failed = True
+                continue
+            result.update(name=name, **score(result["alarm_on_s"], events[name], result["video_seconds"], args.grace))
+            results.append(result)
+            latencies = ", ".join(f"{t:.2f}" for t in result["latencies_s"]) or "-"
+            print(f"{front_end:<8} {name:<12} {result['video_seconds']:7.1f} s in {result['wall_seconds']:6.1f} s "
+                  f"({result['video_seconds'] / max(result['wall_seconds'], 1e-9):5.1f}x)  "
+                  f"{result['detected']}/{result['events']} events, latency {latencies} s, "
+                  f"{result['false_alarms']} false alarms")
+        if front_end == "desktop":
+            model.close()
+        if not results:
+            continue
+        summary = summarize(results)
+        report[front_end] = {"summary": summary, "videos": results}
+        print(f"{front_end:<8} total: {format_summary(summary)}")
+        for failure in check(front_end, summary, args, baseline):
+            print(f"{front_end:<8} REGRESSION: {failure}")
+            failed = True
+
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(report, f, indent=2)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Serve drowsiness decisions for many camera streams from one process.
+
+Every positional source becomes a stream: a video file (replayed at --fps,
+looping with --loop), an RTSP/HTTP URL or a camera index. With --listen,
+every TCP connection on that port is an extra stream. It sends frames as a
+4-byte big-endian length followed by a JPEG. --push is the matching client.
+State changes are printed per stream; Ctrl+C prints the server statistics.
+
+    python tools/stream_server.py depot/cab1.mp4 depot/cab2.mp4 --loop --listen 5600
+    python tools/stream_server.py --push 127.0.0.1:5600 depot/cab3.mp4
+"""
+import argparse
+import json
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from drivesafe.backends import BACKENDS, load_backend
+from drivesafe.server import InferenceServer
+
+_HEADER = struct.Struct(">I")
+
+
+# -------------------- Stream sources --------------------
+def feed_capture(stream, source, fps, loop, stop):
+    """ Read a file / URL / camera and submit frames; files are paced to fps """
+    is_file = os.path.isfile(source)
+    cap = cv2.VideoCapture(int(source) if source.isdigit() else source)
+    if not cap.isOpened():
+        print(f"[{stream.id}] Cannot open {source}")
+        stream.close()
+        return
+    period = 1.0 / fps if is_file and fps else 0.0
+    next_at = time.monotonic()
+    while not stop.is_set():
+        ret, frame = cap.read()
+        if not ret:
+            if is_file and loop:
+                cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                continue
+            break
+        stream.submit(frame)
+        if period:
+            next_at += period
+            time.sleep(max(0.0, next_at - time.monotonic()))
+    cap.release()
+    stream.close()
+
+
+def recv_exact(conn, size):
+    data = bytearray()
+    while len(data) < size:
+        chunk = conn.recv(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+
+def feed_socket(stream, conn):
+    with conn:
+        while not stream.closed:
+            header = recv_exact(conn, _HEADER.size)
+            if header is None:
+                break
+            payload = recv_exact(conn, _HEADER.unpack(header)[0])
+            if payload is None:
+                break
+            frame = cv2.imdecode(np.frombuffer(payload, np.uint8), cv2.IMREAD_COLOR)
+            if frame is not None:
+                stream.submit(frame)
+    stream.close()
+
+
+def listen(server, port, start_consumer, stop):
+    sock = socket.create_server(("0.0.0.0", port))
+    sock.settimeout(0.5)
+    print(f"Listening for frame streams on port {port}")
+    while not stop.is_set():
+        try:
+            conn, addr = sock.accept()
+        except socket.timeout:
+            continue
+        stream = server.add_stream(f"{addr[0]}:{addr[1]}")
+        print(f"[{stream.id}] connected")
+        threading.Thread(target=feed_socket, args=(stream, conn), daemon=True).start()
+        start_consumer(stream)
+    sock.close()
+
+
+def push(address, source, fps, quality):
+    """ Client side of --listen: send a video or camera as length-prefixed JPEGs """
+    host, port = address.rsplit(":", 1)
+    cap = cv2.VideoCapture(int(source) if source.isdigit() else source)
+    period = 1.0 / fps if fps else 0.0
+    with socket.create_connection((host, int(port))) as conn:
+        next_at = time.monotonic()
+        while True:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            ok, jpeg = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+            conn.sendall(_HEADER.pack(len(jpeg)) + jpeg.tobytes())
+            if period:
+                next_at += period
+                time.sleep(max(0.0, next_at - time.monotonic()))
+    cap.release()
+
+
+# -------------------- Consumers --------------------
+def print_state_changes(stream):
+    state = None
+    while not stream.closed:
+        result = stream.get_decision(timeout=0.5)
+        if result is None:
+            continue
+        if result.decision.state != state:
+            state = result.decision.state
+            print(f"[{stream.id}] {state} (latency {1000 * result.latency:.0f} ms, batch {result.batch_size})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Multi-stream drowsiness inference server")
+    parser.add_argument("sources", nargs="*", help="Video files, stream URLs or camera indexes")
+    parser.add_argument("--model", default="DrowsinessApp/best.pt")
+    parser.add_argument("--backend", default="auto", choices=["auto", *BACKENDS])
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--max-batch", type=int, default=8)
+    parser.add_argument("--max-wait-ms", type=float, default=10.0, help="Longest a frame waits for the batch to fill")
+    parser.add_argument("--fps", type=float, default=10.0, help="Replay rate for video files")
+    parser.add_argument("--loop", action="store_true", help="Restart video files at the end")
+    parser.add_argument("--listen", type=int, help="Also accept socket streams on this TCP port")
+    parser.add_argument("--push", metavar="HOST:PORT", help="Client mode: send the first source to a server")
+    parser.add_argument("--jpeg-quality", type=int, default=80)
+    args = parser.parse_args()
+
+    if args.push:
+        if len(args.sources) != 1:
+            raise SystemExit("--push needs exactly one source")
+        push(args.push, args.sources[0], args.fps, args.jpeg_quality)
+        return
+    if not args.sources and args.listen is None:
+        raise SystemExit("Give at least one source or --listen PORT")
+
+    server = InferenceServer(load_backend(args.backend, args.model, threads=args.threads),
+                             max_batch=args.max_batch, max_wait=args.max_wait_ms / 1000.0)
+    server.start()
+    stop = threading.Event()
+
+    def start_consumer(stream):
+        threading.Thread(target=print_state_changes, args=(stream,), daemon=True).start()
+
+    for index, source in enumerate(args.sources):
+        stream = server.add_stream(f"{index}:{os.path.basename(source)}")
+        threading.Thread(target=feed_capture, args=(stream, source, args.fps, args.loop, stop), daemon=True).start()
+        start_consumer(stream)
+    if args.listen is not None:
+        threading.Thread(target=listen, args=(server, args.listen, start_consumer, stop), daemon=True).start()
+
+    try:
+        while args.listen is not None or server.streams():
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        print(json.dumps(server.stats(), indent=2))
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()